@@ -0,0 +1,134 @@
+"""Cache the data frames downloaded from Google Sheets in local files."""
+
+import hashlib
+import logging
+import os
+import pickle
+import re
+
+from pathlib import Path
+from typing import Optional
+from typing import Tuple
+from typing import TYPE_CHECKING
+
+from mesmsage import constants
+
+# the data frames are only pickled and unpickled, which imports pandas
+# when it is needed, and so pandas is only imported to check the types
+if TYPE_CHECKING:
+    import pandas
+
+
+class CacheNotFoundError(Exception):
+    """Define error to indicate that there is no cached data frame available."""
+
+    pass
+
+
+def get_user_cache_home() -> Path:
+    """Get the directory in which the current user's programs keep their caches."""
+    # follow the conventions of each platform, which is %LOCALAPPDATA% on
+    # Windows and $XDG_CACHE_HOME, defaulting to ~/.cache, everywhere else
+    local_app_data = os.getenv(constants.environment.Local_App_Data)
+    if os.name == constants.files.Windows and local_app_data:
+        return Path(local_app_data)
+    cache_home = os.getenv(constants.environment.Cache_Home)
+    if cache_home:
+        return Path(cache_home)
+    return Path.home() / constants.files.Cache_Home
+
+
+def get_cache_directory(cache_directory: Path = None) -> Path:
+    """Get the directory for the cache files, defaulting to one that only the user can access."""
+    # note that a directory that others can write to, like one in the current
+    # directory, would let them replace a cache file that is later unpickled
+    if cache_directory is None:
+        cache_directory = get_user_cache_home() / constants.files.Cache
+    return cache_directory
+
+
+def create_cache_directory(cache_directory: Path) -> None:
+    """Create the cache directory so that only the current user may read or write it."""
+    cache_directory.mkdir(
+        mode=constants.files.Private_Directory_Mode, parents=True, exist_ok=True
+    )
+
+
+def is_private_file(cache_file: Path) -> bool:
+    """Determine if the file and its directory belong to the current user and only they may write them."""
+    # there are no owners or permission bits to check for on Windows
+    if not hasattr(os, "getuid"):
+        return True
+    for path in (cache_file.parent, cache_file):
+        path_status = path.stat()
+        if (
+            path_status.st_uid != os.getuid()
+            or path_status.st_mode & constants.files.Shared_Write_Mode
+        ):
+            return False
+    return True
+
+
+def get_cache_file(
+    cache_directory: Path,
+    spreadsheet_id: str,
+    sheet_name: str,
+    projection: Optional[str] = None,
+) -> Path:
+    """Get the name of the cache file for the worksheet in the spreadsheet."""
+    # the worksheet name may contain any character and thus is
+    # restricted to the characters that are valid in a file name
+    safe_sheet_name = re.sub(r"[^\w.-]", "_", sheet_name)
+    cache_file_name = spreadsheet_id + constants.markers.Separator + safe_sheet_name
+    # a download of only part of the worksheet is cached separately
+    # from the complete worksheet and from all of the other parts
+    if projection:
+        cache_file_name = (
+            cache_file_name
+            + constants.markers.Separator
+            + hashlib.sha256(projection.encode()).hexdigest()[: constants.sizes.Hash]
+        )
+    return cache_directory / (cache_file_name + constants.files.Cache_Extension)
+
+
+def read_cache(cache_file: Path) -> Tuple[Optional[str], Optional["pandas.DataFrame"]]:
+    """Read the revision and the data frame from the cache file, if it exists."""
+    logger = logging.getLogger(constants.logging.Rich)
+    try:
+        # unpickling a file can run any code and so a file that someone
+        # else could have written is never read and instead is ignored
+        if not is_private_file(cache_file):
+            logger.warning(
+                f"Ignoring cache file {cache_file} since others may write to it"
+            )
+            return None, None
+        with open(cache_file, "rb") as cache:
+            revision, dataframe = pickle.load(cache)
+    # the cache does not exist or it cannot be read and so
+    # it is equivalent to an empty cache
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError) as e:
+        logger.debug(f"Could not read cache file {cache_file}: {e}")
+        return None, None
+    logger.debug(f"Read revision {revision} from cache file {cache_file}")
+    return revision, dataframe
+
+
+def write_cache(
+    cache_file: Path, revision: Optional[str], dataframe: "pandas.DataFrame"
+) -> None:
+    """Write the revision and the data frame to the cache file."""
+    logger = logging.getLogger(constants.logging.Rich)
+    create_cache_directory(cache_file.parent)
+    # write to a temporary file and then replace the cache file so
+    # that an interrupted write never leaves behind a partial cache;
+    # note that only the current user may read or write the file
+    temporary_cache_file = cache_file.with_suffix(constants.files.Temporary_Extension)
+    file_descriptor = os.open(
+        temporary_cache_file,
+        os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+        constants.files.Private_File_Mode,
+    )
+    with os.fdopen(file_descriptor, "wb") as cache:
+        pickle.dump((revision, dataframe), cache, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_cache_file, cache_file)
+    logger.debug(f"Wrote revision {revision} to cache file {cache_file}")
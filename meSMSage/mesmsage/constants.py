@@ -20,20 +20,49 @@ dataframes = create_constants(
     "dataframes",
     Index="index",
     List="list",
+    String="string",
 )
 
 
 # define the environment constants
 environment = create_constants(
     "environment",
+    Cache_Home="XDG_CACHE_HOME",
+    Local_App_Data="LOCALAPPDATA",
     Recipient_Phone_Number="RECIPIENT_PHONE_NUMBER",
+    Twilio_Auth_Token="TWILIO_AUTH_TOKEN",
+    Twilio_Messaging_Service="TWILIO_MESSAGING_SERVICE_SID",
     Twilio_Phone_Number="TWILIO_PHONE_NUMBER",
+    Twilio_Phone_Numbers="TWILIO_PHONE_NUMBERS",
 )
 
 # define the files constants
 files = create_constants(
     "file",
+    Cache="mesmsage",
+    Cache_Extension=".pickle",
+    Cache_Home=".cache",
     Env=".env",
+    Journal="journal.sqlite3",
+    Private_Directory_Mode=0o700,
+    Private_File_Mode=0o600,
+    Shared_Write_Mode=0o022,
+    Temporary_Extension=".tmp",
+    Windows="nt",
+)
+
+# define the constants for the journal of sent messages
+journal = create_constants(
+    "journal",
+    Batch_Size=100,
+    Delete_Batch_Size=10000,
+    Failed="failed",
+    Page_Size=20,
+    Retention_Days=365,
+    Run_Format="%Y%m%dT%H%M%S",
+    Sent="sent",
+    Status_Page_Size=1000,
+    Synced_Run="twilio",
 )
 
 # define the locations constants
@@ -67,30 +96,153 @@ logging = create_constants(
 markers = create_constants(
     "markers",
     All_Individuals="All Individuals",
+    Comma=",",
+    Comment="#",
     Empty=b"",
     Indent="  ",
     In_A_File="in a file",
     Newline="\n",
     Nothing="",
+    Separator="-",
     Space=" ",
 )
 
 # define constants for the messages
 messages = create_constants(
-    "messages", Sms_Did_Not_Work="Sending SMS with Twilio did not work:"
+    "messages",
+    Number_Not_Valid="The phone number is not valid",
+    Sender_Not_Set="There is no Twilio phone number or Messaging Service to send from",
+    Sms_Did_Not_Work="Sending SMS with Twilio did not work:",
+)
+
+# define the constants for phone numbers
+phone = create_constants(
+    "phone",
+    Maximum_E164_Length=16,
+    Plus="+",
+    Zero="0",
 )
 
 # define constants for the progress bars
 progress = create_constants("progress", Small_Step=0.2, Medium_Step=0.4, Large_Step=0.6)
 
+# define constants for limiting the rate of sending messages
+rates = create_constants(
+    "rates",
+    Base_Delay=1.0,
+    Increase_Fraction=0.05,
+    Maximum_Attempts=5,
+    Maximum_Delay=60.0,
+    Minimum_Fraction=0.1,
+    Response_Hook="response",
+    Retry_After="Retry-After",
+    Server_Error=500,
+    Too_Many_Requests=429,
+)
+
+# define the constants for the scheduler of reminders
+scheduler = create_constants(
+    "scheduler",
+    Lead="24h",
+    Maximum_Retry_Delay=3600.0,
+    Refresh_Interval=300,
+    Remind_At_Format="%H:%M",
+    Retry_Delay=60.0,
+    Run_Prefix="serve",
+)
+
+# define the constants for the segments of SMS messages
+segments = create_constants(
+    "segments",
+    Extension_Units=2,
+    Gsm7_Multiple=153,
+    Gsm7_Single=160,
+    Maximum_Basic_Character=0xFFFF,
+    Single_Unit=1,
+    Surrogate_Units=2,
+    Ucs2_Multiple=67,
+    Ucs2_Single=70,
+)
+
+# define the constants for the senders of messages
+senders = create_constants(
+    "senders",
+    Messaging_Service_Prefix="MG",
+)
+
 # define constants for the various sizes
-sizes = create_constants("size", First=0, Singleton=1, Tab=4)
+sizes = create_constants(
+    "size",
+    Buffer=100,
+    Buffer_Wait=0.1,
+    First=0,
+    Hash=12,
+    Month_Prefix=3,
+    Number_Cache=65536,
+    Run=8,
+    Singleton=1,
+    Tab=4,
+    Trigram=3,
+    Workers=8,
+)
+
+# define the constants for the templates of SMS messages
+templates = create_constants(
+    "templates",
+    Activities="activities",
+    Cache_Size=1024,
+    Default=(
+        "Hello {name}! You are working the following shift(s) at the Motzing Center: "
+        "{activities}. If you are unable to work any shift(s) please text Jessica at "
+        "814-573-3283. Thank you!"
+    ),
+    Household_Format="{activities} ({name})",
+    Household_Separator="; ",
+    Maximum_Length=1600,
+    Name="name",
+    Placeholders=("name", "activities"),
+)
+
+# define the constants for the connections to Twilio
+transport = create_constants(
+    "transport",
+    Connect_Timeout=5.0,
+    Hosts=4,
+    Read_Timeout=30.0,
+    Schemes=("http", "https"),
+)
 
 # define the terminology used for spreadsheets
 sheets = create_constants(
     "sheets",
+    Checked="TRUE",
+    Columns="COLUMNS",
     Default="Sheet1",
+    Formatted_Value="FORMATTED_VALUE",
+    Header_Row="1:1",
     Name="Individual Name",
     Name_Prompt="individual's name",
     Number="Individual Phone Number",
+    Number_E164="Individual Phone Number E164",
+    Quote="'",
+    Revision_Fields="version",
+    Rows="ROWS",
+    Sheet_Separator="!",
+    Unchecked="FALSE",
+    Value_Ranges="valueRanges",
+    Values="values",
+)
+
+# define the constants for receiving the status callbacks from Twilio
+webhook = create_constants(
+    "webhook",
+    Batch_Size=500,
+    Error_Code="ErrorCode",
+    Flush_Interval=0.25,
+    Host="127.0.0.1",
+    Message_Sid="MessageSid",
+    Message_Status="MessageStatus",
+    Port=8080,
+    Signature="X-Twilio-Signature",
+    To="To",
 )
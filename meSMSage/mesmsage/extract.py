@@ -1,15 +1,28 @@
 """Extract contents from a Pandas dataframe."""
 
+import collections
 import logging
 
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
 
+import numpy
 import pandas
 
 from mesmsage import constants
+from mesmsage import phone
+from mesmsage import roster
+from mesmsage import template
 from mesmsage import util
 
+# the individuals are either in a data frame or in an index built from one
+Roster = Union[pandas.DataFrame, roster.RosterIndex]
+
 
 class IndividualNotFoundError(Exception):
     """Define error to indicate that there is no row available for an individual."""
@@ -17,11 +30,30 @@ class IndividualNotFoundError(Exception):
     pass
 
 
+def create_roster_index(individuals_dataframe: pandas.DataFrame) -> roster.RosterIndex:
+    """Create an index over the rows of the data frame for fast lookups of individuals."""
+    try:
+        roster_index = roster.RosterIndex(individuals_dataframe)
+    except KeyError:
+        raise IndividualNotFoundError
+    return roster_index
+
+
+def get_roster_index(individuals: Roster) -> roster.RosterIndex:
+    """Get the index for the individuals, creating one if they are in a data frame."""
+    if isinstance(individuals, roster.RosterIndex):
+        return individuals
+    return create_roster_index(individuals)
+
+
 def get_individual_names(
-    individuals_dataframe: pandas.DataFrame,
+    individuals_dataframe: Roster,
 ) -> pandas.core.series.Series:
     """Extract the names of individuals from the data frame."""
     logger = logging.getLogger(constants.logging.Rich)
+    # the names are already extracted by an index
+    if isinstance(individuals_dataframe, roster.RosterIndex):
+        return pandas.Series(individuals_dataframe.names, name=constants.sheets.Name)
     try:
         individuals = individuals_dataframe.loc[:, constants.sheets.Name]
     except KeyError:
@@ -31,120 +63,334 @@ def get_individual_names(
 
 
 def get_individual_numbers(
-    individuals_dataframe: pandas.DataFrame, chosen_individuals_list: List[str]
+    individuals_dataframe: Roster, chosen_individuals_list: List[str]
 ) -> Dict[str, str]:
     """Get the phone numbers for each of the specified individuals in a complete data frame with names."""
     logger = logging.getLogger(constants.logging.Rich)
-    # extract the phone numbers of the chosen individuals
-    phone_numbers = individuals_dataframe.loc[
-        individuals_dataframe[constants.sheets.Name].isin(chosen_individuals_list),
-        [constants.sheets.Name, constants.sheets.Number],
-    ]
-    logger.debug(f"Phone numbers: {phone_numbers}")
-    # create an empty dictionary that will store mappings of the form:
+    # create a dictionary that will store mappings of the form:
     # <Name of a Person> --> <Phone Number of a Person>
-    phone_numbers_dictionary = {}
-    # iterate through each row in the data frame and create a dictionary
-    # entry out of the name of a person and their phone number
-    for (index, row) in phone_numbers.iterrows():
-        phone_numbers_dictionary[row["Individual Name"]] = row[
-            "Individual Phone Number"
-        ]
+    # by pairing up the values in the name and phone number columns
+    # instead of iterating through each of the rows in the data frame
+    if isinstance(individuals_dataframe, roster.RosterIndex):
+        # look up the rows of the chosen individuals in the index instead
+        # of scanning the entire name column of the data frame
+        positions = individuals_dataframe.get_positions(chosen_individuals_list)
+        logger.debug(f"Phone number positions: {positions}")
+        if individuals_dataframe.numbers is None:
+            raise IndividualNotFoundError
+        names = individuals_dataframe.names[positions]
+        numbers = individuals_dataframe.numbers[positions]
+    else:
+        # read only the name and phone number columns of a data frame since
+        # building an index would also convert all of the activity columns
+        try:
+            chosen_rows = individuals_dataframe[constants.sheets.Name].isin(
+                chosen_individuals_list
+            )
+            phone_numbers = roster.get_phone_numbers(individuals_dataframe)
+        except KeyError:
+            raise IndividualNotFoundError
+        names = individuals_dataframe[constants.sheets.Name][chosen_rows].to_numpy()
+        numbers = phone_numbers[chosen_rows].to_numpy()
+        logger.debug(f"Phone numbers: {numbers}")
+    phone_numbers_dictionary = dict(zip(names.tolist(), numbers.tolist()))
     return phone_numbers_dictionary
 
 
 def get_individual_activities(
-    individuals_dataframe: pandas.DataFrame, chosen_individuals_list: List[str]
+    individuals_dataframe: Roster, chosen_individuals_list: List[str]
 ) -> Dict[str, List[str]]:
     """Get the activities for each of the specified individuals."""
     logger = logging.getLogger(constants.logging.Rich)
-    # remove columns in the data frame for which no individual has an activity
-    individuals_have_activities = individuals_dataframe
-    logger.debug(individuals_have_activities)
-    # only consider the individuals who were chosen
-    specific_individuals_have_activities = individuals_have_activities.loc[
-        individuals_have_activities[constants.sheets.Name].isin(chosen_individuals_list)
-    ]
-    logger.debug(specific_individuals_have_activities)
-    # only consider the activities for which one of these individuals is active, meaning
-    # that this step removes activities for which all of the entries are False
-    specific_individuals_specific_activities = specific_individuals_have_activities.loc[
-        :, (specific_individuals_have_activities != 0).any(axis=0)
-    ]
-    logger.debug(specific_individuals_specific_activities)
-    # reshape the data frame by converting it to a list and then back to a data frame
-    # ultimately producing a "tall" data frame where each column is an individual,
-    # their contact information, and the activities that they are going to need
-    specific_individuals_specific_activities_dict = (
-        specific_individuals_specific_activities.to_dict(constants.dataframes.List)
-    )
-    logger.debug(specific_individuals_specific_activities_dict)
-    specific_individuals_specific_activities_tall = pandas.DataFrame.from_dict(
-        specific_individuals_specific_activities_dict, orient=constants.dataframes.Index
-    )
-    logger.debug(specific_individuals_specific_activities_tall)
-    # iterate through each of the columns in the tall data frame and create
-    # a dictionary that maps an individual to a list of their activities
+    roster_index = get_roster_index(individuals_dataframe)
+    # only consider the individuals who were chosen, gathering their
+    # activities directly from the sparse representation in the index
+    positions = roster_index.get_positions(chosen_individuals_list)
+    lengths, columns = roster_index.get_activities(positions)
+    logger.debug(f"Number of activities: {columns.size}")
     name_activities_dictionary: Dict[str, List[str]] = {}
-    for (
-        column_name,
-        column_contents,
-    ) in specific_individuals_specific_activities_tall.iteritems():
-        current_name = None
-        # iterate through the metadata (i.e., headers of original data frame)
-        # and the data (i.e., the contents of the original data frame)
-        for (data, metadata) in zip(
-            list(column_contents), list(column_contents.index.values)
-        ):
-            # store the name of the current individual since this will
-            # serve as the key in the name_activities_dictionary
-            if metadata == constants.sheets.Name:
-                current_name = data
-            # indicate that the person is going to work a shift since
-            # there is a "checkmark" (i.e., a True value) for the specific
-            # data entry associated with this activity
-            if data is True:
-                # this individual already has an entry in the dictionary
-                # and so the function must extract the existing list of
-                # activities and append to it the current description of
-                # the activity (i.e., the metadata originally stored in
-                # the header of the data frame)
-                if current_name in name_activities_dictionary:
-                    metadata_list = name_activities_dictionary[current_name]
-                    metadata_list.append(metadata)
-                # this individual does not already have an entry in the
-                # dictionary and so the function must create a new list
-                # of activity descriptions and then create the mapping
-                else:
-                    new_metadata_list: List[str] = [metadata]
-                    name_activities_dictionary[current_name] = new_metadata_list  # type: ignore
-        # support the movement to a new name
-        current_name = None
+    if columns.size == 0:
+        return name_activities_dictionary
+    names = roster_index.names[positions]
+    # the columns are in row-major order and thus all of the activities
+    # for an individual are contiguous and in the order of the spreadsheet;
+    # this means that the dictionary is built with one step for each
+    # individual instead of one step for each cell in the data frame
+    row_activities = numpy.split(
+        roster_index.activity_headers[columns], numpy.cumsum(lengths)[:-1]
+    )
+    for name, activities in zip(names, row_activities):
+        # an individual listed in multiple rows has all of their activities
+        # collected into the same list of activity descriptions
+        if activities.size > 0:
+            name_activities_dictionary.setdefault(name, []).extend(activities.tolist())
     logger.debug(name_activities_dictionary)
     return name_activities_dictionary
 
 
+def get_household_number(phone_number: str) -> str:
+    """Get the normalized phone number that identifies a household of individuals."""
+    # individuals share a phone number when their numbers are the same after
+    # normalization even if they were written in different ways in the sheet
+    if phone.is_e164_number(phone_number):
+        return phone_number
+    return phone.get_normalized_number(phone_number)
+
+
+def get_household_names(names: List[str]) -> str:
+    """Get the rendered list of names for all of the individuals in a household."""
+    # most households have one individual and the name is used as is
+    if len(names) == 1:
+        return names[constants.sizes.First]
+    return util.get_spiffy_list(names)
+
+
+def get_household_activities(
+    names: List[str], activities_dictionary: Dict[str, List[str]]
+) -> str:
+    """Get the rendered list of activities for all of the individuals in a household."""
+    activities_fragments = [
+        template.get_activities_fragment(tuple(activities_dictionary[name]))
+        for name in names
+    ]
+    # individuals who work the same shift(s) share one list of activities;
+    # otherwise, the list of activities of each individual is labelled
+    if len(set(activities_fragments)) == 1:
+        return activities_fragments[constants.sizes.First]
+    return constants.templates.Household_Separator.join(
+        [
+            constants.templates.Household_Format.format(
+                activities=activities_fragment, name=name
+            )
+            for name, activities_fragment in zip(names, activities_fragments)
+        ]
+    )
+
+
+def coalesce_sms_messages(
+    number_dictionary: Dict[str, str],
+    activities_dictionary: Dict[str, List[str]],
+    message_template: template.MessageTemplate = None,
+    maximum_length: Optional[int] = constants.templates.Maximum_Length,
+) -> List[Tuple[str, str]]:
+    """Create a list of (Phone Number, SMS message) with one message for the individuals sharing a number."""
+    # use the default template when a template was not provided;
+    # note that the template is only ever compiled once
+    if message_template is None:
+        message_template = template.compile_template()
+    names = list(activities_dictionary.keys())
+    phone_numbers = [number_dictionary[name] for name in names]
+    # the numbers that were normalized when the sheet was loaded already
+    # identify their households and so each one does not need to be checked
+    if phone.are_e164_numbers(phone_numbers):
+        household_numbers = phone_numbers
+    else:
+        household_numbers = [
+            get_household_number(phone_number) for phone_number in phone_numbers
+        ]
+    # most individuals do not share a phone number and so, when no one does,
+    # each individual's name and activities are used as is
+    if len(set(household_numbers)) == len(household_numbers):
+        households: List[List[str]] = []
+        household_names = names
+        household_activities = template.get_activities_fragments(
+            activities_dictionary.values()
+        )
+    else:
+        # create a dictionary that will store mappings of the form:
+        # <Normalized Phone Number> --> <Names of Individuals in a Household>
+        # where the individuals are in the order in which they appear in the sheet
+        # and the household receives its messages at the first individual's number
+        households_dictionary: Dict[str, List[str]] = {}
+        first_numbers: Dict[str, str] = {}
+        for name, phone_number, household_number in zip(
+            names, phone_numbers, household_numbers
+        ):
+            households_dictionary.setdefault(household_number, []).append(name)
+            first_numbers.setdefault(household_number, phone_number)
+        households = list(households_dictionary.values())
+        phone_numbers = list(first_numbers.values())
+        # reuse the rendered list of activities for households that work the same shift(s)
+        household_names = [get_household_names(members) for members in households]
+        household_activities = [
+            get_household_activities(members, activities_dictionary)
+            for members in households
+        ]
+    # generate one message for each household by binding the placeholders in bulk
+    messages = message_template.render_all(
+        {
+            constants.templates.Name: household_names,
+            constants.templates.Activities: household_activities,
+        }
+    )
+    coalesced_messages = list(zip(phone_numbers, messages))
+    # note that a message for a single individual is never split
+    if maximum_length is None or not households:
+        return coalesced_messages
+    # a household whose combined message is too long is split into several
+    # messages that each contain as many individuals as fit in a message
+    split_messages: List[Tuple[str, str]] = []
+    for (phone_number, message), members in zip(coalesced_messages, households):
+        if len(message) <= maximum_length or len(members) == 1:
+            split_messages.append((phone_number, message))
+        else:
+            split_messages.extend(
+                (phone_number, household_message)
+                for household_message in split_household_messages(
+                    members, activities_dictionary, message_template, maximum_length
+                )
+            )
+    return split_messages
+
+
+def split_household_messages(
+    names: List[str],
+    activities_dictionary: Dict[str, List[str]],
+    message_template: template.MessageTemplate,
+    maximum_length: int,
+) -> List[str]:
+    """Split the individuals in a household into messages that are at most the maximum length."""
+
+    def render_household(members: List[str]) -> str:
+        """Render the message for some of the individuals in the household."""
+        return message_template.render(
+            {
+                constants.templates.Name: get_household_names(members),
+                constants.templates.Activities: get_household_activities(
+                    members, activities_dictionary
+                ),
+            }
+        )
+
+    household_messages: List[str] = []
+    members: List[str] = []
+    message = constants.markers.Nothing
+    for name in names:
+        candidate_message = render_household(members + [name])
+        # start a new message when adding this individual makes the message
+        # too long; note that a single individual always has a message
+        if members and len(candidate_message) > maximum_length:
+            household_messages.append(message)
+            members = [name]
+            message = render_household(members)
+        else:
+            members.append(name)
+            message = candidate_message
+    household_messages.append(message)
+    return household_messages
+
+
 def get_sms_messages(
-    number_dictionary: Dict[str, str], activities_dictionary: Dict[str, List[str]]
+    number_dictionary: Dict[str, str],
+    activities_dictionary: Dict[str, List[str]],
+    message_template: template.MessageTemplate = None,
 ) -> Dict[str, str]:
     """Create a dictionary of the format {Phone Number, SMS message} for each number and activities."""
-    sms_dictionary: Dict[str, str] = {}
-    for name, activity in activities_dictionary.items():
-        # get the activities for this individual
-        phone_number = number_dictionary[name]
-        # generate the SMS message for the given number
-        names_message = (
-            "Hello "
-            + name
-            + "! You are working the following shift(s) at the Motzing Center: "
-            + util.get_spiffy_list(activity)
-            + ". "
-            + "If you are unable to work any shift(s) please text Jessica at 814-573-3283. Thank you!"
+    # individuals who share a phone number receive one combined message instead
+    # of the message for the last of them replacing all of the others
+    sms_dictionary: Dict[str, str] = dict(
+        coalesce_sms_messages(
+            number_dictionary, activities_dictionary, message_template, None
         )
-        sms_dictionary[phone_number] = names_message
+    )
     return sms_dictionary
 
 
+def generate_individual_activities(
+    individuals_dataframe: Roster, chosen_individuals_list: List[str]
+) -> Iterator[Tuple[str, str, List[str]]]:
+    """Generate the name, phone number, and activities of the chosen individuals one at a time."""
+    roster_index = get_roster_index(individuals_dataframe)
+    if roster_index.numbers is None:
+        raise IndividualNotFoundError
+    # consider the chosen individuals in the order in which they first appear
+    # in the spreadsheet, without looking at the rows of any other individual
+    chosen_names = sorted(
+        {
+            name
+            for name in chosen_individuals_list
+            if name in roster_index.name_positions
+        },
+        key=lambda name: roster_index.name_positions[name][constants.sizes.First],
+    )
+    for name in chosen_names:
+        positions = roster_index.name_positions[name]
+        # an individual listed in multiple rows has all of their activities
+        # collected into the same list of activity descriptions and, just
+        # like get_individual_numbers, uses the phone number in the last row
+        activities = roster_index.get_row_activities(positions)
+        if activities:
+            yield name, roster_index.numbers[positions[-1]], activities
+
+
+def generate_sms_messages(
+    individual_activities: Iterable[Tuple[str, str, List[str]]],
+    message_template: template.MessageTemplate = None,
+) -> Iterator[Tuple[str, str]]:
+    """Generate the phone number and SMS message for each individual and their activities."""
+    if message_template is None:
+        message_template = template.compile_template()
+    for name, phone_number, activities in individual_activities:
+        yield phone_number, message_template.render(
+            {
+                constants.templates.Name: name,
+                constants.templates.Activities: template.get_activities_fragment(
+                    tuple(activities)
+                ),
+            }
+        )
+
+
+def generate_coalesced_sms_messages(
+    individual_activities: Iterable[Tuple[str, str, List[str]]],
+    number_dictionary: Dict[str, str],
+    message_template: template.MessageTemplate = None,
+    maximum_length: Optional[int] = constants.templates.Maximum_Length,
+) -> Iterator[Tuple[str, str]]:
+    """Generate one phone number and SMS message for each household as soon as all of its individuals are found."""
+    if message_template is None:
+        message_template = template.compile_template()
+    # count the chosen individuals in each household so that the message for
+    # a household is generated as soon as the last of its individuals is found
+    household_sizes = collections.Counter(
+        get_household_number(phone_number)
+        for phone_number in number_dictionary.values()
+    )
+    # create a dictionary that will store mappings of the form:
+    # <Normalized Phone Number> --> <Name> --> (<Phone Number>, <Activities>)
+    # for the households that are still waiting for some of their individuals
+    households: Dict[str, Dict[str, Tuple[str, List[str]]]] = {}
+
+    def coalesce_household(
+        household: Dict[str, Tuple[str, List[str]]],
+    ) -> List[Tuple[str, str]]:
+        """Create the messages for all of the individuals in the household that were found."""
+        return coalesce_sms_messages(
+            {name: phone_number for name, (phone_number, _) in household.items()},
+            {name: activities for name, (_, activities) in household.items()},
+            message_template,
+            maximum_length,
+        )
+
+    for name, phone_number, activities in individual_activities:
+        household_number = get_household_number(phone_number)
+        # most individuals do not share a phone number and so their message
+        # is generated right away without waiting for anyone else
+        if household_sizes[household_number] <= 1:
+            yield from generate_sms_messages(
+                [(name, phone_number, activities)], message_template
+            )
+            continue
+        household = households.setdefault(household_number, {})
+        household[name] = (phone_number, activities)
+        if len(household) == household_sizes[household_number]:
+            yield from coalesce_household(households.pop(household_number))
+    # an individual without any activities is never found and thus the
+    # households that are still waiting receive their messages at the end
+    for household in households.values():
+        yield from coalesce_household(household)
+
+
 def convert_series_to_list(series: pandas.core.series.Series) -> List:
     """Convert a pandas series to a standard list."""
     series_list = series.values.tolist()
@@ -2,12 +2,17 @@
 
 import logging
 
+from pathlib import Path
+from typing import Any
+from typing import Dict
 from typing import List
 
-from InquirerPy import get_style, inquirer  # type: ignore
+from InquirerPy import get_style  # type: ignore
+from InquirerPy.prompts.fuzzy import FuzzyPrompt  # type: ignore
+from prompt_toolkit.buffer import Buffer
 
 from mesmsage import constants
-
+from mesmsage import search
 
 style = get_style(
     {
@@ -23,13 +28,59 @@ style = get_style(
 )
 
 
+class IndexedFuzzyPrompt(FuzzyPrompt):
+    """Define a fuzzy selector that filters its choices with an index instead of scoring every choice."""
+
+    # note that InquirerPy does not have a public way to filter the choices
+    # and so this selector replaces the handler of the text and sets the
+    # filtered choices of the FuzzyPrompt in InquirerPy 0.3, which is why
+    # the dependency on InquirerPy only allows the releases from 0.3.4 up to
+    # but not including 0.4; note that the choices match when their words
+    # start with or contain the typed text instead of a fuzzy matching
+    def __init__(self, name_index: search.NameIndex, **kwargs) -> None:
+        """Create the selector for the choices in the same order as the names in the index."""
+        self.name_index = name_index
+        self.matched_choices: List[Dict[str, Any]] = []
+        super().__init__(**kwargs)
+
+    def _on_text_changed(self, buffer: Buffer) -> None:
+        """Filter the choices with the index each time that the text changes."""
+        # clear the message about an empty selection once typing starts again
+        if self._invalid:
+            self._invalid = False
+        query = buffer.text
+        choices = self.content_control.choices
+        # stop highlighting the characters that matched the previous text
+        for choice in self.matched_choices:
+            choice["indices"] = []
+        # the index finds the matching choices without looking at the others
+        # and so, unlike scoring every choice, the filtering is fast enough
+        # to finish for each keystroke without waiting for the typing to stop
+        self.matched_choices = [
+            choices[position] for position in self.name_index.search(query)
+        ]
+        if search.get_search_terms(query):
+            for choice in self.matched_choices:
+                choice["indices"] = self.name_index.get_match_indices(
+                    choice["index"], query
+                )
+        self.content_control._filtered_choices = self.matched_choices
+        self.application.invalidate()
+
+
 def perform_fuzzy_selection(
-    source: List, label: str = constants.sheets.Name_Prompt
+    source: List,
+    label: str = constants.sheets.Name_Prompt,
+    name_index: search.NameIndex = None,
 ) -> List:
     """Create a fuzzy selector for the given list with the provided label."""
-    selection_list = inquirer.fuzzy(
+    # index the choices once so that each keystroke does not look at all of them
+    if name_index is None:
+        name_index = search.NameIndex(source)
+    selection_list = IndexedFuzzyPrompt(
+        name_index,
         message="Select at least one " + label + ":",
-        instruction="<<Fuzzy search, Tab selects, Enter confirms, Vim keybindings>>",
+        instruction="<<Type parts of a name, Tab selects, Enter confirms, Vim keybindings>>",
         choices=source,
         multiselect=True,
         validate=lambda result: len(result) > 0,
@@ -45,6 +96,16 @@ def perform_fuzzy_selection(
     return selection_list
 
 
+def read_recipients_file(recipients_file: Path) -> List[str]:
+    """Read the names of the individuals to select, one on each line, from the file."""
+    # skip the lines that are blank or that are comments starting with a "#"
+    return [
+        line.strip()
+        for line in recipients_file.read_text().splitlines()
+        if line.strip() and not line.strip().startswith(constants.markers.Comment)
+    ]
+
+
 def create_individuals_list(
     chosen_individuals_list: List[str], total_individuals_list: List[str]
 ) -> List[str]:
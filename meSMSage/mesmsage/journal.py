@@ -0,0 +1,524 @@
+"""Record the sending of SMS messages in a local journal so that a run can resume."""
+
+import collections
+import hashlib
+import logging
+import sqlite3
+import uuid
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+from typing import Deque
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from mesmsage import cache
+from mesmsage import constants
+
+# create the table of messages with one row for each message in a run;
+# a message is identified by its recipient and the hash of its body so
+# that the same message is never sent twice in the same run
+CREATE_MESSAGES_TABLE = """
+CREATE TABLE IF NOT EXISTS messages (
+    run_id TEXT NOT NULL,
+    phone_number TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    name TEXT,
+    sid TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    sent_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, phone_number, body_hash)
+)
+"""
+
+# insert the message or, when retrying a message that failed in an
+# earlier attempt at the same run, replace the result of that attempt
+UPSERT_MESSAGE = """
+INSERT INTO messages
+    (run_id, phone_number, body_hash, name, sid, status, error, sent_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (run_id, phone_number, body_hash) DO UPDATE SET
+    name = excluded.name,
+    sid = excluded.sid,
+    status = excluded.status,
+    error = excluded.error,
+    sent_at = excluded.sent_at
+"""
+
+SELECT_SENT_MESSAGES = """
+SELECT phone_number, body_hash FROM messages WHERE run_id = ? AND sid IS NOT NULL
+"""
+
+# create the table of the shifts that an individual was reminded of, with
+# one row for each shift and phone number, so that a reminder is never sent
+# again for the same shift even when it is sent in a run with other shifts
+CREATE_REMINDERS_TABLE = """
+CREATE TABLE IF NOT EXISTS reminders (
+    shift TEXT NOT NULL,
+    phone_number TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    sent_at TEXT NOT NULL,
+    PRIMARY KEY (shift, phone_number)
+)
+"""
+
+INSERT_REMINDER = """
+INSERT OR IGNORE INTO reminders (shift, phone_number, run_id, sent_at)
+VALUES (?, ?, ?, ?)
+"""
+
+SELECT_REMINDERS = """
+SELECT shift, phone_number FROM reminders WHERE shift = ?
+"""
+
+DELETE_EXPIRED_REMINDERS = """
+DELETE FROM reminders WHERE sent_at < ?
+"""
+
+# index the messages by each of the ways in which the history is filtered;
+# every index ends with the time of sending, which is implicitly followed
+# by the rowid, so that a page of the history is read in order from an index
+# instead of sorting all of the messages that match the filter
+CREATE_MESSAGES_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS messages_sent_at ON messages (sent_at)",
+    "CREATE INDEX IF NOT EXISTS messages_phone_number"
+    " ON messages (phone_number, sent_at)",
+    "CREATE INDEX IF NOT EXISTS messages_name ON messages (name, sent_at)",
+    "CREATE INDEX IF NOT EXISTS messages_status ON messages (status, sent_at)",
+    # the delivery status that Twilio reports for a message is found by its SID
+    "CREATE UNIQUE INDEX IF NOT EXISTS messages_sid ON messages (sid)"
+    " WHERE sid IS NOT NULL",
+]
+
+# the delivery statuses that Twilio never changes once a message has one
+FINAL_STATUSES = "('delivered', 'undelivered', 'failed', 'read', 'canceled')"
+
+# record the delivery status that Twilio reports for a message, adding the
+# message to the history when it was not sent by a run in this journal;
+# the status callbacks may arrive out of order and so a final status is
+# never replaced by a status that the message had before it was final
+UPSERT_MESSAGE_STATUS = f"""
+INSERT INTO messages
+    (run_id, phone_number, body_hash, name, sid, status, error, sent_at)
+VALUES (?, ?, ?, NULL, ?, ?, ?, ?)
+ON CONFLICT (sid) WHERE sid IS NOT NULL DO UPDATE SET
+    status = excluded.status,
+    error = excluded.error
+WHERE messages.status NOT IN {FINAL_STATUSES}
+    OR excluded.status IN {FINAL_STATUSES}
+"""
+
+# find the time from which the statuses must be synchronized: the oldest
+# message that Twilio accepted but that does not have a final status yet or,
+# when every message is settled, the newest message in the journal
+SELECT_SYNC_START = f"""
+SELECT COALESCE(
+    (SELECT MIN(sent_at) FROM messages
+        WHERE sid IS NOT NULL AND status NOT IN {FINAL_STATUSES}),
+    (SELECT MAX(sent_at) FROM messages)
+)
+"""
+
+SELECT_HISTORY = """
+SELECT rowid, run_id, phone_number, name, sid, status, error, sent_at FROM messages
+"""
+
+# delete the expired messages a batch at a time so that deleting many
+# messages does not stop the journal from recording a send for a long time
+DELETE_EXPIRED_MESSAGES = """
+DELETE FROM messages WHERE rowid IN (
+    SELECT rowid FROM messages WHERE sent_at < ? LIMIT ?
+)
+"""
+
+
+class HistoryCursorError(Exception):
+    """Define error to indicate that a cursor for a page of the history is not valid."""
+
+    pass
+
+
+class HistoryRecord(NamedTuple):
+    """Define a message in the history of the messages sent in every run."""
+
+    rowid: int
+    run_id: str
+    phone_number: str
+    name: Optional[str]
+    sid: Optional[str]
+    status: str
+    error: Optional[str]
+    sent_at: str
+
+
+class MessageStatus(NamedTuple):
+    """Define the delivery status that Twilio reports for a message."""
+
+    sid: str
+    phone_number: str
+    status: str
+    error: Optional[str]
+    sent_at: Optional[datetime]
+
+
+class HistoryPage(NamedTuple):
+    """Define a page of the history and the cursor for the next page, if there is one."""
+
+    records: List[HistoryRecord]
+    cursor: Optional[str]
+
+
+def get_journal_file(journal_file: Path = None) -> Path:
+    """Get the journal file, defaulting to one in the cache directory."""
+    if journal_file is None:
+        journal_file = cache.get_cache_directory() / constants.files.Journal
+    return journal_file
+
+
+def create_run_id() -> str:
+    """Create an identifier for a run that sorts in the order in which runs started."""
+    return (
+        datetime.now(timezone.utc).strftime(constants.journal.Run_Format)
+        + constants.markers.Separator
+        + uuid.uuid4().hex[: constants.sizes.Run]
+    )
+
+
+def get_body_hash(message: str) -> str:
+    """Get the hash that identifies the body of a message."""
+    return hashlib.sha256(message.encode()).hexdigest()[: constants.sizes.Hash]
+
+
+def format_timestamp(moment: datetime) -> str:
+    """Format the time in the ISO 8601 format that sorts in time order."""
+    # note that a time without a time zone is in the local time zone
+    return moment.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def get_timestamp() -> str:
+    """Get the current time in the ISO 8601 format that sorts in time order."""
+    return format_timestamp(datetime.now(timezone.utc))
+
+
+def connect(journal_file: Path) -> sqlite3.Connection:
+    """Connect to the journal file, creating the journal if it does not exist."""
+    cache.create_cache_directory(journal_file.parent)
+    # the connection may be used by the thread that produces the messages
+    # and then by the thread that records the results of sending them
+    connection = sqlite3.connect(str(journal_file), check_same_thread=False)
+    # a new journal returns the pages of deleted messages to the file system
+    # when asked to instead of growing to fit the most messages it ever had;
+    # note that this must be set before the journal has any tables
+    connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # write-ahead logging lets a commit append to the log instead of rewriting
+    # the database and, with synchronous set to NORMAL, a commit does not wait
+    # for the disk while a crash of the process still loses no commits
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(CREATE_MESSAGES_TABLE)
+    connection.execute(CREATE_REMINDERS_TABLE)
+    for create_messages_index in CREATE_MESSAGES_INDEXES:
+        connection.execute(create_messages_index)
+    connection.commit()
+    return connection
+
+
+class SendJournal:
+    """Define a journal that records, in batches, the result of sending each message."""
+
+    def __init__(
+        self,
+        journal_file: Path,
+        run_id: str,
+        batch_size: int = constants.journal.Batch_Size,
+    ) -> None:
+        """Connect to the journal and find the messages already sent in the run."""
+        self.connection = connect(journal_file)
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.sent: Set[Tuple[str, str]] = set(
+            self.connection.execute(SELECT_SENT_MESSAGES, (run_id,)).fetchall()
+        )
+        self.skipped = 0
+        # the messages that are being sent, in the order in which they are
+        # sent, as (<Phone Number>, <Body Hash>, <Name>) and the rows that
+        # are waiting to be committed to the journal in the next batch
+        self.outstanding: Deque[Tuple[str, str, Optional[str]]] = collections.deque()
+        self.pending: List[Tuple] = []
+
+    def __enter__(self) -> "SendJournal":
+        """Use the journal as a context manager."""
+        return self
+
+    def __exit__(self, *exception) -> None:
+        """Commit the results that are still pending and then close the journal."""
+        self.close()
+
+    def track(
+        self,
+        messages: Iterable[Tuple[str, str]],
+        recipient_names: Dict[str, str] = None,
+    ) -> Iterator[Tuple[str, str]]:
+        """Skip the messages already sent in the run and track the order of the others."""
+        logger = logging.getLogger(constants.logging.Rich)
+        recipient_names = recipient_names or {}
+        for phone_number, message in messages:
+            body_hash = get_body_hash(message)
+            if (phone_number, body_hash) in self.sent:
+                logger.debug(f"Skipping message already sent to {phone_number}")
+                self.skipped = self.skipped + 1
+                continue
+            # the results of sending the messages arrive in the same order as
+            # the messages and so each result is for the oldest outstanding one
+            self.outstanding.append(
+                (phone_number, body_hash, recipient_names.get(phone_number))
+            )
+            yield phone_number, message
+
+    def record(self, sid: Optional[str], error: Optional[str] = None) -> str:
+        """Record the result of sending the oldest outstanding message and return its phone number."""
+        phone_number, body_hash, name = self.outstanding.popleft()
+        status = constants.journal.Sent if sid is not None else constants.journal.Failed
+        self.pending.append(
+            (
+                self.run_id,
+                phone_number,
+                body_hash,
+                name,
+                sid,
+                status,
+                error,
+                get_timestamp(),
+            )
+        )
+        if sid is not None:
+            self.sent.add((phone_number, body_hash))
+        # commit many results in one transaction because each commit, and
+        # not each row, is what costs a write to the disk
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return phone_number
+
+    def flush(self) -> None:
+        """Commit all of the pending results to the journal in one transaction."""
+        if self.pending:
+            with self.connection:
+                self.connection.executemany(UPSERT_MESSAGE, self.pending)
+            self.pending = []
+
+    def close(self) -> None:
+        """Commit the pending results and then close the connection to the journal."""
+        self.flush()
+        self.connection.close()
+
+
+def run_exists(journal_file: Path, run_id: str) -> bool:
+    """Determine whether or not the journal contains messages for the run."""
+    if not journal_file.exists():
+        return False
+    connection = connect(journal_file)
+    try:
+        row = connection.execute(
+            "SELECT 1 FROM messages WHERE run_id = ? LIMIT 1", (run_id,)
+        ).fetchone()
+    finally:
+        connection.close()
+    return row is not None
+
+
+def get_reminders(
+    connection: sqlite3.Connection, shifts: Iterable[str]
+) -> Set[Tuple[str, str]]:
+    """Get the (<Shift>, <Phone Number>) pairs of the reminders already sent for the shifts."""
+    reminders: Set[Tuple[str, str]] = set()
+    for shift in shifts:
+        reminders.update(connection.execute(SELECT_REMINDERS, (shift,)).fetchall())
+    return reminders
+
+
+def record_reminders(
+    connection: sqlite3.Connection,
+    run_id: str,
+    reminders: Iterable[Tuple[str, str]],
+) -> None:
+    """Record the (<Shift>, <Phone Number>) pairs of the reminders sent in the run."""
+    sent_at = get_timestamp()
+    with connection:
+        connection.executemany(
+            INSERT_REMINDER,
+            (
+                (shift, phone_number, run_id, sent_at)
+                for shift, phone_number in reminders
+            ),
+        )
+
+
+def record_statuses(
+    connection: sqlite3.Connection,
+    message_statuses: Iterable[MessageStatus],
+    batch_size: int = constants.journal.Batch_Size,
+) -> Dict[str, int]:
+    """Record the delivery status of each message in batches and count the messages with each status."""
+    status_counts: Dict[str, int] = collections.Counter()
+    pending: List[Tuple] = []
+
+    def flush() -> None:
+        """Commit all of the pending statuses to the journal in one transaction."""
+        with connection:
+            connection.executemany(UPSERT_MESSAGE_STATUS, pending)
+        pending.clear()
+
+    # the statuses arrive a page at a time and so they are recorded while
+    # the later pages are still being fetched instead of all at the end
+    for message_status in message_statuses:
+        sent_at = (
+            format_timestamp(message_status.sent_at)
+            if message_status.sent_at is not None
+            else get_timestamp()
+        )
+        # a message that was not sent by a run in this journal can never be
+        # resumed and so it is identified by its SID instead of by its body
+        pending.append(
+            (
+                constants.journal.Synced_Run,
+                message_status.phone_number,
+                get_body_hash(message_status.sid),
+                message_status.sid,
+                message_status.status,
+                message_status.error,
+                sent_at,
+            )
+        )
+        status_counts[message_status.status] += 1
+        if len(pending) >= batch_size:
+            flush()
+    if pending:
+        flush()
+    return dict(status_counts)
+
+
+def create_cursor(record: HistoryRecord) -> str:
+    """Create the cursor that starts a page of the history after the record."""
+    return f"{record.sent_at}{constants.markers.Comma}{record.rowid}"
+
+
+def parse_cursor(cursor: str) -> Tuple[str, int]:
+    """Parse the cursor into the time of sending and the rowid of the last record on a page."""
+    sent_at, separator, rowid = cursor.rpartition(constants.markers.Comma)
+    if not separator or not sent_at or not rowid.isdigit():
+        raise HistoryCursorError(f"The cursor {cursor} is not valid")
+    return sent_at, int(rowid)
+
+
+def get_history_page(
+    connection: sqlite3.Connection,
+    since: datetime = None,
+    until: datetime = None,
+    name: str = None,
+    phone_number: str = None,
+    status: str = None,
+    run_id: str = None,
+    cursor: str = None,
+    page_size: int = constants.journal.Page_Size,
+) -> HistoryPage:
+    """Get a page of the history, from the newest message to the oldest, that matches the filters."""
+    conditions: List[str] = []
+    parameters: List = []
+    filters = [
+        ("sent_at >= ?", format_timestamp(since) if since is not None else None),
+        ("sent_at < ?", format_timestamp(until) if until is not None else None),
+        ("name = ?", name),
+        ("phone_number = ?", phone_number),
+        ("status = ?", status),
+        ("run_id = ?", run_id),
+    ]
+    for condition, parameter in filters:
+        if parameter is not None:
+            conditions.append(condition)
+            parameters.append(parameter)
+    # a page starts right after the last record of the previous page, which
+    # the index finds directly instead of skipping over all of the records
+    # on the previous pages like an offset does
+    if cursor is not None:
+        conditions.append("(sent_at, rowid) < (?, ?)")
+        parameters.extend(parse_cursor(cursor))
+    query = SELECT_HISTORY
+    if conditions:
+        query = query + " WHERE " + " AND ".join(conditions)
+    query = query + " ORDER BY sent_at DESC, rowid DESC LIMIT ?"
+    # ask for one more record than fits on the page to find out whether
+    # or not there is another page without counting the matching records
+    parameters.append(page_size + 1)
+    records = [
+        HistoryRecord(*row) for row in connection.execute(query, parameters).fetchall()
+    ]
+    if len(records) > page_size:
+        records = records[:page_size]
+        return HistoryPage(records, create_cursor(records[-1]))
+    return HistoryPage(records, None)
+
+
+def get_sync_start(
+    connection: sqlite3.Connection,
+    retention_days: int = constants.journal.Retention_Days,
+    now: datetime = None,
+) -> datetime:
+    """Get the time of sending from which the delivery statuses need to be synchronized."""
+    if now is None:
+        now = datetime.now(timezone.utc)
+    # a message sent before the retention period is deleted from the journal
+    # and so its status is never needed, even when it is not yet settled
+    cutoff = now - timedelta(days=retention_days)
+    (sent_at,) = connection.execute(SELECT_SYNC_START).fetchone()
+    if sent_at is None:
+        return cutoff
+    return max(datetime.fromisoformat(sent_at), cutoff)
+
+
+def apply_retention(
+    connection: sqlite3.Connection,
+    retention_days: int = constants.journal.Retention_Days,
+    now: datetime = None,
+) -> int:
+    """Delete the messages sent before the retention period and return how many were deleted."""
+    logger = logging.getLogger(constants.logging.Rich)
+    if now is None:
+        now = datetime.now(timezone.utc)
+    cutoff = format_timestamp(now - timedelta(days=retention_days))
+    deleted_count = 0
+    while True:
+        with connection:
+            deleted_rows = connection.execute(
+                DELETE_EXPIRED_MESSAGES,
+                (cutoff, constants.journal.Delete_Batch_Size),
+            ).rowcount
+        deleted_count = deleted_count + deleted_rows
+        if deleted_rows < constants.journal.Delete_Batch_Size:
+            break
+    # the reminders are for shifts that ended long before the cutoff
+    with connection:
+        connection.execute(DELETE_EXPIRED_REMINDERS, (cutoff,))
+    # return the pages of the deleted messages to the file system
+    if deleted_count > 0:
+        connection.execute("PRAGMA incremental_vacuum").fetchall()
+    logger.debug(f"Deleted {deleted_count} message(s) sent before {cutoff}")
+    return deleted_count
+
+
+def compact(connection: sqlite3.Connection) -> None:
+    """Rewrite the journal so that it uses the least space and has current statistics."""
+    # move every change in the write-ahead log into the journal and empty
+    # the log before rewriting the journal without any unused pages
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    connection.execute("VACUUM")
+    # update the statistics that the query planner uses to choose an index
+    connection.execute("PRAGMA optimize").fetchall()
@@ -1,29 +1,67 @@
 """Define the command-line interface for the meSMSage program."""
 
+import functools
+import itertools
 import logging
 import os
+import re
 
+from datetime import datetime
+from datetime import timedelta
 from enum import Enum
 from logging import Logger
 from pathlib import Path
+from typing import Callable
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Optional
 from typing import Tuple
+from typing import TYPE_CHECKING
 
 from rich.console import Console
 from rich.text import Text
 
-from pandas import DataFrame
-
+from mesmsage import cache
 from mesmsage import configure
 from mesmsage import constants
-from mesmsage import demonstrate
-from mesmsage import extract
-from mesmsage import interface
-from mesmsage import sheets
-from mesmsage import sms
+from mesmsage import journal
+from mesmsage import segments
+from mesmsage import template
 from mesmsage import util
 
+# import the modules that depend on large packages, like pandas, sheetfu,
+# twilio, and InquirerPy, when a command first uses them instead of when
+# the program starts so that commands like history and --help start quickly;
+# note that the annotations that refer to these modules are strings so that
+# defining a function does not import the module
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+    from mesmsage import demonstrate
+    from mesmsage import extract
+    from mesmsage import interface
+    from mesmsage import phone
+    from mesmsage import roster
+    from mesmsage import scheduler
+    from mesmsage import sheets
+    from mesmsage import shifts
+    from mesmsage import sms
+    from mesmsage import transport
+    from mesmsage import webhook
+else:
+    demonstrate = util.import_lazily("mesmsage.demonstrate")
+    extract = util.import_lazily("mesmsage.extract")
+    interface = util.import_lazily("mesmsage.interface")
+    phone = util.import_lazily("mesmsage.phone")
+    roster = util.import_lazily("mesmsage.roster")
+    scheduler = util.import_lazily("mesmsage.scheduler")
+    sheets = util.import_lazily("mesmsage.sheets")
+    shifts = util.import_lazily("mesmsage.shifts")
+    sms = util.import_lazily("mesmsage.sms")
+    webhook = util.import_lazily("mesmsage.webhook")
+
 import typer
 
 app = typer.Typer()
@@ -51,12 +89,9 @@ def setup(debug_level: DebugLevel) -> Tuple[Console, Logger]:
     return console, logger
 
 
-def download(googlesheet_id: str, env_file: Path, debug_level: DebugLevel) -> DataFrame:
-    """Download the spreadsheet from Google Sheets, process it, and return an Pandas data frame."""
+def load_environment_file(env_file: Path = None) -> None:
+    """Load the environment variables from the .env file, defaulting to the one in the current directory."""
     logger = logging.getLogger(constants.logging.Rich)
-    # DEBUG: display the debugging output for the program's command-line arguments
-    logger.debug(f"The Google Sheet is {googlesheet_id}.")
-    logger.debug(f"The debugging level is {debug_level.value}.")
     # construct the full name of the .env file
     env_file_name = constants.markers.Nothing
     # the file was specified and it is valid so derive its full name
@@ -75,21 +110,74 @@ def download(googlesheet_id: str, env_file: Path, debug_level: DebugLevel) -> Da
         logger.debug("Using constructed .env file in current directory")
     # DEBUG: display the constructed name of the .env file
     logger.debug(f"Environment file: {env_file_name}")
-    # load the required secure environment for connecting to Google Sheets
+    # load the required secure environment for connecting to the services
     util.load_environment(env_file_name)
+
+
+def download(
+    googlesheet_id: str,
+    env_file: Path,
+    debug_level: DebugLevel,
+    offline: bool = False,
+    use_cache: bool = True,
+    cache_directory: Path = None,
+    columns: List[str] = None,
+    header_pattern: str = None,
+    a1_range: str = None,
+) -> "DataFrame":
+    """Download the spreadsheet from Google Sheets, process it, and return an Pandas data frame."""
+    logger = logging.getLogger(constants.logging.Rich)
+    # DEBUG: display the debugging output for the program's command-line arguments
+    logger.debug(f"The Google Sheet is {googlesheet_id}.")
+    logger.debug(f"The debugging level is {debug_level.value}.")
+    # construct the name of the file that caches the downloaded spreadsheet
+    # note that a download of only part of the spreadsheet has its own cache file
+    projection = repr((sorted(columns or []), header_pattern, a1_range))
+    cache_file = cache.get_cache_file(
+        cache.get_cache_directory(cache_directory),
+        googlesheet_id,
+        constants.sheets.Default,
+        projection if columns or header_pattern or a1_range else None,
+    )
+    cached_revision, cached_dataframe = None, None
+    if use_cache or offline:
+        cached_revision, cached_dataframe = cache.read_cache(cache_file)
+    # running offline means that the program must only use the cached spreadsheet
+    if offline:
+        if cached_dataframe is None:
+            raise cache.CacheNotFoundError
+        logger.debug(f"Using cached revision {cached_revision} while offline")
+        return cached_dataframe
+    # load the required secure environment for connecting to Google Sheets
+    load_environment_file(env_file)
     # connect the specified Google Sheet using the default internal sheet of "Sheet1"
     sheet = sheets.connect_to_sheet(googlesheet_id)
+    # reuse the cached spreadsheet when the spreadsheet has not changed since it was
+    # cached, which avoids downloading all of the data in the spreadsheet again
+    revision = sheets.get_revision(sheet)
+    if (
+        cached_dataframe is not None
+        and revision is not None
+        and revision == cached_revision
+    ):
+        logger.debug(f"Using cached revision {cached_revision}")
+        return cached_dataframe
     # extract the Pandas data frame from the sheet in sheetfu's internal format
-    dataframe = sheets.extract_dataframe(sheet)
+    # note that only the requested columns or range are downloaded, if requested
+    dataframe = sheets.extract_dataframe(sheet, columns, header_pattern, a1_range)
+    # normalize the phone numbers before caching the data frame so that
+    # later runs that use the cache never need to parse them again
+    phone.add_e164_numbers(dataframe)
+    if use_cache and revision is not None:
+        cache.write_cache(cache_file, revision, dataframe)
     # console.print(constants.markers.Indent + "Downloading")
     return dataframe
 
 
-def select_individuals(dataframe: DataFrame) -> List[str]:
+def select_individuals(roster_index: "roster.RosterIndex") -> List[str]:
     """Interactively select the individuals who will receive the SMS messages."""
-    # extract all of the individual names from the dataframe
-    individual_names_series = extract.get_individual_names(dataframe)
-    individual_names_list = extract.convert_series_to_list(individual_names_series)
+    # extract all of the individual names from the index of the dataframe
+    individual_names_list = roster_index.names.tolist()
     # prepend the "All Individuals" option to the list of choices for
     # the user so that a person does not have to select every person
     # in order to send the SMS to all people in the spreadsheet
@@ -110,6 +198,61 @@ def select_individuals(dataframe: DataFrame) -> List[str]:
     )
 
 
+def select_individuals_headless(
+    roster_index: "roster.RosterIndex",
+    console: Console,
+    recipients_file: Path = None,
+    name_pattern: str = None,
+    shift_pattern: str = None,
+    scheduled: bool = False,
+) -> List[str]:
+    """Select the individuals who will receive the SMS messages without a prompt."""
+    names = None
+    if recipients_file is not None:
+        names = interface.read_recipients_file(recipients_file)
+        # a name that is not in the spreadsheet is most likely misspelled
+        missing_names = [
+            name for name in names if name not in roster_index.name_positions
+        ]
+        if missing_names:
+            console.print(
+                f"Could not find {len(missing_names)} individual(s) from {recipients_file}:"
+            )
+            console.print(util.reindent(util.get_spiffy_list(missing_names)))
+            console.print()
+    return roster_index.select(names, name_pattern, shift_pattern, scheduled)
+
+
+def restrict_to_window(
+    roster_index: "roster.RosterIndex", window: timedelta, console: Console
+) -> "roster.RosterIndex":
+    """Restrict the index to the activities for the shifts that start in the window."""
+    shift_index = shifts.ShiftIndex(roster_index.activity_columns)
+    columns = shift_index.get_window_columns(window)
+    console.print(
+        f"Found {len(columns)} of {len(shift_index)} shift(s) that start in the next {window}"
+    )
+    # an activity without a date in its header is never in the window
+    if shift_index.unscheduled > 0:
+        console.print(
+            f"Skipped {shift_index.unscheduled} activity(s) without a date in the header"
+        )
+    console.print()
+    return roster_index.restrict_activities(columns)
+
+
+def get_recipient_names(phone_numbers_dictionary: Dict[str, str]) -> Dict[str, str]:
+    """Get the names of the individuals who receive the messages sent to each phone number."""
+    # note that the individuals in a household share a phone number
+    household_names: Dict[str, List[str]] = {}
+    for name, phone_number in phone_numbers_dictionary.items():
+        household_names.setdefault(phone_number, []).append(name)
+    return {
+        phone_number: util.get_spiffy_list(names)
+        for phone_number, names in household_names.items()
+    }
+
+
 def display_recipients(
     chosen_individual_names_list: List[str], console: Console
 ) -> None:
@@ -137,27 +280,247 @@ def display_activities(
 
 
 def display_sms(
-    number_sms_dict: Dict[str, str], console: Console, dry_run: bool = False
+    sms_messages: List[Tuple[str, str]], console: Console, dry_run: bool = False
 ) -> None:
     """Display the names of individuals and their associated activities."""
     if not dry_run:
         console.print("Preparing to send these SMS:")
     console.print("Would send send these SMS:")
     console.print()
-    sms_text = util.get_printable_dictionary_str(number_sms_dict)
-    console.print(sms_text)
+    # note that a phone number may receive more than one message
+    for phone_number, message in sms_messages:
+        console.print(util.get_printable_dictionary_str({phone_number: message}))
     console.print()
 
 
+def display_segments(report: segments.SegmentReport, console: Console) -> None:
+    """Display the number of segments that Twilio uses to send and bill the messages."""
+    console.print(
+        f"The {report.messages} SMS use {report.segments_after} segment(s)"
+        f" with {report.ucs2_after} SMS encoded as UCS-2"
+    )
+    if report.segments_before != report.segments_after:
+        console.print(
+            f"Replacing the characters that are not in GSM-7 reduced this from"
+            f" {report.segments_before} segment(s) with {report.ucs2_before} SMS"
+            f" encoded as UCS-2"
+        )
+    console.print()
+
+
+def display_coalesced_sms(
+    individuals_count: int, sms_messages_count: int, console: Console
+) -> None:
+    """Display the number of sends saved by combining the messages for a shared phone number."""
+    saved_count = individuals_count - sms_messages_count
+    console.print(
+        f"Combined the SMS for {individuals_count} individual(s) into"
+        f" {sms_messages_count} SMS, saving {saved_count} send(s)"
+    )
+    console.print()
+
+
+def display_invalid_numbers(
+    invalid_numbers: List["phone.InvalidNumber"], console: Console
+) -> None:
+    """Display the rows with phone numbers that cannot receive an SMS."""
+    if not invalid_numbers:
+        return
+    console.print(
+        f"Found {len(invalid_numbers)} row(s) with a phone number that is not valid:"
+    )
+    console.print()
+    for invalid_number in invalid_numbers:
+        console.print(
+            util.reindent(
+                f"Row {invalid_number.position + 1}: {invalid_number.name}"
+                f" ({invalid_number.phone_number}): {invalid_number.error}"
+            )
+        )
+    console.print()
+
+
+def display_send_results(results: Iterable["sms.SendResult"], console: Console) -> None:
+    """Display the SID or the error for each of the sent messages as they are sent."""
+    logger = logging.getLogger(constants.logging.Rich)
+    failures = 0
+    for result in results:
+        logger.debug(f"Twilio returned: {result}")
+        if result.error is None:
+            console.print(util.reindent(f"{result.phone_number} -> {result.sid}"))
+        else:
+            failures = failures + 1
+            console.print(
+                util.reindent(f"{result.phone_number} -> FAILED: {result.error}")
+            )
+    console.print()
+    if failures > 0:
+        console.print(f"Could not send {failures} SMS message(s)")
+        console.print()
+
+
+def journal_sent_messages(
+    sids: Iterator[str], send_journal: journal.SendJournal
+) -> Iterator["sms.SendResult"]:
+    """Record each SID, and the error that stops the sending, in the journal."""
+    while True:
+        try:
+            sid = next(sids)
+        except StopIteration:
+            return
+        # the message that could not be sent is recorded as a failure so
+        # that resuming the run sends it again, and then the error stops
+        # the sending of all of the other messages like it did before
+        except Exception as e:
+            # an error in producing the messages, instead of in sending
+            # them, happens when no message is waiting to be sent
+            if send_journal.outstanding:
+                send_journal.record(None, str(e))
+            raise
+        yield sms.SendResult(send_journal.record(sid), sid, None)
+
+
+def display_transport_statistics(
+    statistics: Optional["transport.TransportStatistics"], console: Console
+) -> None:
+    """Display the number of requests made to Twilio and the connections opened for them."""
+    # each message should cost a request and not a new connection, with at
+    # most one connection for each of the threads that send the messages
+    if statistics is not None and statistics.requests > 0:
+        console.print(
+            f"Made {statistics.requests} request(s) to Twilio"
+            f" over {statistics.connections} connection(s)"
+        )
+        console.print()
+
+
+def send_and_journal(
+    messages: Iterable[Tuple[str, str]],
+    send_journal: journal.SendJournal,
+    console: Console,
+    buffer_size: int = constants.sizes.Buffer,
+    workers: int = 1,
+    rate: float = None,
+    recipient_names: Dict[str, str] = None,
+    status_callback: str = None,
+) -> None:
+    """Send the messages not already sent in the run and record each one in the journal."""
+    console.print(f"Sending these SMS in run {send_journal.run_id}:")
+    console.print()
+    tracked_messages = send_journal.track(messages, recipient_names)
+    # send the messages with a pool of threads for each sender, continuing
+    # after a failure, so that the throughput grows with the number of
+    # senders even when each sender only has one thread
+    if workers > 1 or len(sms.get_senders()) > 1:
+        results = sms.send_message_stream_concurrently(
+            util.buffer_iterator(tracked_messages, buffer_size),
+            workers,
+            rate=rate,
+            status_callback=status_callback,
+        )
+        display_send_results(
+            (
+                result._replace(
+                    phone_number=send_journal.record(result.sid, result.error)
+                )
+                for result in results
+            ),
+            console,
+        )
+    else:
+        display_send_results(
+            journal_sent_messages(
+                sms.send_message_stream(
+                    tracked_messages, buffer_size, rate, status_callback
+                ),
+                send_journal,
+            ),
+            console,
+        )
+    if send_journal.skipped > 0:
+        console.print(
+            f"Skipped {send_journal.skipped} SMS message(s) already sent in run {send_journal.run_id}"
+        )
+        console.print()
+    display_transport_statistics(sms.get_transport_statistics(), console)
+
+
+def stream_sms(
+    roster_index: "roster.RosterIndex",
+    chosen_individual_names_list: List[str],
+    phone_numbers_dictionary: Dict[str, str],
+    message_template: template.MessageTemplate,
+    console: Console,
+    send_journal: Optional[journal.SendJournal] = None,
+    buffer_size: int = constants.sizes.Buffer,
+    workers: int = 1,
+    rate: float = None,
+    recipient_names: Dict[str, str] = None,
+    gsm7: bool = False,
+    segment_budget: int = None,
+    status_callback: str = None,
+) -> None:
+    """Compose and send the SMS messages one at a time instead of as a whole batch."""
+    # create the pipeline of generators that produces, for each individual:
+    # row --> (name, phone number, activities) --> (phone number, SMS message)
+    # so that the first message is ready as soon as the first individual is found;
+    # note that the individuals who share a phone number receive one message
+    # as soon as the last individual in their household is found
+    individual_activities = extract.generate_individual_activities(
+        roster_index, chosen_individual_names_list
+    )
+    messages = extract.generate_coalesced_sms_messages(
+        individual_activities, phone_numbers_dictionary, message_template
+    )
+    # each message is checked against the budget just before it is sent
+    messages = segments.generate_optimized_messages(messages, gsm7, segment_budget)
+    # there is no journal for a dry run since no message is sent
+    if send_journal is None:
+        console.print("Would send send these SMS:")
+        console.print()
+        for phone_number, message in messages:
+            console.print(util.get_printable_dictionary_str({phone_number: message}))
+        console.print()
+        return
+    send_and_journal(
+        messages,
+        send_journal,
+        console,
+        buffer_size,
+        workers,
+        rate,
+        recipient_names,
+        status_callback,
+    )
+
+
 def connect_and_download(
-    googlesheet_id: str, debug_level: DebugLevel, env_file: Path
-) -> Tuple[DataFrame, Console, Logger]:
+    googlesheet_id: str,
+    debug_level: DebugLevel,
+    env_file: Path,
+    offline: bool = False,
+    use_cache: bool = True,
+    columns: List[str] = None,
+    header_pattern: str = None,
+    a1_range: str = None,
+) -> Tuple["DataFrame", Console, Logger]:
     """Connect to the spreadsheet and then download it and return it."""
     # STEP: setup the console and the logger and then create a blank line for space
     console, logger = setup(debug_level)
     console.print()
     # STEP: download the spreadsheet and produce a Pandas data frame
-    dataframe = download(googlesheet_id, env_file, debug_level)
+    dataframe = download(
+        googlesheet_id,
+        env_file,
+        debug_level,
+        offline,
+        use_cache,
+        columns=columns,
+        header_pattern=header_pattern,
+        a1_range=a1_range,
+    )
+    # STEP: report the phone numbers that are not valid before anything is sent
+    display_invalid_numbers(phone.add_e164_numbers(dataframe), console)
     return dataframe, console, logger
 
 
@@ -167,37 +530,498 @@ def send(
     debug_level: DebugLevel = DebugLevel.ERROR,
     env_file: Path = typer.Option(None),
     dry_run: bool = typer.Option(False),
+    template_file: Path = typer.Option(None),
+    stream: bool = typer.Option(False),
+    buffer_size: int = typer.Option(constants.sizes.Buffer, min=1),
+    offline: bool = typer.Option(False),
+    use_cache: bool = typer.Option(True, "--cache/--no-cache"),
+    columns: List[str] = typer.Option(None, "--column"),
+    header_pattern: str = typer.Option(None),
+    a1_range: str = typer.Option(None),
+    workers: int = typer.Option(1, min=1),
+    rate: float = typer.Option(None, min=0.0),
+    resume: str = typer.Option(None),
+    journal_file: Path = typer.Option(None),
+    gsm7: bool = typer.Option(False, "--gsm7/--no-gsm7"),
+    segment_budget: int = typer.Option(None, min=1),
+    retention_days: int = typer.Option(constants.journal.Retention_Days, min=0),
+    status_callback: str = typer.Option(None),
+    recipients_file: Path = typer.Option(None, exists=True, dir_okay=False),
+    name_pattern: str = typer.Option(None),
+    shift: str = typer.Option(None),
+    window: str = typer.Option(None),
+    connect_timeout: float = typer.Option(
+        constants.transport.Connect_Timeout, min=0.001
+    ),
+    read_timeout: float = typer.Option(constants.transport.Read_Timeout, min=0.001),
+    proxy: str = typer.Option(None),
 ):
     """Send SMS messages."""
+    # STEP: start a new run in the journal or find the run that is resumed
+    journal_file = journal.get_journal_file(journal_file)
+    if resume is not None and not journal.run_exists(journal_file, resume):
+        raise typer.BadParameter(
+            f"There is no run {resume} in the journal {journal_file}"
+        )
+    run_id = resume if resume is not None else journal.create_run_id()
+    # STEP: compile the template for the messages before downloading the
+    # spreadsheet so that a template with an error is detected right away
+    message_template = template.compile_template()
+    if template_file is not None:
+        message_template = template.read_template(template_file)
+    # STEP: check the patterns that select the individuals without a prompt
+    for pattern in (name_pattern, shift):
+        if pattern is not None:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise typer.BadParameter(f"The pattern {pattern} is not valid: {e}")
+    # STEP: check the window of time in which the shifts must start
+    window_length = None
+    if window is not None:
+        try:
+            window_length = shifts.parse_window(window)
+        except shifts.ShiftWindowError as e:
+            raise typer.BadParameter(str(e))
     # STEP: connect to the spreadsheet, download it, and use it in follow-on steps
     dataframe, console, logger = connect_and_download(
-        googlesheet_id, debug_level, env_file
+        googlesheet_id,
+        debug_level,
+        env_file,
+        offline,
+        use_cache,
+        columns,
+        header_pattern,
+        a1_range,
     )
-    # STEP: let the person using the program select individuals to receive the SMS
-    chosen_individual_names_list = select_individuals(dataframe)
+    # STEP: index the individuals once so that each of the following steps
+    # can look up the chosen individuals without scanning the data frame
+    roster_index = extract.create_roster_index(dataframe)
+    # the index stores everything that the remaining steps need and thus the
+    # data frame, which may store a Python object for every cell, is released
+    del dataframe
+    # STEP: only remind the individuals about the shifts that start in the window
+    if window_length is not None:
+        roster_index = restrict_to_window(roster_index, window_length, console)
+    # STEP: select the individuals to receive the SMS from the options, so that
+    # a scripted run never waits for a person, or else let the person using
+    # the program select them
+    if (
+        recipients_file is not None
+        or name_pattern is not None
+        or shift is not None
+        or window_length is not None
+    ):
+        chosen_individual_names_list = select_individuals_headless(
+            roster_index,
+            console,
+            recipients_file,
+            name_pattern,
+            shift,
+            window_length is not None,
+        )
+    else:
+        chosen_individual_names_list = select_individuals(roster_index)
+    if not chosen_individual_names_list:
+        console.print("There are no individuals who match the selection")
+        console.print()
+        return
     # STEP: display the names of individuals who will receive the SMS
     display_recipients(chosen_individual_names_list, console)
     # STEP: get the phone numbers of the selected individuals
     phone_numbers_dictionary = extract.get_individual_numbers(
-        dataframe, chosen_individual_names_list
+        roster_index, chosen_individual_names_list
     )
     logger.debug(f"Phone numbers: {phone_numbers_dictionary}")
-    # STEP: get the activities for individuals
+    recipient_names = get_recipient_names(phone_numbers_dictionary)
+    # STEP: record each message that is sent in the journal so that a run that
+    # does not finish can resume without sending any of the messages again
+    send_journal = None
+    if not dry_run:
+        send_journal = journal.SendJournal(journal_file, run_id)
+        # the journal is also the history of the messages and so the messages
+        # sent before the retention period are deleted when a run starts
+        journal.apply_retention(send_journal.connection, retention_days)
+    # the client has a connection in its pool for each thread that sends and
+    # it is configured for a dry run too, so that the transport statistics
+    # are for a client with the requested timeouts and proxy
+    sms.configure_client(
+        sms.get_pool_size(workers), connect_timeout, read_timeout, proxy
+    )
+    try:
+        # STEP: compose and send each message as soon as it is ready, with at most
+        # buffer_size composed messages waiting to be sent at any point in time
+        if stream:
+            stream_sms(
+                roster_index,
+                chosen_individual_names_list,
+                phone_numbers_dictionary,
+                message_template,
+                console,
+                send_journal,
+                buffer_size,
+                workers,
+                rate,
+                recipient_names,
+                gsm7,
+                segment_budget,
+                status_callback,
+            )
+            return
+        # STEP: get the activities for individuals
+        name_activities_dictionary = extract.get_individual_activities(
+            roster_index, chosen_individual_names_list
+        )
+        logger.debug(f"Individuals and activities: {name_activities_dictionary}")
+        display_activities(name_activities_dictionary, console)
+        # STEP: generate the messages for the individuals, combining the
+        # messages for the individuals who share a phone number
+        sms_messages = extract.coalesce_sms_messages(
+            phone_numbers_dictionary, name_activities_dictionary, message_template
+        )
+        # STEP: replace the characters that make messages use more segments and
+        # check that every message is within the budget before sending any of them
+        sms_messages, segment_report = segments.optimize_sms_messages(
+            sms_messages, gsm7, segment_budget
+        )
+        logger.debug(f"Phone numbers and SMS messages: {sms_messages}")
+        display_sms(sms_messages, console, dry_run)
+        display_coalesced_sms(
+            len(name_activities_dictionary), len(sms_messages), console
+        )
+        display_segments(segment_report, console)
+        # STEP: send the SMS messages for each individual
+        if send_journal is not None:
+            send_and_journal(
+                sms_messages,
+                send_journal,
+                console,
+                buffer_size,
+                workers,
+                rate,
+                recipient_names,
+                status_callback,
+            )
+    # a message with more segments than the budget stops the run, before any
+    # message is sent in a batch or after the ones before it in a stream
+    except segments.SegmentBudgetError as e:
+        console.print(f"Did not send the SMS since a message is over budget. {e}")
+        console.print()
+        raise typer.Exit(code=1)
+    # commit the results that are still waiting even when sending is interrupted
+    finally:
+        if send_journal is not None:
+            send_journal.close()
+
+
+def display_synced_statuses(status_counts: Dict[str, int], console: Console) -> None:
+    """Display the number of messages with each delivery status synchronized from Twilio."""
+    console.print(
+        f"Synchronized the status of {sum(status_counts.values())} SMS message(s) from Twilio:"
+    )
+    console.print()
+    for status, count in sorted(status_counts.items()):
+        console.print(util.reindent(f"{status}: {count}"))
+    console.print()
+
+
+@app.command()
+def sync_status(
+    debug_level: DebugLevel = DebugLevel.ERROR,
+    journal_file: Path = typer.Option(None),
+    since: datetime = typer.Option(None),
+    until: datetime = typer.Option(None),
+    senders: List[str] = typer.Option(None, "--sender"),
+    page_size: int = typer.Option(
+        constants.journal.Status_Page_Size,
+        min=1,
+        max=constants.journal.Status_Page_Size,
+    ),
+    connect_timeout: float = typer.Option(
+        constants.transport.Connect_Timeout, min=0.001
+    ),
+    read_timeout: float = typer.Option(constants.transport.Read_Timeout, min=0.001),
+    proxy: str = typer.Option(None),
+    retention_days: int = typer.Option(constants.journal.Retention_Days, min=0),
+):
+    """Synchronize the delivery status of SMS messages from Twilio."""
+    console, logger = setup(debug_level)
+    journal_file = journal.get_journal_file(journal_file)
+    connection = journal.connect(journal_file)
+    # without a start, only the messages that are not yet settled and the
+    # ones sent after the newest message in the journal are fetched instead
+    # of every message that Twilio ever sent
+    if since is None:
+        since = journal.get_sync_start(connection, retention_days)
+        logger.debug(f"Synchronizing the statuses of messages sent since {since}")
+    # the pages are fetched one after the other over one kept-alive connection
+    sms.configure_client(1, connect_timeout, read_timeout, proxy)
+    try:
+        # STEP: fetch the messages from Twilio a page at a time, for each of the
+        # senders when there are some, and record each page in the history
+        sender_filters: List[Optional[str]] = list(senders) if senders else [None]
+        message_statuses: Iterable[journal.MessageStatus] = (
+            itertools.chain.from_iterable(
+                sms.stream_message_statuses(since, until, sender, page_size)
+                for sender in sender_filters
+            )
+        )
+        status_counts = journal.record_statuses(connection, message_statuses)
+        logger.debug(f"Synchronized statuses: {status_counts}")
+        display_synced_statuses(status_counts, console)
+        display_transport_statistics(sms.get_transport_statistics(), console)
+    finally:
+        connection.close()
+
+
+@app.command()
+def receive_status(
+    debug_level: DebugLevel = DebugLevel.ERROR,
+    journal_file: Path = typer.Option(None),
+    host: str = typer.Option(constants.webhook.Host),
+    port: int = typer.Option(constants.webhook.Port),
+    public_url: str = typer.Option(None),
+    validate: bool = typer.Option(False, "--validate/--no-validate"),
+):
+    """Receive the delivery status of SMS messages from Twilio's status callbacks."""
+    console, logger = setup(debug_level)
+    # STEP: check the signature of each callback with the Twilio auth token
+    auth_token = None
+    if validate:
+        auth_token = os.getenv(constants.environment.Twilio_Auth_Token)
+        if not auth_token:
+            raise typer.BadParameter(
+                f"Validating callbacks requires {constants.environment.Twilio_Auth_Token}"
+            )
+    # STEP: receive the callbacks and record them in the journal in batches
+    # until the person using the program stops the receiver
+    receiver = webhook.StatusReceiver(
+        journal.get_journal_file(journal_file),
+        host,
+        port,
+        auth_token=auth_token,
+        public_url=public_url,
+    )
+    receiver.start()
+    console.print(f"Receiving status callbacks at {public_url or receiver.url}")
+    console.print("Send the SMS with --status-callback set to this URL")
+    console.print()
+    try:
+        # wait in short steps so that an interruption is noticed right away
+        while receiver.serving.is_alive():
+            receiver.serving.join(constants.webhook.Flush_Interval)
+    except KeyboardInterrupt:
+        logger.debug("Stopping the receiver of status callbacks")
+    finally:
+        receiver.stop()
+    display_synced_statuses(receiver.status_counts, console)
+
+
+def create_roster_fetcher(
+    googlesheet_id: str,
+    console: Console,
+    columns: List[str] = None,
+    header_pattern: str = None,
+    a1_range: str = None,
+) -> Callable[[], Optional["roster.RosterIndex"]]:
+    """Connect to the spreadsheet once and create a function that fetches it when it changes."""
+    logger = logging.getLogger(constants.logging.Rich)
+    # the connection to the spreadsheet is kept so that checking it for a
+    # change is one small request instead of connecting to it again
+    sheet = sheets.connect_to_sheet(googlesheet_id)
+    fetched_revisions: List[Optional[str]] = [None]
+
+    def fetch_roster() -> Optional["roster.RosterIndex"]:
+        """Download and index the spreadsheet, or return None when it did not change."""
+        revision = sheets.get_revision(sheet)
+        if revision is not None and revision == fetched_revisions[-1]:
+            logger.debug(f"The spreadsheet is still at revision {revision}")
+            return None
+        dataframe = sheets.extract_dataframe(sheet, columns, header_pattern, a1_range)
+        display_invalid_numbers(phone.add_e164_numbers(dataframe), console)
+        fetched_revisions.append(revision)
+        console.print(f"Loaded revision {revision} of the spreadsheet")
+        console.print()
+        return extract.create_roster_index(dataframe)
+
+    return fetch_roster
+
+
+def send_reminders(
+    roster_index: "roster.RosterIndex",
+    reminders: "List[scheduler.Reminder]",
+    message_template: template.MessageTemplate,
+    console: Console,
+    journal_file: Path,
+    workers: int = 1,
+    rate: float = None,
+    gsm7: bool = False,
+    segment_budget: int = None,
+    status_callback: str = None,
+) -> int:
+    """Send a message to each individual about their due shifts and return how many could not be sent."""
+    chosen_individual_names_list = roster_index.select(scheduled=True)
+    if not chosen_individual_names_list:
+        return 0
+    phone_numbers_dictionary = extract.get_individual_numbers(
+        roster_index, chosen_individual_names_list
+    )
     name_activities_dictionary = extract.get_individual_activities(
-        dataframe, chosen_individual_names_list
+        roster_index, chosen_individual_names_list
     )
-    logger.debug(f"Individuals and activities: {name_activities_dictionary}")
-    display_activities(name_activities_dictionary, console)
-    # STEP: generate the messages for the individuals
-    number_sms_dictionary = extract.get_sms_messages(
-        phone_numbers_dictionary, name_activities_dictionary
+    shift_keys = {
+        reminder.header: scheduler.get_shift_key(reminder) for reminder in reminders
+    }
+    run_id = scheduler.get_run_id(reminders)
+    # the journal is opened for each run since runs are hours apart
+    with journal.SendJournal(journal_file, run_id) as send_journal:
+        # an individual is not reminded again of a shift that an earlier run
+        # reminded them of, like when a restart groups the due shifts in
+        # another way than the run that was sending them when it stopped
+        sent_reminders = journal.get_reminders(
+            send_journal.connection, shift_keys.values()
+        )
+        remaining_activities_dictionary: Dict[str, List[str]] = {}
+        for name, activities in name_activities_dictionary.items():
+            phone_number = phone_numbers_dictionary[name]
+            remaining_activities = [
+                activity
+                for activity in activities
+                if (shift_keys[activity], phone_number) not in sent_reminders
+            ]
+            if remaining_activities:
+                remaining_activities_dictionary[name] = remaining_activities
+        if not remaining_activities_dictionary:
+            return 0
+        display_activities(remaining_activities_dictionary, console)
+        sms_messages = extract.coalesce_sms_messages(
+            phone_numbers_dictionary, remaining_activities_dictionary, message_template
+        )
+        sms_messages, _ = segments.optimize_sms_messages(
+            sms_messages, gsm7, segment_budget
+        )
+        try:
+            send_and_journal(
+                sms_messages,
+                send_journal,
+                console,
+                workers=workers,
+                rate=rate,
+                recipient_names=get_recipient_names(phone_numbers_dictionary),
+                status_callback=status_callback,
+            )
+        finally:
+            # find the messages that the journal does not have as sent, where
+            # a household message that was split has several parts to a number
+            unsent_messages = {
+                (phone_number, journal.get_body_hash(message))
+                for phone_number, message in sms_messages
+            } - send_journal.sent
+            # record the shifts of every number that was sent all of the parts
+            # of its message, even when sending stopped early, so that they are
+            # never sent again and a part that was not sent is sent by a retry
+            unsent_phone_numbers = {phone_number for phone_number, _ in unsent_messages}
+            sent_phone_numbers = {
+                phone_number
+                for phone_number, _ in sms_messages
+                if phone_number not in unsent_phone_numbers
+            }
+            journal.record_reminders(
+                send_journal.connection,
+                run_id,
+                (
+                    (shift_keys[activity], phone_numbers_dictionary[name])
+                    for name, activities in remaining_activities_dictionary.items()
+                    for activity in activities
+                    if phone_numbers_dictionary[name] in sent_phone_numbers
+                ),
+            )
+    return len(unsent_messages)
+
+
+@app.command()
+def serve(
+    googlesheet_id: str = typer.Option(...),
+    debug_level: DebugLevel = DebugLevel.ERROR,
+    env_file: Path = typer.Option(None),
+    template_file: Path = typer.Option(None),
+    columns: List[str] = typer.Option(None, "--column"),
+    header_pattern: str = typer.Option(None),
+    a1_range: str = typer.Option(None),
+    lead: str = typer.Option(constants.scheduler.Lead),
+    remind_at: str = typer.Option(None),
+    refresh_interval: float = typer.Option(
+        constants.scheduler.Refresh_Interval, min=1.0
+    ),
+    workers: int = typer.Option(1, min=1),
+    rate: float = typer.Option(None, min=0.0),
+    journal_file: Path = typer.Option(None),
+    gsm7: bool = typer.Option(False, "--gsm7/--no-gsm7"),
+    segment_budget: int = typer.Option(None, min=1),
+    status_callback: str = typer.Option(None),
+    connect_timeout: float = typer.Option(
+        constants.transport.Connect_Timeout, min=0.001
+    ),
+    read_timeout: float = typer.Option(constants.transport.Read_Timeout, min=0.001),
+    proxy: str = typer.Option(None),
+):
+    """Keep the spreadsheet in memory and send reminders before each of the shifts."""
+    # STEP: check the options before connecting to anything
+    try:
+        lead_length = shifts.parse_window(lead)
+    except shifts.ShiftWindowError as e:
+        raise typer.BadParameter(str(e))
+    remind_at_time = None
+    if remind_at is not None:
+        try:
+            remind_at_time = datetime.strptime(
+                remind_at, constants.scheduler.Remind_At_Format
+            ).time()
+        except ValueError:
+            raise typer.BadParameter(f"The time {remind_at} is not in the HH:MM format")
+    message_template = template.compile_template()
+    if template_file is not None:
+        message_template = template.read_template(template_file)
+    console, logger = setup(debug_level)
+    console.print()
+    # STEP: load the environment and connect to the spreadsheet once so
+    # that every reminder uses the same connections and roster in memory
+    load_environment_file(env_file)
+    sms.configure_client(
+        sms.get_pool_size(workers), connect_timeout, read_timeout, proxy
     )
-    logger.debug(f"Phone numbers and SMS messages: {number_sms_dictionary}")
-    display_sms(number_sms_dictionary, console, dry_run)
-    # STEP: send the SMS messages for each individual
-    if not dry_run:
-        sid = sms.send_messages(number_sms_dictionary)
-        logger.debug(f"Twilio returned SID: {sid}")
+    scheduler_service = scheduler.ReminderScheduler(
+        create_roster_fetcher(
+            googlesheet_id, console, columns, header_pattern, a1_range
+        ),
+        functools.partial(
+            send_reminders,
+            message_template=message_template,
+            console=console,
+            journal_file=journal.get_journal_file(journal_file),
+            workers=workers,
+            rate=rate,
+            gsm7=gsm7,
+            segment_budget=segment_budget,
+            status_callback=status_callback,
+        ),
+        lead_length,
+        remind_at_time,
+        timedelta(seconds=refresh_interval),
+    )
+    reminder_time = (
+        f"{lead} before" if remind_at is None else f"at {remind_at} the day before"
+    )
+    console.print(
+        f"Sending reminders {reminder_time} each shift"
+        f" and checking the spreadsheet every {refresh_interval:g} seconds"
+    )
+    console.print()
+    # STEP: send the reminders until the person using the program stops it
+    try:
+        scheduler_service.serve()
+    except KeyboardInterrupt:
+        logger.debug("Stopping the scheduler of reminders")
 
 
 @app.command()
@@ -205,17 +1029,91 @@ def demo(
     googlesheet_id: str = typer.Option(...),
     debug_level: DebugLevel = DebugLevel.ERROR,
     env_file: Path = typer.Option(None),
+    offline: bool = typer.Option(False),
+    use_cache: bool = typer.Option(True, "--cache/--no-cache"),
 ):
     """Demonstrate features."""
     # STEP: connect to the spreadsheet, download it, and use it for a demonstration
     dataframe, console, logger = connect_and_download(
-        googlesheet_id, debug_level, env_file
+        googlesheet_id, debug_level, env_file, offline, use_cache
     )
     # EXTRA: demonstrate the use of the dataframe with an example
     demonstrate.demonstrate_pandas_analysis(dataframe)
 
 
+def display_history(history_page: journal.HistoryPage, console: Console) -> None:
+    """Display a page of the history of the SMS messages."""
+    if not history_page.records:
+        console.print("There are no SMS messages in the history")
+        console.print()
+        return
+    console.print("History of SMS sending:")
+    console.print()
+    for record in history_page.records:
+        recipient = record.phone_number
+        if record.name is not None:
+            recipient = f"{record.name} ({record.phone_number})"
+        outcome = record.sid if record.error is None else f"FAILED: {record.error}"
+        console.print(
+            util.reindent(f"{record.sent_at} {record.status} {recipient} -> {outcome}")
+        )
+    console.print()
+    if history_page.cursor is not None:
+        console.print(f"Show the next page with --after {history_page.cursor}")
+        console.print()
+
+
 @app.command()
-def history():
+def history(
+    debug_level: DebugLevel = DebugLevel.ERROR,
+    journal_file: Path = typer.Option(None),
+    since: datetime = typer.Option(None),
+    until: datetime = typer.Option(None),
+    name: str = typer.Option(None),
+    phone_number: str = typer.Option(None, "--phone"),
+    status: str = typer.Option(None),
+    run_id: str = typer.Option(None, "--run"),
+    page_size: int = typer.Option(constants.journal.Page_Size, min=1),
+    cursor: str = typer.Option(None, "--after"),
+    retention_days: int = typer.Option(None, min=0),
+    compact: bool = typer.Option(False),
+):
     """Show SMS message history."""
-    typer.echo("History of SMS sending")
+    console, logger = setup(debug_level)
+    journal_file = journal.get_journal_file(journal_file)
+    if not journal_file.exists():
+        display_history(journal.HistoryPage([], None), console)
+        return
+    connection = journal.connect(journal_file)
+    try:
+        # STEP: delete the messages sent before the retention period and then
+        # rewrite the journal so that it does not grow without bound
+        if retention_days is not None:
+            deleted_count = journal.apply_retention(connection, retention_days)
+            console.print(f"Deleted {deleted_count} SMS message(s) from the history")
+            console.print()
+        if compact:
+            journal.compact(connection)
+        # STEP: find the page of the history that matches the filters, looking
+        # up the phone number in the same format in which it was recorded;
+        # note that normalizing the number does not import pandas
+        if phone_number is not None:
+            phone_number = phone.get_normalized_number(phone_number)
+        try:
+            history_page = journal.get_history_page(
+                connection,
+                since,
+                until,
+                name,
+                phone_number,
+                status,
+                run_id,
+                cursor,
+                page_size,
+            )
+        except journal.HistoryCursorError as e:
+            raise typer.BadParameter(str(e))
+        logger.debug(f"History page: {history_page}")
+        display_history(history_page, console)
+    finally:
+        connection.close()
@@ -0,0 +1,154 @@
+"""Normalize the phone numbers of individuals to the E164 international format."""
+
+import functools
+import logging
+import re
+
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import TYPE_CHECKING
+
+import phonenumbers  # type: ignore
+
+from mesmsage import constants
+
+# the phone numbers in a data frame are normalized with the methods of the
+# data frame and so normalizing a single number, like when looking up the
+# history of a phone number, does not import pandas
+if TYPE_CHECKING:
+    import pandas
+
+# a plus sign, a country code that does not start with a zero, and the rest
+# of the number, with at most fifteen digits in all
+E164_NUMBER = re.compile(
+    re.escape(constants.phone.Plus)
+    + "[1-9][0-9]{0,%d}" % (constants.phone.Maximum_E164_Length - 2)
+)
+
+# a North American number in the E164 format, which always has the right
+# number of digits for its country since each of its numbers has ten digits
+NORTH_AMERICAN_E164_NUMBER = re.compile(re.escape(constants.phone.Plus) + "1[0-9]{10}")
+
+
+class InvalidNumber(NamedTuple):
+    """Define a row of the data frame with a phone number that cannot be normalized."""
+
+    position: int
+    name: str
+    phone_number: str
+    error: str
+
+
+def is_e164_number(phone_number: str) -> bool:
+    """Determine whether or not the phone number is already in the E164 international format."""
+    # note that matching the format is much faster than parsing the number
+    return E164_NUMBER.fullmatch(phone_number) is not None
+
+
+def are_e164_numbers(phone_numbers: Iterable[str]) -> bool:
+    """Determine whether or not all of the phone numbers are already in the E164 international format."""
+    # matching each number without a call to a Python function for each of
+    # them is fast enough to check every number of a large sheet at once
+    return all(map(E164_NUMBER.fullmatch, phone_numbers))
+
+
+@functools.lru_cache(maxsize=constants.sizes.Number_Cache)
+def get_e164_number(phone_number: str) -> str:
+    """Convert the phone number to the E164 international format."""
+    # ensure that the phone number is in the E164 international format:
+    # https://support.twilio.com/hc/en-us/articles/223183008-Formatting-International-Phone-Numbers
+    # a number that is already normalized, like the numbers of a sheet that
+    # were normalized when it was loaded, is returned without parsing it when
+    # it is a North American number since all of them have the right number of
+    # digits; a normalized number like +12 is still parsed to check its digits
+    if is_e164_number(phone_number):
+        if NORTH_AMERICAN_E164_NUMBER.fullmatch(phone_number):
+            return phone_number
+    phone_number_parsed = phonenumbers.parse(phone_number, constants.locations.Us)
+    # a number may parse even though it has too few or too many digits to
+    # be dialed, like 123 that would otherwise become +1123; note that this
+    # checks the length of the number for its country and region instead of
+    # checking that it is assigned since a stale list of assigned numbers
+    # would reject a newly assigned number that can receive messages
+    if not phonenumbers.is_possible_number(phone_number_parsed):
+        raise phonenumbers.NumberParseException(
+            phonenumbers.NumberParseException.NOT_A_NUMBER,
+            constants.messages.Number_Not_Valid,
+        )
+    # a number that is already normalized does not need to be formatted
+    if is_e164_number(phone_number):
+        return phone_number
+    return phonenumbers.format_number(
+        phone_number_parsed, phonenumbers.PhoneNumberFormat.E164
+    )
+
+
+def get_normalized_number(phone_number: str) -> str:
+    """Get the phone number in the E164 international format, or as is if it cannot be normalized."""
+    try:
+        return get_e164_number(phone_number)
+    except phonenumbers.NumberParseException:
+        return phone_number
+
+
+def get_number_error(phone_number: str) -> str:
+    """Get the description of the reason that the phone number cannot be normalized."""
+    try:
+        get_e164_number(str(phone_number))
+    except phonenumbers.NumberParseException as e:
+        return str(e)
+    return constants.messages.Number_Not_Valid
+
+
+def add_e164_numbers(
+    individuals_dataframe: "pandas.DataFrame",
+) -> List[InvalidNumber]:
+    """Add a column of normalized phone numbers to the data frame and return the rows that are not valid."""
+    logger = logging.getLogger(constants.logging.Rich)
+    if constants.sheets.Number not in individuals_dataframe.columns:
+        return []
+    names = individuals_dataframe[constants.sheets.Name].tolist()
+    phone_numbers = individuals_dataframe[constants.sheets.Number].tolist()
+    errors: Dict[str, str] = {}
+    # a cached data frame was already normalized when it was first downloaded
+    # and so only the rows without a normalized phone number are reported
+    if constants.sheets.Number_E164 in individuals_dataframe.columns:
+        e164_numbers: List[Optional[str]] = individuals_dataframe[
+            constants.sheets.Number_E164
+        ].tolist()
+    else:
+        # parse each distinct phone number only once since an individual
+        # who works many shifts may appear in many rows of the sheet
+        normalized: Dict[str, Optional[str]] = {}
+        e164_numbers = []
+        for phone_number in phone_numbers:
+            if phone_number not in normalized:
+                try:
+                    normalized[phone_number] = get_e164_number(str(phone_number))
+                except phonenumbers.NumberParseException as e:
+                    normalized[phone_number] = None
+                    errors[phone_number] = str(e)
+            e164_numbers.append(normalized[phone_number])
+        individuals_dataframe[constants.sheets.Number_E164] = e164_numbers
+        individuals_dataframe[constants.sheets.Number_E164] = individuals_dataframe[
+            constants.sheets.Number_E164
+        ].astype(constants.dataframes.String)
+    invalid_numbers = []
+    for position, e164_number in enumerate(e164_numbers):
+        # a number that is not valid is missing, either as None or as NA
+        if not isinstance(e164_number, str):
+            phone_number = phone_numbers[position]
+            # the phone numbers in a normalized data frame, like a cached one,
+            # are not parsed again except to describe the ones that are not valid
+            if phone_number not in errors:
+                errors[phone_number] = get_number_error(phone_number)
+            invalid_numbers.append(
+                InvalidNumber(
+                    position, names[position], phone_number, errors[phone_number]
+                )
+            )
+    logger.debug(f"Found {len(invalid_numbers)} phone number(s) that are not valid")
+    return invalid_numbers
@@ -0,0 +1,162 @@
+"""Limit the rate of sending SMS messages and back off when Twilio throttles them."""
+
+import email.utils
+import random
+import threading
+import time
+
+from datetime import datetime
+from datetime import timezone
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from mesmsage import constants
+
+
+class TokenBucket:
+    """Define a thread-safe token bucket that adapts its rate to throttling."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Create a full bucket that refills at rate tokens per second."""
+        self.maximum_rate = rate
+        self.rate = rate
+        # by default, allow a burst of at most one second of messages
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def refill(self) -> None:
+        """Add the tokens that accumulated since the last refill; the lock must be held."""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> None:
+        """Take a token from the bucket, waiting until one is available."""
+        while True:
+            with self.lock:
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens = self.tokens - 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            # wait outside of the lock so that other threads can refill
+            self.sleep(wait)
+
+    def decrease(self) -> None:
+        """Halve the rate, down to a minimum, after being throttled."""
+        with self.lock:
+            self.refill()
+            self.rate = max(
+                self.maximum_rate * constants.rates.Minimum_Fraction, self.rate / 2
+            )
+            # drain the bucket so that a burst does not immediately follow throttling
+            self.tokens = min(self.tokens, 0.0)
+
+    def increase(self) -> None:
+        """Increase the rate, up to the maximum, after a successful send."""
+        with self.lock:
+            self.refill()
+            self.rate = min(
+                self.maximum_rate,
+                self.rate + self.maximum_rate * constants.rates.Increase_Fraction,
+            )
+
+
+class RateLimiter:
+    """Define the rate limit and the retry policy for sending from a phone number."""
+
+    def __init__(
+        self,
+        rate: float = None,
+        maximum_attempts: int = constants.rates.Maximum_Attempts,
+        base_delay: float = constants.rates.Base_Delay,
+        maximum_delay: float = constants.rates.Maximum_Delay,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random,
+    ) -> None:
+        """Create a rate limiter, without a token bucket if there is no rate."""
+        self.bucket = TokenBucket(rate, sleep=sleep) if rate else None
+        self.maximum_attempts = maximum_attempts
+        self.base_delay = base_delay
+        self.maximum_delay = maximum_delay
+        self.sleep = sleep
+        self.jitter = jitter
+
+    def acquire(self) -> None:
+        """Wait until the rate limit allows sending another message."""
+        if self.bucket is not None:
+            self.bucket.acquire()
+
+    def record_success(self) -> None:
+        """Record that a message was sent so that the rate can recover."""
+        if self.bucket is not None:
+            self.bucket.increase()
+
+    def should_retry(self, status: int, attempt: int) -> bool:
+        """Determine whether or not an attempt that failed with the status is retried."""
+        retryable = (
+            status == constants.rates.Too_Many_Requests
+            or status >= constants.rates.Server_Error
+        )
+        return retryable and attempt < self.maximum_attempts
+
+    def wait_to_retry(
+        self, status: int, attempt: int, retry_after: Optional[float] = None
+    ) -> float:
+        """Wait before retrying the attempt and then return the time waited."""
+        # slow down all of the senders that share this rate limiter
+        if status == constants.rates.Too_Many_Requests and self.bucket is not None:
+            self.bucket.decrease()
+        # the service said how long to wait and so honour that time;
+        # otherwise, use exponential backoff with "full jitter"
+        if retry_after is not None:
+            delay = min(retry_after, self.maximum_delay)
+        else:
+            delay = self.jitter() * min(
+                self.maximum_delay, self.base_delay * 2 ** (attempt - 1)
+            )
+        self.sleep(delay)
+        return delay
+
+
+def parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    """Parse the value of a Retry-After header as either seconds or an HTTP date."""
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_date - datetime.now(timezone.utc)).total_seconds())
+
+
+rate_limiters: Dict[Tuple[str, Optional[float]], RateLimiter] = {}
+rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(sender: str, rate: float = None) -> RateLimiter:
+    """Get the rate limiter for the phone number, creating it on first use."""
+    # every message sent from the same phone number shares one token bucket
+    # since Twilio limits the number of messages per second for each sender
+    with rate_limiters_lock:
+        if (sender, rate) not in rate_limiters:
+            rate_limiters[(sender, rate)] = RateLimiter(rate)
+        return rate_limiters[(sender, rate)]
@@ -0,0 +1,283 @@
+"""Index the individuals in a Pandas dataframe for fast lookups."""
+
+import copy
+import logging
+import sys
+import warnings
+
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy
+import pandas
+
+from mesmsage import constants
+
+
+class RosterIndex:
+    """Define a hash index over the rows of a data frame of individuals."""
+
+    def __init__(self, individuals_dataframe: pandas.DataFrame) -> None:
+        """Build the index with a single pass over the data frame."""
+        logger = logging.getLogger(constants.logging.Rich)
+        # store the contact information as arrays so that lookups for
+        # chosen individuals do not need to create new data frames;
+        # note that a missing name column raises a KeyError
+        self.names = individuals_dataframe[constants.sheets.Name].to_numpy()
+        self.numbers = None
+        if constants.sheets.Number in individuals_dataframe.columns:
+            self.numbers = get_phone_numbers(individuals_dataframe).to_numpy()
+        # create a dictionary that will store mappings of the form:
+        # <Name of a Person> --> <Row Positions of a Person>
+        # where an individual may appear in more than one row
+        self.name_positions: Dict[str, List[int]] = {}
+        for position, name in enumerate(self.names.tolist()):
+            self.name_positions.setdefault(name, []).append(position)
+        # every column that does not store contact information describes an
+        # activity and stores a "checkmark" (i.e., a True value) for each of
+        # the individuals who are going to work the shift for that activity
+        self.activity_positions = [
+            position
+            for position, column in enumerate(individuals_dataframe.columns)
+            if column
+            not in (
+                constants.sheets.Name,
+                constants.sheets.Number,
+                constants.sheets.Number_E164,
+            )
+        ]
+        # intern the headers of the activity columns so that every
+        # individual's list of activities shares the same strings
+        self.activity_columns = [
+            sys.intern(str(individuals_dataframe.columns[position]))
+            for position in self.activity_positions
+        ]
+        self.activity_headers = numpy.array(self.activity_columns, dtype=object)
+        # store the checkmarks in the compressed sparse row (CSR) format where
+        # the activities of the individual in row r are the column numbers in
+        # activity_indices[activity_indptr[r] : activity_indptr[r + 1]]
+        self.activity_indptr, self.activity_indices = create_sparse_activities(
+            individuals_dataframe, self.activity_positions
+        )
+        # the compressed sparse column (CSC) format, where the rows checked in
+        # column c are column_rows[column_indptr[c] : column_indptr[c + 1]],
+        # is only created when the activities are first restricted to columns
+        # so that an index that is never restricted does not store it
+        self.column_indptr: Optional[numpy.ndarray] = None
+        self.column_rows: Optional[numpy.ndarray] = None
+        logger.debug(
+            f"Indexed {len(self.names)} rows and {len(self.activity_columns)} activities"
+        )
+
+    def __len__(self) -> int:
+        """Return the number of rows in the index."""
+        return len(self.names)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the number of bytes in the arrays of the index."""
+        return sum(
+            array.nbytes
+            for array in (
+                self.names,
+                self.numbers,
+                self.activity_headers,
+                self.activity_indptr,
+                self.activity_indices,
+                self.column_indptr,
+                self.column_rows,
+            )
+            if array is not None
+        )
+
+    def get_columns(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Get the CSC arrays of the checkmarks, creating them from the CSR arrays the first time."""
+        if self.column_indptr is None or self.column_rows is None:
+            rows = numpy.repeat(
+                numpy.arange(len(self), dtype=numpy.int32),
+                numpy.diff(self.activity_indptr),
+            )
+            # group the (row, column) pairs by column; the stable sort keeps
+            # the rows of each column in the order of the spreadsheet
+            order = numpy.argsort(self.activity_indices, kind="stable")
+            self.column_rows = rows[order]
+            self.column_indptr = numpy.zeros(
+                len(self.activity_columns) + 1, dtype=numpy.int64
+            )
+            numpy.cumsum(
+                numpy.bincount(
+                    self.activity_indices, minlength=len(self.activity_columns)
+                ),
+                out=self.column_indptr[1:],
+            )
+        return self.column_indptr, self.column_rows
+
+    def get_positions(self, chosen_individuals_list: List[str]) -> numpy.ndarray:
+        """Get the sorted row positions of the chosen individuals."""
+        positions = [
+            position
+            for name in set(chosen_individuals_list)
+            for position in self.name_positions.get(name, [])
+        ]
+        # sort the positions so that the individuals are always
+        # considered in the order in which they appear in the sheet
+        return numpy.sort(numpy.array(positions, dtype=numpy.intp))
+
+    def get_name_mask(self, names: Iterable[str]) -> numpy.ndarray:
+        """Get the mask of the rows for the individuals with the provided names."""
+        return pandas.Series(self.names).isin(set(names)).to_numpy(dtype=bool)
+
+    def get_name_pattern_mask(self, name_pattern: str) -> numpy.ndarray:
+        """Get the mask of the rows for the individuals with names that match the pattern."""
+        return get_pattern_mask(self.names, name_pattern)
+
+    def get_shift_mask(self, shift_pattern: str) -> numpy.ndarray:
+        """Get the mask of the rows for the individuals checked in an activity that matches the pattern."""
+        # find the activity columns with headers that match the pattern
+        column_mask = get_pattern_mask(self.activity_columns, shift_pattern)
+        # mark each of the checkmarks in a matching column and then count the
+        # marked checkmarks in each row without expanding the sparse format
+        checked = column_mask[self.activity_indices]
+        rows = numpy.repeat(numpy.arange(len(self)), numpy.diff(self.activity_indptr))
+        return numpy.bincount(rows[checked], minlength=len(self)) > 0
+
+    def get_masked_names(self, mask: numpy.ndarray) -> List[str]:
+        """Get the names of the individuals in the masked rows in the order in which they first appear."""
+        return pandas.unique(self.names[mask]).tolist()
+
+    def select(
+        self,
+        names: Iterable[str] = None,
+        name_pattern: str = None,
+        shift_pattern: str = None,
+        scheduled: bool = False,
+    ) -> List[str]:
+        """Select the individuals who match all of the provided criteria without a prompt."""
+        logger = logging.getLogger(constants.logging.Rich)
+        mask = numpy.ones(len(self), dtype=bool)
+        # each criterion is a mask over all of the rows at once and an
+        # individual is selected when one of their rows is in every mask
+        if names is not None:
+            mask &= self.get_name_mask(names)
+        if name_pattern is not None:
+            mask &= self.get_name_pattern_mask(name_pattern)
+        if shift_pattern is not None:
+            mask &= self.get_shift_mask(shift_pattern)
+        # an individual is scheduled when they are checked in any activity
+        if scheduled:
+            mask &= numpy.diff(self.activity_indptr) > 0
+        logger.debug(f"Selected {numpy.count_nonzero(mask)} rows")
+        return self.get_masked_names(mask)
+
+    def get_activities(
+        self, positions: numpy.ndarray
+    ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Get the number of activities in each row and the concatenated activity columns."""
+        return gather_slices(self.activity_indptr, self.activity_indices, positions)
+
+    def restrict_activities(self, columns: numpy.ndarray) -> "RosterIndex":
+        """Create an index of the same individuals with only the activities in the sorted columns."""
+        logger = logging.getLogger(constants.logging.Rich)
+        # gather the rows checked in each of the columns from the CSC format so
+        # that only the checkmarks in the columns are ever considered
+        lengths, rows = gather_slices(*self.get_columns(), columns)
+        indices = numpy.repeat(columns.astype(numpy.int32), lengths)
+        # convert to the row-major order of the CSR format; the stable sort
+        # keeps each row's columns in the order of the spreadsheet
+        order = numpy.argsort(rows, kind="stable")
+        restricted_index = copy.copy(self)
+        restricted_index.activity_indices = indices[order]
+        restricted_index.activity_indptr = numpy.zeros(len(self) + 1, dtype=numpy.int64)
+        numpy.cumsum(
+            numpy.bincount(rows, minlength=len(self)),
+            out=restricted_index.activity_indptr[1:],
+        )
+        column_lengths = numpy.zeros(len(self.activity_columns), dtype=numpy.int64)
+        column_lengths[columns] = lengths
+        restricted_index.column_indptr = numpy.zeros(
+            len(self.activity_columns) + 1, dtype=numpy.int64
+        )
+        numpy.cumsum(column_lengths, out=restricted_index.column_indptr[1:])
+        restricted_index.column_rows = rows
+        logger.debug(
+            f"Restricted to {len(columns)} activities and {rows.size} checkmarks"
+        )
+        return restricted_index
+
+    def get_row_activities(self, positions: List[int]) -> List[str]:
+        """Get the descriptions of the activities in the rows at the provided positions."""
+        activities: List[str] = []
+        for position in positions:
+            row_columns = self.activity_indices[
+                self.activity_indptr[position] : self.activity_indptr[position + 1]
+            ]
+            activities.extend(self.activity_headers[row_columns].tolist())
+        return activities
+
+
+def get_phone_numbers(individuals_dataframe: pandas.DataFrame) -> pandas.Series:
+    """Get the phone number column, normalized if possible, of the data frame."""
+    # note that a missing phone number column raises a KeyError
+    numbers = individuals_dataframe[constants.sheets.Number]
+    # prefer the phone numbers that were normalized when the sheet was
+    # loaded, keeping a number that is not valid so that it is reported
+    # as an error when a message is sent to it
+    if constants.sheets.Number_E164 in individuals_dataframe.columns:
+        numbers = individuals_dataframe[constants.sheets.Number_E164].fillna(numbers)
+    return numbers
+
+
+def gather_slices(
+    indptr: numpy.ndarray, indices: numpy.ndarray, positions: numpy.ndarray
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Get the length of each of the slices at the positions and the concatenated slices."""
+    starts = indptr[positions]
+    lengths = indptr[positions + 1] - starts
+    # gather the slices of indices for all of the positions at once by
+    # computing, for every gathered entry, its offset within its own slice
+    slice_offsets = numpy.cumsum(lengths) - lengths
+    entry_offsets = numpy.arange(lengths.sum()) - numpy.repeat(slice_offsets, lengths)
+    return lengths, indices[numpy.repeat(starts, lengths) + entry_offsets]
+
+
+def get_pattern_mask(values: Iterable, pattern: str) -> numpy.ndarray:
+    """Get the mask of the values that contain a match for the regular expression."""
+    with warnings.catch_warnings():
+        # a pattern may have groups, like "(Monday|Tuesday)", that are never extracted
+        warnings.simplefilter("ignore", UserWarning)
+        return (
+            pandas.Series(values, dtype=constants.dataframes.String)
+            .str.contains(pattern, regex=True)
+            .to_numpy(dtype=bool, na_value=False)
+        )
+
+
+def create_sparse_activities(
+    individuals_dataframe: pandas.DataFrame, activity_positions: List[int]
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Create the CSR arrays for the checkmarks with a pass over each activity column."""
+    rows_count = len(individuals_dataframe)
+    # find the rows with a checkmark one column at a time so that a dense
+    # boolean matrix of every cell in the data frame is never created
+    column_rows = [
+        numpy.flatnonzero(
+            individuals_dataframe.iloc[:, position].eq(True).to_numpy(dtype=bool)
+        )
+        for position in activity_positions
+    ]
+    rows = numpy.concatenate(column_rows or [numpy.empty(0, dtype=numpy.intp)])
+    column_lengths = [len(checked_rows) for checked_rows in column_rows]
+    columns = numpy.repeat(
+        numpy.arange(len(activity_positions), dtype=numpy.int32), column_lengths
+    )
+    # convert from (row, column) pairs grouped by column to the row-major
+    # order of the CSR format; the stable sort keeps each row's columns in
+    # the order of the spreadsheet
+    order = numpy.argsort(rows, kind="stable")
+    indices = columns[order]
+    indptr = numpy.zeros(rows_count + 1, dtype=numpy.int64)
+    numpy.cumsum(numpy.bincount(rows, minlength=rows_count), out=indptr[1:])
+    return indptr, indices
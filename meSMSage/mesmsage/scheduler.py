@@ -0,0 +1,243 @@
+"""Schedule the reminders for the shifts in a roster that stays in memory between them."""
+
+import heapq
+import logging
+import threading
+
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import numpy
+
+from mesmsage import constants
+from mesmsage import journal
+from mesmsage import roster
+from mesmsage import shifts
+
+
+class Reminder(NamedTuple):
+    """Define a reminder that is due at a time for the shift in an activity column."""
+
+    due: datetime
+    start: datetime
+    header: str
+    column: int
+
+
+def get_reminder_time(
+    start: datetime, lead: timedelta, remind_at: time = None
+) -> datetime:
+    """Get the time at which to send the reminder for a shift that starts at the provided time."""
+    # a reminder at a time of day is sent on the day before the shift, like
+    # in the evening before it, and otherwise it is sent the lead before it
+    if remind_at is not None:
+        return datetime.combine(start.date() - timedelta(days=1), remind_at)
+    return start - lead
+
+
+def get_shift_key(reminder: Reminder) -> str:
+    """Get the key that identifies the shift of the reminder in the journal."""
+    return f"{reminder.start.isoformat()} {reminder.header}"
+
+
+def get_run_id(reminders: List[Reminder]) -> str:
+    """Get the identifier of the run that sends the reminders, which is the same every time they are sent."""
+    # the identifier depends only on the shifts, and not on when they are
+    # due, and so a run that is retried resumes from the journal; note that
+    # a restart may group the shifts in another way and so the journal also
+    # records the shifts that each individual was reminded of
+    shifts_key = constants.markers.Newline.join(
+        sorted(get_shift_key(reminder) for reminder in reminders)
+    )
+    return constants.markers.Separator.join(
+        [
+            constants.scheduler.Run_Prefix,
+            min(reminder.start for reminder in reminders).strftime(
+                constants.journal.Run_Format
+            ),
+            journal.get_body_hash(shifts_key),
+        ]
+    )
+
+
+class ReminderScheduler:
+    """Define a scheduler that keeps the roster in memory and sends each reminder when it is due."""
+
+    def __init__(
+        self,
+        fetch_roster: Callable[[], Optional[roster.RosterIndex]],
+        send_reminders: Callable[[roster.RosterIndex, List[Reminder]], int],
+        lead: timedelta,
+        remind_at: time = None,
+        refresh_interval: timedelta = timedelta(
+            seconds=constants.scheduler.Refresh_Interval
+        ),
+        retry_delay: timedelta = timedelta(seconds=constants.scheduler.Retry_Delay),
+        maximum_retry_delay: timedelta = timedelta(
+            seconds=constants.scheduler.Maximum_Retry_Delay
+        ),
+    ) -> None:
+        """Prepare the scheduler that fetches the roster and sends the reminders with the functions."""
+        # the roster is fetched again only when it changed, returning None
+        # otherwise, and the reminders are sent by a function that returns
+        # the number of messages that it could not send
+        self.fetch_roster = fetch_roster
+        self.send_reminders = send_reminders
+        self.lead = lead
+        self.remind_at = remind_at
+        self.refresh_interval = refresh_interval
+        self.retry_delay = retry_delay
+        self.maximum_retry_delay = maximum_retry_delay
+        self.roster_index: Optional[roster.RosterIndex] = None
+        # a heap of the reminders ordered by the time at which they are due
+        # so that the next reminder is always found in constant time
+        self.reminders: List[Reminder] = []
+        # the shifts, as (<Header>, <Start>), for which a reminder was sent
+        self.fired: Set[Tuple[str, datetime]] = set()
+        # the shifts for which sending a reminder failed, mapped to the number
+        # of failed attempts and the time at which the reminder is due again
+        self.retries: Dict[Tuple[str, datetime], Tuple[int, datetime]] = {}
+        self.next_refresh: Optional[datetime] = None
+        self.stopping = threading.Event()
+
+    def schedule(self, now: datetime) -> None:
+        """Create the heap of reminders for the shifts in the roster that have not started."""
+        logger = logging.getLogger(constants.logging.Rich)
+        if self.roster_index is None:
+            return
+        activity_columns = self.roster_index.activity_columns
+        shift_index = shifts.ShiftIndex(activity_columns, now)
+        reminders = []
+        for start, column in zip(
+            shift_index.starts.tolist(), shift_index.columns.tolist()
+        ):
+            header = activity_columns[column]
+            if start <= now or (header, start) in self.fired:
+                continue
+            due = get_reminder_time(start, self.lead, self.remind_at)
+            # a reminder that is waiting to be retried keeps its backoff
+            if (header, start) in self.retries:
+                _, due = self.retries[(header, start)]
+            reminders.append(Reminder(due, start, header, column))
+        heapq.heapify(reminders)
+        self.reminders = reminders
+        logger.debug(
+            f"Scheduled {len(reminders)} reminder(s) and skipped"
+            f" {shift_index.unscheduled} activity(s) without a date"
+        )
+
+    def refresh(self, now: datetime) -> bool:
+        """Fetch the roster, if it changed, and then schedule the reminders for it again."""
+        self.next_refresh = now + self.refresh_interval
+        roster_index = self.fetch_roster()
+        if roster_index is None:
+            return False
+        # every reminder restricts the roster to its columns and so the CSC
+        # arrays are created now instead of when the first reminder is due
+        roster_index.get_columns()
+        self.roster_index = roster_index
+        self.schedule(now)
+        return True
+
+    def pop_due(self, now: datetime) -> List[Reminder]:
+        """Remove the reminders that are due from the heap and return the ones still worth sending."""
+        logger = logging.getLogger(constants.logging.Rich)
+        due_reminders = []
+        while self.reminders and self.reminders[constants.sizes.First].due <= now:
+            reminder = heapq.heappop(self.reminders)
+            # a reminder that became due while the scheduler was not running is
+            # still sent, unless the shift started, since it is late but useful
+            if reminder.start <= now:
+                logger.debug(f"Skipping reminder for started shift {reminder.header}")
+                self.retries.pop((reminder.header, reminder.start), None)
+                continue
+            due_reminders.append(reminder)
+        return due_reminders
+
+    def run_pending(self, now: datetime) -> int:
+        """Send the reminders that are due, all in one run, and return how many there were."""
+        logger = logging.getLogger(constants.logging.Rich)
+        reminders = self.pop_due(now)
+        if not reminders or self.roster_index is None:
+            return 0
+        # every individual receives one message for all of their shifts in
+        # the reminders that are due at the same time, like all of the shifts
+        # on the next day, with only the columns for those shifts considered
+        columns = numpy.array(
+            sorted(reminder.column for reminder in reminders), dtype=numpy.int32
+        )
+        # a failure does not stop the scheduler; instead, the reminders are
+        # only marked as sent once every one of their messages was sent
+        try:
+            unsent_count = self.send_reminders(
+                self.roster_index.restrict_activities(columns), reminders
+            )
+        except Exception as e:
+            logger.error(
+                f"Could not send the reminders in run {get_run_id(reminders)}: {e}"
+            )
+            unsent_count = None
+        if unsent_count == 0:
+            for reminder in reminders:
+                self.fired.add((reminder.header, reminder.start))
+                self.retries.pop((reminder.header, reminder.start), None)
+        else:
+            self.retry(reminders, now)
+        return len(reminders)
+
+    def retry(self, reminders: List[Reminder], now: datetime) -> None:
+        """Schedule the reminders again after a delay that doubles with each failed attempt."""
+        logger = logging.getLogger(constants.logging.Rich)
+        # the reminders that failed together are retried together so that the
+        # retry resumes the same run and only sends the messages that failed
+        attempts = 1 + max(
+            self.retries.get((reminder.header, reminder.start), (0, now))[0]
+            for reminder in reminders
+        )
+        delay = min(self.retry_delay * 2 ** (attempts - 1), self.maximum_retry_delay)
+        for reminder in reminders:
+            self.retries[(reminder.header, reminder.start)] = (attempts, now + delay)
+            heapq.heappush(self.reminders, reminder._replace(due=now + delay))
+        logger.debug(f"Retrying {len(reminders)} reminder(s) in {delay}")
+
+    def get_wait(self, now: datetime) -> float:
+        """Get the seconds until the next reminder is due or the roster is refreshed."""
+        wakeups = [
+            wakeup
+            for wakeup in (
+                self.next_refresh,
+                self.reminders[constants.sizes.First].due if self.reminders else None,
+            )
+            if wakeup is not None
+        ]
+        if not wakeups:
+            return self.refresh_interval.total_seconds()
+        return max((min(wakeups) - now).total_seconds(), 0)
+
+    def serve(self, clock: Callable[[], datetime] = datetime.now) -> None:
+        """Refresh the roster and send the reminders until the scheduler is stopped."""
+        logger = logging.getLogger(constants.logging.Rich)
+        while not self.stopping.is_set():
+            now = clock()
+            if self.next_refresh is None or now >= self.next_refresh:
+                # a roster that cannot be fetched, like when the network is
+                # down, is tried again later with the previous roster in use
+                try:
+                    self.refresh(now)
+                except Exception as e:
+                    logger.error(f"Could not refresh the roster: {e}")
+            self.run_pending(now)
+            # sleep until there is something to do or the scheduler is stopped
+            self.stopping.wait(self.get_wait(clock()))
+
+    def stop(self) -> None:
+        """Stop the scheduler after it finishes what it is doing."""
+        self.stopping.set()
@@ -0,0 +1,126 @@
+"""Search the names of individuals with an index that is built once from the roster."""
+
+import bisect
+import logging
+
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Tuple
+
+from mesmsage import constants
+
+
+def get_trigrams(text: str) -> Set[str]:
+    """Get the distinct sequences of three characters in the text."""
+    return {
+        text[start : start + constants.sizes.Trigram]
+        for start in range(len(text) - constants.sizes.Trigram + 1)
+    }
+
+
+def get_search_terms(query: str) -> List[str]:
+    """Get the terms of the query, each of which must match a name."""
+    return query.lower().split()
+
+
+class NameIndex:
+    """Define a trigram and prefix index over a list of names."""
+
+    def __init__(self, names: List[str]) -> None:
+        """Build the index with a single pass over the names."""
+        logger = logging.getLogger(constants.logging.Rich)
+        self.names = names
+        self.lowered_names = [str(name).lower() for name in names]
+        # create a dictionary that will store mappings of the form:
+        # <Three Characters> --> <Positions of the Names that Contain Them>
+        # so that a term is only compared to the names that have all of its
+        # trigrams instead of to every name in the roster
+        self.trigram_positions: Dict[str, Set[int]] = {}
+        # create a sorted list of (<Word in a Name>, <Position of the Name>)
+        # so that a term that is too short to have a trigram is found by a
+        # binary search for the words that start with it
+        words: List[Tuple[str, int]] = []
+        for position, lowered_name in enumerate(self.lowered_names):
+            for trigram in get_trigrams(lowered_name):
+                self.trigram_positions.setdefault(trigram, set()).add(position)
+            words.extend((word, position) for word in set(lowered_name.split()))
+        words.sort()
+        self.words = words
+        logger.debug(
+            f"Indexed {len(names)} names with {len(self.trigram_positions)} trigrams"
+        )
+
+    def get_prefix_positions(self, term: str) -> Set[int]:
+        """Get the positions of the names with a word that starts with the term."""
+        positions: Set[int] = set()
+        for index in range(bisect.bisect_left(self.words, (term,)), len(self.words)):
+            word, position = self.words[index]
+            if not word.startswith(term):
+                break
+            positions.add(position)
+        return positions
+
+    def matches_term(self, position: int, term: str) -> bool:
+        """Determine whether or not the name matches the term."""
+        lowered_name = self.lowered_names[position]
+        if len(term) < constants.sizes.Trigram:
+            return any(word.startswith(term) for word in lowered_name.split())
+        return term in lowered_name
+
+    def get_term_positions(self, term: str) -> Set[int]:
+        """Get the positions of the names that match the term."""
+        if len(term) < constants.sizes.Trigram:
+            return self.get_prefix_positions(term)
+        # a name that contains the term contains every trigram of the term and
+        # so the candidates are in the smallest of the sets of positions
+        trigram_positions = sorted(
+            (
+                self.trigram_positions.get(trigram, set())
+                for trigram in get_trigrams(term)
+            ),
+            key=len,
+        )
+        candidates = trigram_positions[constants.sizes.First].intersection(
+            *trigram_positions[1:]
+        )
+        # a name with all of the trigrams may still have them in another order
+        return {
+            position for position in candidates if term in self.lowered_names[position]
+        }
+
+    def search(self, query: str) -> List[int]:
+        """Get the positions of the names that match every term of the query, best matches first."""
+        terms = get_search_terms(query)
+        if not terms:
+            return list(range(len(self.names)))
+        # find the positions for the longest, and thus most selective, term with
+        # the index and then only check the names that it matched for the other
+        # terms so that the work is bounded by the matches instead of the roster
+        terms = sorted(terms, key=len, reverse=True)
+        positions = self.get_term_positions(terms[constants.sizes.First])
+        for term in terms[1:]:
+            positions = {
+                position for position in positions if self.matches_term(position, term)
+            }
+        # the names that start with the first term of the query are listed
+        # before the others and otherwise the names are in the order in which
+        # they appear in the roster
+        first_term = get_search_terms(query)[constants.sizes.First]
+        return sorted(
+            positions,
+            key=lambda position: (
+                not self.lowered_names[position].startswith(first_term),
+                position,
+            ),
+        )
+
+    def get_match_indices(self, position: int, query: str) -> List[int]:
+        """Get the indices of the characters in the name that match the terms of the query."""
+        lowered_name = self.lowered_names[position]
+        indices: Set[int] = set()
+        for term in get_search_terms(query):
+            start = lowered_name.find(term)
+            if start >= 0:
+                indices.update(range(start, start + len(term)))
+        return sorted(indices)
@@ -0,0 +1,254 @@
+"""Count and reduce the segments that Twilio uses to send and bill each SMS message."""
+
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Tuple
+
+from mesmsage import constants
+
+# the characters of the GSM-7 basic character set, each of which is one septet
+GSM7_BASIC_CHARACTERS = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+
+# the characters of the GSM-7 extension table, each of which is an escape
+# septet followed by another septet and is thus two septets long
+GSM7_EXTENSION_CHARACTERS = frozenset("\f^{}\\[~]|€")
+
+GSM7_CHARACTERS = GSM7_BASIC_CHARACTERS | GSM7_EXTENSION_CHARACTERS
+
+# the characters that are commonly typed, or inserted by word processors,
+# but are not in GSM-7 and their closest equivalents that are in GSM-7
+GSM7_REPLACEMENTS: Dict[str, str] = {
+    # spaces
+    "\t": " ",
+    "\u00a0": " ",
+    "\u2002": " ",
+    "\u2003": " ",
+    "\u2009": " ",
+    "\u202f": " ",
+    # hyphens and dashes
+    "\u2010": "-",
+    "\u2011": "-",
+    "\u2012": "-",
+    "\u2013": "-",
+    "\u2014": "-",
+    "\u2015": "-",
+    "\u2212": "-",
+    # single quotes and apostrophes
+    "\u00b4": "'",
+    "\u02bc": "'",
+    "\u2018": "'",
+    "\u2019": "'",
+    "\u201a": "'",
+    "\u201b": "'",
+    "\u2032": "'",
+    "\u2039": "<",
+    "\u203a": ">",
+    # double quotes
+    "\u00ab": '"',
+    "\u00bb": '"',
+    "\u201c": '"',
+    "\u201d": '"',
+    "\u201e": '"',
+    "\u201f": '"',
+    "\u2033": '"',
+    # other punctuation
+    "\u02c6": "^",
+    "\u02dc": "~",
+    "\u2022": "*",
+    "\u2026": "...",
+    # accented letters that are not in GSM-7
+    "\u00e1": "a",
+    "\u00e2": "a",
+    "\u00e3": "a",
+    "\u00e7": "c",
+    "\u00ea": "e",
+    "\u00eb": "e",
+    "\u00ed": "i",
+    "\u00ee": "i",
+    "\u00ef": "i",
+    "\u00f3": "o",
+    "\u00f4": "o",
+    "\u00f5": "o",
+    "\u00fa": "u",
+    "\u00fb": "u",
+}
+
+# compile the replacements into a translation table so that a message
+# is optimized with a single call to str.translate implemented in C
+GSM7_TRANSLATION = str.maketrans(GSM7_REPLACEMENTS)
+
+
+class SegmentBudgetError(Exception):
+    """Define error to indicate that a message has more segments than its budget."""
+
+    pass
+
+
+class SegmentReport(NamedTuple):
+    """Define the number of segments for a batch of messages before and after optimizing them."""
+
+    messages: int
+    segments_before: int
+    segments_after: int
+    ucs2_before: int
+    ucs2_after: int
+
+
+def is_gsm7(message: str) -> bool:
+    """Determine whether or not the message can be encoded with GSM-7."""
+    return GSM7_CHARACTERS.issuperset(message)
+
+
+def get_gsm7_units(message: str) -> List[int]:
+    """Get the number of septets that encode each of the characters in a GSM-7 message."""
+    return [
+        (
+            constants.segments.Extension_Units
+            if character in GSM7_EXTENSION_CHARACTERS
+            else constants.segments.Single_Unit
+        )
+        for character in message
+    ]
+
+
+def get_ucs2_units(message: str) -> List[int]:
+    """Get the number of UTF-16 code units that encode each of the characters in a UCS-2 message."""
+    # a character outside of the basic multilingual plane, like most emoji,
+    # is encoded as a surrogate pair of two code units
+    return [
+        (
+            constants.segments.Surrogate_Units
+            if ord(character) > constants.segments.Maximum_Basic_Character
+            else constants.segments.Single_Unit
+        )
+        for character in message
+    ]
+
+
+def count_units_segments(units: List[int], single_size: int, multiple_size: int) -> int:
+    """Count the segments for characters of the provided sizes and segment sizes."""
+    if sum(units) <= single_size:
+        return constants.sizes.Singleton
+    # a message in more than one segment loses space in each segment to
+    # the header that joins them and a character is never split between
+    # two segments, so fill each of the segments one character at a time
+    segments_count = constants.sizes.Singleton
+    segment_size = 0
+    for unit in units:
+        if segment_size + unit > multiple_size:
+            segments_count = segments_count + 1
+            segment_size = 0
+        segment_size = segment_size + unit
+    return segments_count
+
+
+def count_length_segments(length: int, single_size: int, multiple_size: int) -> int:
+    """Count the segments for characters of one unit each and the segment sizes."""
+    if length <= single_size:
+        return constants.sizes.Singleton
+    return -(-length // multiple_size)
+
+
+def count_segments(message: str) -> int:
+    """Count the segments that Twilio uses to send the message."""
+    if is_gsm7(message):
+        # most messages only have characters that are each one septet
+        if GSM7_EXTENSION_CHARACTERS.isdisjoint(message):
+            return count_length_segments(
+                len(message),
+                constants.segments.Gsm7_Single,
+                constants.segments.Gsm7_Multiple,
+            )
+        return count_units_segments(
+            get_gsm7_units(message),
+            constants.segments.Gsm7_Single,
+            constants.segments.Gsm7_Multiple,
+        )
+    # a single character that is not in GSM-7 means that the entire
+    # message is encoded with UCS-2, fitting fewer characters per segment
+    if max(message) <= chr(constants.segments.Maximum_Basic_Character):
+        return count_length_segments(
+            len(message),
+            constants.segments.Ucs2_Single,
+            constants.segments.Ucs2_Multiple,
+        )
+    return count_units_segments(
+        get_ucs2_units(message),
+        constants.segments.Ucs2_Single,
+        constants.segments.Ucs2_Multiple,
+    )
+
+
+def optimize_message(message: str) -> str:
+    """Replace the characters that are not in GSM-7 with equivalents that are in GSM-7."""
+    optimized_message = message.translate(GSM7_TRANSLATION)
+    # only use the replacements if they make the entire message GSM-7 since
+    # otherwise the message is UCS-2 anyway and the original characters fit
+    if is_gsm7(optimized_message):
+        return optimized_message
+    return message
+
+
+def check_segment_budget(
+    phone_number: str, message: str, segment_budget: int = None
+) -> int:
+    """Count the segments of the message and ensure that it is within the budget."""
+    segments_count = count_segments(message)
+    if segment_budget is not None and segments_count > segment_budget:
+        raise SegmentBudgetError(
+            f"The SMS to {phone_number} has {segments_count} segments"
+            f" but the budget is {segment_budget} segment(s): {message}"
+        )
+    return segments_count
+
+
+def optimize_sms_messages(
+    sms_messages: List[Tuple[str, str]],
+    replace: bool = False,
+    segment_budget: int = None,
+) -> Tuple[List[Tuple[str, str]], SegmentReport]:
+    """Optimize all of the messages, ensure that each one is within the budget, and report their segments."""
+    segments_before = 0
+    segments_after = 0
+    ucs2_before = 0
+    ucs2_after = 0
+    optimized_messages: List[Tuple[str, str]] = []
+    # note that every message is checked so that all of the messages
+    # are known to be within the budget before any message is sent
+    for phone_number, message in sms_messages:
+        segments_before = segments_before + count_segments(message)
+        ucs2_before = ucs2_before + (not is_gsm7(message))
+        if replace:
+            message = optimize_message(message)
+        segments_after = segments_after + check_segment_budget(
+            phone_number, message, segment_budget
+        )
+        ucs2_after = ucs2_after + (not is_gsm7(message))
+        optimized_messages.append((phone_number, message))
+    report = SegmentReport(
+        len(optimized_messages),
+        segments_before,
+        segments_after,
+        ucs2_before,
+        ucs2_after,
+    )
+    return optimized_messages, report
+
+
+def generate_optimized_messages(
+    sms_messages: Iterable[Tuple[str, str]],
+    replace: bool = False,
+    segment_budget: int = None,
+) -> Iterator[Tuple[str, str]]:
+    """Optimize each message and ensure that it is within the budget as it is produced."""
+    for phone_number, message in sms_messages:
+        if replace:
+            message = optimize_message(message)
+        check_segment_budget(phone_number, message, segment_budget)
+        yield phone_number, message
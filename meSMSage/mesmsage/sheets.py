@@ -1,13 +1,39 @@
 """Connect to a Google Sheet using gspread to access sheets at data frames."""
 
+import logging
+import re
+
+from typing import Any
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+import numpy
 import pandas
 
+from googleapiclient import errors  # type: ignore
 from sheetfu import model  # type: ignore
 from sheetfu import SpreadsheetApp
 
 from mesmsage import configure
 from mesmsage import constants
 
+# map the text of a checkbox cell to a boolean; note that the booleans are not
+# in the map since the integers 1 and 0 are equal to True and False
+CHECKBOX_VALUES = {
+    constants.sheets.Checked: True,
+    constants.sheets.Unchecked: False,
+}
+
+# a checkbox cell that is not text is a Python boolean or a numpy boolean
+BOOLEAN_TYPES = (bool, numpy.bool_)
+
+CHECKBOX_TYPES = BOOLEAN_TYPES + (str,)
+
+# the name of a sheet at the start of a range in A1 notation, which is either
+# quoted, with any quote in the name doubled, or is a name without a quote
+SHEET_PREFIX = re.compile(r"^(?:'(?:[^']|'')*'|[^'!]+)!")
+
 
 class SheetNotFoundError(Exception):
     """Define error to indicate that there is no sheet available."""
@@ -34,13 +60,252 @@ def connect_to_sheet(
     return sheet
 
 
-def extract_dataframe(sheet: model.Sheet) -> pandas.DataFrame:
+def get_revision(sheet: model.Sheet) -> Optional[str]:
+    """Get the revision of the spreadsheet that contains the sheet, if it is available."""
+    logger = logging.getLogger(constants.logging.Rich)
+    # ask Google Drive for the version of the spreadsheet, which increases
+    # whenever the spreadsheet changes; this is a single small request that
+    # avoids downloading all of the data in the sheet to see if it changed
+    try:
+        spreadsheet_file = (
+            sheet.client.drive_service.files()
+            .get(
+                fileId=sheet.spreadsheet.id,
+                fields=constants.sheets.Revision_Fields,
+            )
+            .execute()
+        )
+    # the service account may not be able to use Google Drive and thus
+    # the revision is not known, meaning that the sheet must be downloaded
+    except errors.HttpError as e:
+        logger.debug(f"Could not get the revision of the spreadsheet: {e}")
+        return None
+    revision = spreadsheet_file.get(constants.sheets.Revision_Fields)
+    logger.debug(f"Revision of the spreadsheet: {revision}")
+    return revision
+
+
+def get_cell_text(value: Any) -> Any:
+    """Get the text of a cell, without a fraction for a whole number stored as a float."""
+    # a phone number stored as a number may be read as a float like 8145550000.0
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value
+
+
+def get_checkbox_value(value: Any) -> Optional[bool]:
+    """Get the boolean for the value of a checkbox cell, or None if it is not one."""
+    if isinstance(value, BOOLEAN_TYPES):
+        return bool(value)
+    return CHECKBOX_VALUES.get(value)
+
+
+def create_typed_column(header: str, column: Sequence) -> pandas.Series:
+    """Create a column with a compact dtype for the values in a column of the sheet."""
+    column_series = pandas.Series(column, dtype=object)
+    # the names and the phone numbers of the individuals are always strings,
+    # even if the sheet stores a phone number as a number
+    if header in (constants.sheets.Name, constants.sheets.Number):
+        return column_series.map(get_cell_text).astype(constants.dataframes.String)
+    # the values of a sheet leave out the empty cells at the end of a row or a
+    # column and so these blank cells are padded; they are unchecked when the
+    # other cells of the column are checkboxes, but a blank column is not one
+    blank_cells = column_series.isna() | column_series.eq(constants.markers.Nothing)
+    if blank_cells.all():
+        return column_series
+    filled_series = column_series[~blank_cells]
+    # a checkbox cell is either a boolean or the text of a boolean and thus a
+    # column is a checkbox column when every one of its cells is one of them;
+    # note that a column of the numbers 1 and 0 is not a checkbox column
+    if not filled_series.map(type).isin(CHECKBOX_TYPES).all():
+        return column_series
+    checkbox_series = column_series.map(get_checkbox_value)
+    if not checkbox_series[~blank_cells].isna().any():
+        return checkbox_series.where(~blank_cells, False).astype(bool)
+    return column_series
+
+
+def create_dataframe_from_columns(
+    headers: List[str], columns: Sequence[Sequence[Any]]
+) -> pandas.DataFrame:
+    """Create a Pandas DataFrame from the headers and the values in each column of a sheet."""
+    logger = logging.getLogger(constants.logging.Rich)
+    # create the columns by their position since the headers may not be unique
+    extracted_dataframe = pandas.DataFrame(
+        {
+            position: create_typed_column(header, column)
+            for position, (header, column) in enumerate(zip(headers, columns))
+        }
+    )
+    extracted_dataframe.columns = headers
+    logger.debug(extracted_dataframe.dtypes)
+    logger.debug(
+        f"Memory usage: {extracted_dataframe.memory_usage(deep=True).sum()} bytes"
+    )
+    return extracted_dataframe
+
+
+def create_dataframe(values: List[List]) -> pandas.DataFrame:
+    """Create a Pandas DataFrame from the values of a sheet with the headers in the first row."""
+    rows = iter(values)
+    headers = next(rows)
+    # transpose the remaining rows into columns without first
+    # creating a copy of the list of rows without the headers
+    columns = list(zip(*rows)) or [() for _ in headers]
+    return create_dataframe_from_columns(headers, columns)
+
+
+def get_column_letters(position: int) -> str:
+    """Get the letters of the column at the zero-based position in A1 notation."""
+    letters = constants.markers.Nothing
+    # convert the position to the "bijective base-26" numbering of the
+    # columns in a spreadsheet where A is the first and AA is the 27th column
+    position = position + 1
+    while position > 0:
+        position, remainder = divmod(position - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def select_columns(
+    headers: List[str], columns: List[str] = None, header_pattern: str = None
+) -> List[int]:
+    """Select the positions of the name, phone number, and requested activity columns."""
+    compiled_header_pattern = None
+    if header_pattern is not None:
+        compiled_header_pattern = re.compile(header_pattern)
+    requested_columns = set(columns or [])
+    return [
+        position
+        for position, header in enumerate(headers)
+        if header in (constants.sheets.Name, constants.sheets.Number)
+        or header in requested_columns
+        or (
+            compiled_header_pattern is not None
+            and compiled_header_pattern.search(str(header)) is not None
+        )
+    ]
+
+
+def quote_sheet_name(sheet_name: str) -> str:
+    """Quote the name of the sheet for A1 notation, doubling any quote in the name."""
+    quote = constants.sheets.Quote
+    return quote + sheet_name.replace(quote, quote + quote) + quote
+
+
+def get_sheet_a1_range(sheet_name: str, a1_range: str) -> str:
+    """Get the A1 notation for the range in the sheet, unless the range names a sheet."""
+    # a range like 'Shifts'!A1:C3 or Shifts!A1:C3 is already in a sheet
+    if SHEET_PREFIX.match(a1_range):
+        return a1_range
+    return quote_sheet_name(sheet_name) + constants.sheets.Sheet_Separator + a1_range
+
+
+def create_a1_ranges(sheet_name: str, positions: List[int]) -> List[str]:
+    """Create the A1 notation for the complete columns at the sorted positions."""
+    a1_ranges = []
+    # group the positions into runs of adjacent columns so that each
+    # run of columns is requested with a single range like 'Sheet1'!C:F
+    run_start = None
+    for index, position in enumerate(positions):
+        if run_start is None:
+            run_start = position
+        if index + 1 == len(positions) or positions[index + 1] != position + 1:
+            a1_ranges.append(
+                get_sheet_a1_range(
+                    sheet_name,
+                    f"{get_column_letters(run_start)}:{get_column_letters(position)}",
+                )
+            )
+            run_start = None
+    return a1_ranges
+
+
+def get_values_batch(
+    sheet: model.Sheet, a1_ranges: List[str], major_dimension: str
+) -> List[List]:
+    """Get the formatted values in each of the A1 ranges of the sheet with one request."""
+    value_ranges = (
+        sheet.client.sheet_service.spreadsheets()
+        .values()
+        .batchGet(
+            spreadsheetId=sheet.spreadsheet.id,
+            ranges=a1_ranges,
+            majorDimension=major_dimension,
+            # read the cells as they are displayed so that a phone number
+            # is text, with its formatting, and a checkbox is TRUE or FALSE
+            valueRenderOption=constants.sheets.Formatted_Value,
+        )
+        .execute()
+    )
+    return [
+        value_range.get(constants.sheets.Values, [])
+        for value_range in value_ranges.get(constants.sheets.Value_Ranges, [])
+    ]
+
+
+def extract_projected_dataframe(
+    sheet: model.Sheet,
+    columns: List[str] = None,
+    header_pattern: str = None,
+    a1_range: str = None,
+) -> pandas.DataFrame:
+    """Extract a Pandas DataFrame with only the requested range or columns of the sheet."""
+    logger = logging.getLogger(constants.logging.Rich)
+    # the range was explicitly given and thus the headers are in its first row
+    if a1_range is not None:
+        (values,) = get_values_batch(
+            sheet, [get_sheet_a1_range(sheet.name, a1_range)], constants.sheets.Rows
+        )
+        if not values:
+            raise SheetNotFoundError
+        # pad the rows since the values leave out the empty cells at the end of a row
+        width = max(len(row) for row in values)
+        return create_dataframe(
+            [row + [constants.markers.Nothing] * (width - len(row)) for row in values]
+        )
+    # download the row of headers and then only the columns with the
+    # contact information and with the requested activities
+    (header_values,) = get_values_batch(
+        sheet,
+        [get_sheet_a1_range(sheet.name, constants.sheets.Header_Row)],
+        constants.sheets.Rows,
+    )
+    if not header_values:
+        raise SheetNotFoundError
+    headers = header_values[constants.sizes.First]
+    positions = select_columns(headers, columns, header_pattern)
+    a1_ranges = create_a1_ranges(sheet.name, positions)
+    logger.debug(f"Downloading the ranges {a1_ranges}")
+    column_values = [
+        column
+        for range_values in get_values_batch(sheet, a1_ranges, constants.sheets.Columns)
+        for column in range_values
+    ]
+    # pad the columns since the values leave out the empty cells at the end of a
+    # column; note that the first value in each of the columns is its header
+    height = max((len(column) for column in column_values), default=0)
+    return create_dataframe_from_columns(
+        [headers[position] for position in positions],
+        [
+            column[1:] + [constants.markers.Nothing] * (height - len(column))
+            for column in column_values
+        ],
+    )
+
+
+def extract_dataframe(
+    sheet: model.Sheet,
+    columns: List[str] = None,
+    header_pattern: str = None,
+    a1_range: str = None,
+) -> pandas.DataFrame:
     """Extract a Pandas DataFrame from the sheet in sheetfu's internal format."""
     if sheet is not None:
+        # only download part of the sheet when a part of it was requested
+        if columns or header_pattern is not None or a1_range is not None:
+            return extract_projected_dataframe(sheet, columns, header_pattern, a1_range)
         data_range = sheet.get_data_range()
         values = data_range.get_values()
-        extracted_dataframe = pandas.DataFrame(
-            values[1 : len(values)], columns=values[0]
-        )
-        return extracted_dataframe
+        return create_dataframe(values)
     raise SheetNotFoundError
@@ -0,0 +1,225 @@
+"""Parse the start of each shift from the headers of the activity columns and index them by time."""
+
+import re
+
+from datetime import datetime
+from datetime import timedelta
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy
+
+from mesmsage import constants
+
+# the names of the months, which are found from the first letters of a name
+MONTHS: Dict[str, int] = {
+    "jan": 1,
+    "feb": 2,
+    "mar": 3,
+    "apr": 4,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "oct": 10,
+    "nov": 11,
+    "dec": 12,
+}
+
+# a date like "2021-05-03"
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+
+# a date like "5/3" or "5/3/2021" with the month first
+NUMERIC_DATE = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?\b")
+
+# the text before a date like "5/3" without a year that shows it is a date
+# and not a fraction like the one in "Set up 1/2 day": the start of the
+# header, a separator, or the name of a day of the week
+BARE_DATE_PREFIX = re.compile(
+    r"(?:^|[-\u2013:,(|@]|\b(?:mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?"
+    r"|thu(?:r(?:s(?:day)?)?)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)\.?)\s*$",
+    re.IGNORECASE,
+)
+
+# a date like "May 3", "May 3rd", or "Sept. 3, 2021" with the full name of
+# the month or one of its abbreviations, so that a word like "Decorations"
+# followed by a number is not a date
+NAMED_DATE = re.compile(
+    r"\b(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?"
+    r"|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+    r"\s+(\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s+(\d{4})\b)?",
+    re.IGNORECASE,
+)
+
+# a time like "5pm", "5:30 PM", "5:30 p.m.", or "17:30"; note that the first
+# time in a header like "5:00 PM - 7:00 PM" is the start of the shift
+TIME = re.compile(
+    r"\b(\d{1,2})(?::(\d{2}))?\s*([ap])\.?m\b\.?|\b(\d{1,2}):(\d{2})\b",
+    re.IGNORECASE,
+)
+
+# a range of times like "5-7pm" where only the end of the range has a meridiem
+TIME_RANGE = re.compile(
+    r"\b(\d{1,2})(?::(\d{2}))?\s*(?:-|\u2013|to)\s*(\d{1,2})(?::\d{2})?\s*([ap])\.?m\b",
+    re.IGNORECASE,
+)
+
+NOON = re.compile(r"\bnoon\b", re.IGNORECASE)
+
+# the units of a window like "24h" and the length of one of each unit
+WINDOW = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([mhdw])\s*$", re.IGNORECASE)
+
+WINDOW_UNITS: Dict[str, timedelta] = {
+    "m": timedelta(minutes=1),
+    "h": timedelta(hours=1),
+    "d": timedelta(days=1),
+    "w": timedelta(weeks=1),
+}
+
+
+class ShiftWindowError(Exception):
+    """Define error to indicate that a window of time is not in a supported format."""
+
+    pass
+
+
+def parse_window(window: str) -> timedelta:
+    """Parse a window of time like "90m", "24h", "2d", or "1w"."""
+    match = WINDOW.match(window)
+    if match is None:
+        raise ShiftWindowError(
+            f"The window {window} is not a number followed by m, h, d, or w"
+        )
+    amount, unit = match.groups()
+    return float(amount) * WINDOW_UNITS[unit.lower()]
+
+
+def parse_date(header: str) -> Optional[Tuple[Optional[int], int, int]]:
+    """Parse the year, which may be missing, and the month and day in the header."""
+    match = ISO_DATE.search(header)
+    if match is not None:
+        year, month, day = match.groups()
+        return int(year), int(month), int(day)
+    match = NAMED_DATE.search(header)
+    if match is not None:
+        month_name, day, year = match.groups()
+        return (
+            int(year) if year else None,
+            MONTHS[month_name[: constants.sizes.Month_Prefix].lower()],
+            int(day),
+        )
+    for match in NUMERIC_DATE.finditer(header):
+        month, day, year = match.groups()
+        # a date without a year is only a date when the text before it says so
+        if year is None:
+            if BARE_DATE_PREFIX.search(header, 0, match.start()) is None:
+                continue
+            return None, int(month), int(day)
+        if len(year) == 2:
+            year = f"20{year}"
+        return int(year), int(month), int(day)
+    return None
+
+
+def get_clock_hour(hour: int, meridiem: str) -> int:
+    """Convert an hour on a twelve hour clock to an hour on a twenty-four hour clock."""
+    hour = hour % 12
+    if meridiem.lower() == "p":
+        return hour + 12
+    return hour
+
+
+def parse_time(header: str) -> Tuple[int, int]:
+    """Parse the hour and minute at which the shift starts, which is midnight when the header has no time."""
+    match = TIME_RANGE.search(header)
+    if match is not None:
+        hour, minute, end_hour, meridiem = match.groups()
+        # the start of a range like "11-1pm" is before noon even though its end is not
+        if int(hour) % 12 > int(end_hour) % 12:
+            meridiem = "a" if meridiem.lower() == "p" else "p"
+        return get_clock_hour(int(hour), meridiem), int(minute or 0)
+    match = TIME.search(header)
+    if match is None:
+        if NOON.search(header):
+            return 12, 0
+        return 0, 0
+    hour, minute, meridiem, clock_hour, clock_minute = match.groups()
+    if clock_hour is not None:
+        return int(clock_hour), int(clock_minute)
+    return get_clock_hour(int(hour), meridiem), int(minute or 0)
+
+
+def parse_shift_start(header: str, now: datetime = None) -> Optional[datetime]:
+    """Parse the date and time at which the shift in the header starts, or None without a date."""
+    if now is None:
+        now = datetime.now()
+    date = parse_date(header)
+    if date is None:
+        return None
+    year, month, day = date
+    hour, minute = parse_time(header)
+    try:
+        if year is not None:
+            return datetime(year, month, day, hour, minute)
+        # a header without a year is on the date that is nearest to now so
+        # that a season that spans the new year is parsed correctly
+        starts = [
+            datetime(candidate, month, day, hour, minute)
+            for candidate in (now.year - 1, now.year, now.year + 1)
+        ]
+    except ValueError:
+        # the header has numbers that look like a date but are not one
+        return None
+    return min(starts, key=lambda start: abs(start - now))
+
+
+class ShiftIndex:
+    """Define a sorted index over the times at which the shifts in the activity columns start."""
+
+    def __init__(self, activity_columns: List[str], now: datetime = None) -> None:
+        """Build the index by parsing each of the headers once."""
+        # every header is parsed relative to the same point in time
+        if now is None:
+            now = datetime.now()
+        shift_starts = [
+            (start, column)
+            for column, start in enumerate(
+                parse_shift_start(header, now) for header in activity_columns
+            )
+            if start is not None
+        ]
+        # an activity without a date in its header is never in a window
+        self.unscheduled = len(activity_columns) - len(shift_starts)
+        shift_starts.sort()
+        self.starts = numpy.array(
+            [start for start, _ in shift_starts], dtype="datetime64[s]"
+        )
+        self.columns = numpy.array(
+            [column for _, column in shift_starts], dtype=numpy.int32
+        )
+
+    def __len__(self) -> int:
+        """Return the number of shifts in the index."""
+        return len(self.starts)
+
+    def get_columns(self, start: datetime, end: datetime) -> numpy.ndarray:
+        """Get the columns, in the order of the spreadsheet, of the shifts that start in [start, end)."""
+        # find the shifts with a binary search for both ends of the window
+        # so that the shifts outside of the window are never considered
+        first, last = numpy.searchsorted(
+            self.starts,
+            numpy.array([start, end], dtype="datetime64[s]"),
+            side="left",
+        )
+        return numpy.sort(self.columns[first:last])
+
+    def get_window_columns(
+        self, window: timedelta, now: datetime = None
+    ) -> numpy.ndarray:
+        """Get the columns of the shifts that start between now and the end of the window."""
+        if now is None:
+            now = datetime.now()
+        return self.get_columns(now, now + window)
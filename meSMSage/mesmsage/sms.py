@@ -1,24 +1,45 @@
 """Create and send SMS messages using Twilio."""
 
+import hashlib
 import logging
 import os
+import threading
 
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from datetime import datetime
 
 import phonenumbers  # type: ignore
 
 from dotenv import load_dotenv
 
+from requests import Response
+from requests.exceptions import RequestException
+
+from twilio.base.exceptions import TwilioException  # type: ignore
 from twilio.base.exceptions import TwilioRestException  # type: ignore
 from twilio.rest import Client  # type: ignore
 
 from mesmsage import constants
+from mesmsage import journal
+from mesmsage import phone
+from mesmsage import ratelimit
+from mesmsage import transport
+from mesmsage import util
+
+# the client is created when it is first used, and not when the module is
+# imported, and then it is shared by all of the messages that are sent
+CLIENT_LOCK = threading.RLock()
 
-# create a client using those authentication
-# variables found in environment variables
-load_dotenv()
-client = Client()
+# the last response from Twilio that each of the threads received, which
+# the hook on the requests of a client records in the thread that made them
+RESPONSES = threading.local()
 
 
 class TwilioCommunicationError(Exception):
@@ -27,61 +48,398 @@ class TwilioCommunicationError(Exception):
     pass
 
 
-def send_message(client: Client, to_number: str, from_number: str, message: str) -> str:
+class SendResult(NamedTuple):
+    """Define the result of sending a message to a phone number."""
+
+    phone_number: str
+    sid: Optional[str]
+    error: Optional[str]
+
+
+def configure_client(
+    pool_size: int = constants.sizes.Workers,
+    connect_timeout: float = constants.transport.Connect_Timeout,
+    read_timeout: float = constants.transport.Read_Timeout,
+    proxy: str = None,
+) -> Client:
+    """Create the Twilio client with a pool of connections for the threads that send messages."""
+    # create a client using those authentication
+    # variables found in environment variables
+    load_dotenv()
+    twilio_client = Client(
+        http_client=transport.PooledHttpClient(
+            pool_size, connect_timeout, read_timeout, proxy
+        )
+    )
+    with CLIENT_LOCK:
+        globals()["client"] = twilio_client
+    return twilio_client
+
+
+def get_client() -> Client:
+    """Get the Twilio client, creating it with the environment variables when it is first used."""
+    # note that the client is stored as the client attribute of the module
+    # so that it may be replaced by assigning to sms.client
+    with CLIENT_LOCK:
+        twilio_client = globals().get("client")
+        if twilio_client is None:
+            twilio_client = configure_client()
+    return twilio_client
+
+
+def get_transport_statistics(
+    twilio_client: Client = None,
+) -> Optional[transport.TransportStatistics]:
+    """Get the number of requests and connections of the client, if it has a pool of connections."""
+    if twilio_client is None:
+        twilio_client = get_client()
+    http_client = getattr(twilio_client, "http_client", None)
+    if isinstance(http_client, transport.PooledHttpClient):
+        return http_client.get_statistics()
+    return None
+
+
+def __getattr__(name: str):
+    """Create the Twilio client when the client attribute of the module is first used."""
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__} has no attribute {name}")
+
+
+def record_response(response: Response, *arguments, **keywords) -> None:
+    """Record the response to a request to Twilio for the thread that made the request."""
+    RESPONSES.last_response = response
+
+
+def track_responses(client: Client) -> None:
+    """Make the client record the response to each of its requests for the thread that made it."""
+    # the hooks are called by the thread that makes the request and thus each
+    # thread that sends messages with a shared client only sees its responses
+    request_hooks = getattr(getattr(client, "http_client", None), "request_hooks", None)
+    if isinstance(request_hooks, dict):
+        response_hooks = request_hooks.setdefault(constants.rates.Response_Hook, [])
+        if record_response not in response_hooks:
+            response_hooks.append(record_response)
+
+
+def get_retry_after() -> Optional[float]:
+    """Get the seconds to wait from the Retry-After header of the calling thread's last response."""
+    # the exception raised by the Twilio client does not carry the headers of
+    # the response and so read them from the response that the thread received
+    last_response = getattr(RESPONSES, "last_response", None)
+    headers = getattr(last_response, "headers", None) or {}
+    return ratelimit.parse_retry_after(headers.get(constants.rates.Retry_After))
+
+
+def send_message(
+    client: Client,
+    to_number: str,
+    from_number: str,
+    message: str,
+    rate_limiter: ratelimit.RateLimiter = None,
+    status_callback: str = None,
+) -> str:
     """Send a message using the provided Twilio client."""
     logger = logging.getLogger(constants.logging.Rich)
-    # send the message using the Twilio client object.
-    # Note that the from_number must be a number that is
+    # note that the from_number must be a number that is
     # registered with Twilio; this means that you cannot
-    # include any potential number for the from_ parameter
-    try:
-        sent_message = client.messages.create(
-            to=to_number, from_=from_number, body=message
-        )
-    # something went wrong with sending the message, so log
-    # it as an error that will be visible in the logging system
-    except TwilioRestException as e:
-        logger.error(
-            constants.messages.Sms_Did_Not_Work + constants.markers.Space + str(e)
-        )
-        raise TwilioCommunicationError
-    # return the 34-character string that serves as the unique
-    # identifier for this specific message sent through Twilio.
-    # Note that an sid pre-pended with "SM" means that it was a
-    # text message and with "MM" means that it was a media message
-    return sent_message.sid
+    # include any potential number for the from_ parameter.
+    # It may also be the SID of a Messaging Service, which
+    # then picks one of the numbers in its own sender pool
+    message_options: Dict[str, str] = {"to": to_number, "body": message}
+    if is_messaging_service(from_number):
+        message_options["messaging_service_sid"] = from_number
+    else:
+        message_options["from_"] = from_number
+    # Twilio reports each change in the delivery status of the message
+    # to the callback URL instead of waiting for it to be fetched
+    if status_callback is not None:
+        message_options["status_callback"] = status_callback
+    track_responses(client)
+    attempt = 0
+    while True:
+        attempt = attempt + 1
+        # wait until the rate limit for the from_number allows another message
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        # send the message using the Twilio client object
+        try:
+            sent_message = client.messages.create(**message_options)
+        except TwilioRestException as e:
+            # Twilio throttled the message or had a temporary failure,
+            # so wait and then try to send the same message again
+            if rate_limiter is not None and rate_limiter.should_retry(
+                e.status, attempt
+            ):
+                delay = rate_limiter.wait_to_retry(e.status, attempt, get_retry_after())
+                logger.debug(
+                    f"Retrying message to {to_number} after {delay:.2f}s (HTTP {e.status})"
+                )
+                continue
+            # something went wrong with sending the message, so log
+            # it as an error that will be visible in the logging system
+            logger.error(
+                constants.messages.Sms_Did_Not_Work + constants.markers.Space + str(e)
+            )
+            raise TwilioCommunicationError(str(e)) from e
+        # the connection to Twilio failed or timed out and, since a response
+        # that timed out may be for a message that was sent, it is not retried
+        except RequestException as e:
+            logger.error(
+                constants.messages.Sms_Did_Not_Work + constants.markers.Space + str(e)
+            )
+            raise TwilioCommunicationError(str(e)) from e
+        if rate_limiter is not None:
+            rate_limiter.record_success()
+        # return the 34-character string that serves as the unique
+        # identifier for this specific message sent through Twilio.
+        # Note that an sid pre-pended with "SM" means that it was a
+        # text message and with "MM" means that it was a media message
+        return sent_message.sid
 
 
-def send_messages(message_dictionary: Dict[str, str]) -> List[str]:
-    """Use the Twilio client to send all of the messages in the provided dictionary."""
-    # note that the client is created globally as part of this module
-    # create an empty list of the message SIDs that are returned from send_message
-    sid_list = []
-    # extract the Twilio phone number stored in the environment that will be the number
-    # that is used to send the SMS messages. This number will appear in the messaging
-    # app of the person who receives the SMS message. It was purchased through Twilio.
-    twilio_phone_number = os.getenv(constants.environment.Twilio_Phone_Number)
-    # ensure that the Twilio phone number is in the E164 international format:
-    # https://support.twilio.com/hc/en-us/articles/223183008-Formatting-International-Phone-Numbers
-    twilio_phone_number_parsed = phonenumbers.parse(
-        twilio_phone_number, constants.locations.Us
+def get_e164_number(phone_number: str) -> str:
+    """Convert the phone number to the E164 international format."""
+    # the phone numbers are normalized when the sheet is loaded and the
+    # conversion is memoized so that sending does not parse them again
+    return phone.get_e164_number(phone_number)
+
+
+def is_messaging_service(sender: Optional[str]) -> bool:
+    """Determine whether or not the sender is the SID of a Twilio Messaging Service."""
+    return sender is not None and sender.startswith(
+        constants.senders.Messaging_Service_Prefix
     )
-    twilio_phone_number_e164 = phonenumbers.format_number(
-        twilio_phone_number_parsed, phonenumbers.PhoneNumberFormat.E164
+
+
+def get_senders() -> List[str]:
+    """Get the pool of senders, as E164 phone numbers or a Messaging Service SID."""
+    # a Messaging Service manages its own pool of phone numbers and so it is
+    # the only sender; otherwise, use the pool of phone numbers when there is
+    # one and, finally, the single phone number that was purchased through Twilio.
+    # This number will appear in the messaging app of the person who receives
+    # the SMS message
+    messaging_service_sid = os.getenv(constants.environment.Twilio_Messaging_Service)
+    if messaging_service_sid:
+        return [messaging_service_sid]
+    twilio_phone_numbers = os.getenv(constants.environment.Twilio_Phone_Numbers)
+    if twilio_phone_numbers:
+        return [
+            get_e164_number(phone_number.strip())
+            for phone_number in twilio_phone_numbers.split(constants.markers.Comma)
+            if phone_number.strip()
+        ]
+    twilio_phone_number = os.getenv(constants.environment.Twilio_Phone_Number)
+    if not twilio_phone_number:
+        raise TwilioCommunicationError(constants.messages.Sender_Not_Set)
+    return [get_e164_number(twilio_phone_number)]
+
+
+def get_pool_size(workers: int) -> int:
+    """Get the number of connections for the threads that send, with the workers in each sender's lane."""
+    # every sender has its own lane of workers and so, with a connection
+    # for each of those threads, no thread waits for a connection in a
+    # pool that blocks instead of opening more connections than its size
+    try:
+        senders_count = len(get_senders())
+    except TwilioCommunicationError:
+        # without a sender no message can be sent, like in a dry run
+        senders_count = 1
+    return workers * senders_count
+
+
+def get_sender(phone_number: str, senders: List[str]) -> str:
+    """Get the sender in the pool that always sends to the phone number."""
+    if len(senders) == 1:
+        return senders[constants.sizes.First]
+    # use rendezvous hashing so that a person always hears from the same
+    # sender and, when a sender joins or leaves the pool, only the people
+    # who heard from that sender move to a different one
+    return max(
+        senders,
+        key=lambda sender: hashlib.sha256(
+            (sender + constants.markers.Separator + phone_number).encode()
+        ).digest(),
     )
-    # iterate through each of the {phone number, message} pairs inside of message_dictionary
-    # and complete the following tasks:
+
+
+def get_recipient_sender(phone_number: str, senders: List[str]) -> str:
+    """Get the sender for the recipient's phone number, even if it cannot be parsed."""
+    try:
+        return get_sender(get_e164_number(phone_number), senders)
+    # the message to this phone number will fail when it is sent
+    # and so it does not matter which of the senders tries to send it
+    except phonenumbers.NumberParseException:
+        return senders[constants.sizes.First]
+
+
+def send_message_stream(
+    messages: Iterable[Tuple[str, str]],
+    buffer_size: int = constants.sizes.Buffer,
+    rate: float = None,
+    status_callback: str = None,
+) -> Iterator[str]:
+    """Use the Twilio client to send each {phone number, message} pair as it is produced."""
+    # note that the client is shared by every message and created on first use
+    twilio_client = get_client()
+    # extract the pool of senders stored in the environment that will send the SMS messages
+    senders = get_senders()
+    # all of the messages sent from each of the senders share a rate limit
+    rate_limiters = {
+        sender: ratelimit.get_rate_limiter(sender, rate) for sender in senders
+    }
+    # iterate through each of the {phone number, message} pairs as they are produced,
+    # allowing at most buffer_size of them to be waiting to be sent, and then:
     # 1. Convert the phone number to the E164 international format
-    # 2. Use the send_message function in this module to send the message
-    # 3. Collect the message SID in the list of SIDs for diagnostic purposes
-    for phone_number_to, message in message_dictionary.items():
-        phone_number_parsed = phonenumbers.parse(
-            phone_number_to, constants.locations.Us
+    # 2. Pick the sender that always sends to this phone number
+    # 3. Use the send_message function in this module to send the message
+    # 4. Produce the message SID for diagnostic purposes
+    for phone_number_to, message in util.buffer_iterator(messages, buffer_size):
+        phone_number_to_e164 = get_e164_number(phone_number_to)
+        sender = get_sender(phone_number_to_e164, senders)
+        yield send_message(
+            twilio_client,
+            phone_number_to_e164,
+            sender,
+            message,
+            rate_limiters[sender],
+            status_callback,
         )
-        phone_number_e164 = phonenumbers.format_number(
-            phone_number_parsed, phonenumbers.PhoneNumberFormat.E164
+
+
+def send_messages(
+    message_dictionary: Dict[str, str],
+    rate: float = None,
+    status_callback: str = None,
+) -> List[str]:
+    """Use the Twilio client to send all of the messages in the provided dictionary."""
+    # create the list of the message SIDs that are returned from send_message
+    # for each of the {phone number, message} pairs inside of message_dictionary
+    sid_list = list(
+        send_message_stream(
+            message_dictionary.items(), constants.sizes.Buffer, rate, status_callback
         )
-        sid = send_message(client, phone_number_e164, twilio_phone_number_e164, message)
-        sid_list.append(sid)
+    )
     # return the list of message SIDs for diagnostic purposes
     return sid_list
+
+
+def send_message_stream_concurrently(
+    messages: Iterable[Tuple[str, str]],
+    workers: int = constants.sizes.Workers,
+    twilio_client: Client = None,
+    rate: float = None,
+    status_callback: str = None,
+) -> Iterator[SendResult]:
+    """Use a pool of threads for each sender to send each {phone number, message} pair, producing results in order."""
+    logger = logging.getLogger(constants.logging.Rich)
+    # note that the client is created globally as part of this module
+    if twilio_client is None:
+        twilio_client = get_client()
+    senders = get_senders()
+    # all of the threads sending from a sender share the rate limit of that sender
+    rate_limiters = {
+        sender: ratelimit.get_rate_limiter(sender, rate) for sender in senders
+    }
+
+    def get_lane(phone_number_message: Tuple[str, str]) -> str:
+        """Get the sender whose lane sends the message."""
+        return get_recipient_sender(phone_number_message[0], senders)
+
+    def send_or_capture_error(phone_number_message: Tuple[str, str]) -> SendResult:
+        """Send the message and capture, instead of raise, any error in sending it."""
+        phone_number_to, message = phone_number_message
+        try:
+            phone_number_to_e164 = get_e164_number(phone_number_to)
+            sender = get_sender(phone_number_to_e164, senders)
+            sid = send_message(
+                twilio_client,
+                phone_number_to_e164,
+                sender,
+                message,
+                rate_limiters[sender],
+                status_callback,
+            )
+        # the failure to send this message does not stop the sending of
+        # the other messages and is instead recorded in its result
+        except (TwilioCommunicationError, phonenumbers.NumberParseException) as e:
+            logger.debug(f"Could not send to {phone_number_to}: {e}")
+            return SendResult(phone_number_to, None, str(e))
+        return SendResult(phone_number_to, sid, None)
+
+    # each message is a blocking round trip to Twilio and thus a pool of
+    # threads overlaps these round trips while the results stay in order;
+    # each sender has its own lane of workers threads so that the total
+    # throughput grows with the number of senders in the pool
+    yield from util.ordered_lane_map(
+        send_or_capture_error, messages, get_lane, senders, workers
+    )
+
+
+def send_messages_concurrently(
+    message_dictionary: Dict[str, str],
+    workers: int = constants.sizes.Workers,
+    twilio_client: Client = None,
+    rate: float = None,
+    status_callback: str = None,
+) -> List[SendResult]:
+    """Use a pool of threads to send all of the messages in the provided dictionary."""
+    return list(
+        send_message_stream_concurrently(
+            message_dictionary.items(), workers, twilio_client, rate, status_callback
+        )
+    )
+
+
+def get_message_error(sent_message) -> Optional[str]:
+    """Get the description of the error that stopped the delivery of a message, if any."""
+    if sent_message.error_message:
+        return sent_message.error_message
+    if sent_message.error_code:
+        return str(sent_message.error_code)
+    return None
+
+
+def stream_message_statuses(
+    since: datetime = None,
+    until: datetime = None,
+    sender: Optional[str] = None,
+    page_size: int = constants.journal.Status_Page_Size,
+    twilio_client: Client = None,
+) -> Iterator[journal.MessageStatus]:
+    """Generate the delivery status of each message that Twilio sent, fetching a page at a time."""
+    logger = logging.getLogger(constants.logging.Rich)
+    if twilio_client is None:
+        twilio_client = get_client()
+    # Twilio filters the messages by the time of sending and by the phone number
+    # that sent them; note that the list of messages cannot be filtered by a
+    # Messaging Service and so those messages are filtered after they arrive
+    filters: Dict[str, object] = {}
+    if since is not None:
+        filters["date_sent_after"] = since
+    if until is not None:
+        filters["date_sent_before"] = until
+    if sender is not None and not is_messaging_service(sender):
+        filters["from_"] = get_e164_number(sender)
+    logger.debug(f"Fetching the status of messages with filters {filters}")
+    try:
+        # each page of up to page_size messages costs one request and the
+        # next page is only requested after this page has been consumed
+        for sent_message in twilio_client.messages.stream(
+            page_size=page_size, **filters
+        ):
+            if (
+                is_messaging_service(sender)
+                and sent_message.messaging_service_sid != sender
+            ):
+                continue
+            yield journal.MessageStatus(
+                sent_message.sid,
+                sent_message.to,
+                sent_message.status,
+                get_message_error(sent_message),
+                sent_message.date_sent or sent_message.date_created,
+            )
+    except TwilioException as e:
+        logger.error(str(e))
+        raise TwilioCommunicationError(str(e)) from e
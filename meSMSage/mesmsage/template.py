@@ -0,0 +1,120 @@
+"""Compile and render the templates for SMS messages."""
+
+import functools
+import string
+
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from mesmsage import constants
+from mesmsage import util
+
+
+class TemplateError(Exception):
+    """Define error to indicate that a message template is not valid."""
+
+    pass
+
+
+class MessageTemplate:
+    """Define a message template that is parsed once and then rendered many times."""
+
+    def __init__(self, template_text: str) -> None:
+        """Parse the template into its literal fragments and placeholders."""
+        self.text = template_text
+        # create a list of fragments of the form:
+        # (<Literal Text>, <Placeholder Name or None>)
+        # so that rendering never needs to parse the template again
+        self.fragments: List[Tuple[str, Optional[str]]] = []
+        try:
+            parsed_template = list(string.Formatter().parse(template_text))
+        except ValueError as e:
+            raise TemplateError(str(e))
+        for literal, placeholder, format_spec, conversion in parsed_template:
+            # only the supported placeholders, without any formatting, can be bound
+            if placeholder is not None and (
+                placeholder not in constants.templates.Placeholders
+                or format_spec
+                or conversion
+            ):
+                raise TemplateError(f"Unsupported placeholder: {{{placeholder}}}")
+            self.fragments.append((literal, placeholder))
+        # compile the fragments into a single printf-style format string
+        # so that rendering a message is one call implemented in C
+        self.placeholders = [
+            placeholder for _, placeholder in self.fragments if placeholder is not None
+        ]
+        self.format = constants.markers.Nothing.join(
+            [
+                literal.replace("%", "%%") + ("%s" if placeholder is not None else "")
+                for literal, placeholder in self.fragments
+            ]
+        )
+
+    def render_all(self, values: Dict[str, List[str]]) -> List[str]:
+        """Render the template once for each position in the lists of provided values."""
+        # a template without any placeholders renders to the same text for every
+        # position, which pairing up the lists of values would otherwise drop
+        if not self.placeholders:
+            row_count = max([len(column) for column in values.values()], default=0)
+            return [self.format % ()] * row_count
+        # bind all of the placeholders in bulk by pairing up the lists of
+        # values in the order in which the placeholders appear in the template
+        # note that mapping the bound method formats each message without
+        # running any Python code for each of the messages
+        return list(
+            map(
+                self.format.__mod__,
+                zip(*[values[placeholder] for placeholder in self.placeholders]),
+            )
+        )
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Render the template by binding the placeholders to the provided values."""
+        return self.format % tuple(
+            [values[placeholder] for placeholder in self.placeholders]
+        )
+
+
+@functools.lru_cache(maxsize=constants.templates.Cache_Size)
+def get_activities_fragment(activities: Tuple[str, ...]) -> str:
+    """Get the rendered list of activities, reusing the fragment for repeated lists."""
+    return util.get_spiffy_list(list(activities))
+
+
+class ActivitiesFragments(dict):
+    """Define a dictionary that renders the list of activities for a missing key."""
+
+    def __missing__(self, activities: Tuple[str, ...]) -> str:
+        """Render the list of activities and then store it for the next lookup."""
+        fragment = self[activities] = get_activities_fragment(activities)
+        return fragment
+
+
+def get_activities_fragments(activities_lists: Iterable[List[str]]) -> List[str]:
+    """Get the rendered list of activities for each list, rendering each distinct list once."""
+    # a batch can contain more distinct lists of activities than the shared
+    # cache holds and so the fragments of this batch are also kept here;
+    # note that mapping the lookups avoids running Python code for each list
+    # of activities that was already rendered earlier in the batch
+    fragments = ActivitiesFragments()
+    return list(map(fragments.__getitem__, map(tuple, activities_lists)))
+
+
+@functools.lru_cache(maxsize=None)
+def compile_template(
+    template_text: str = constants.templates.Default,
+) -> MessageTemplate:
+    """Compile the template text, reusing the template if it was already compiled."""
+    return MessageTemplate(template_text)
+
+
+def read_template(template_file: Path) -> MessageTemplate:
+    """Read the template from the specified file and then compile it."""
+    # remove the trailing newline that most editors add to the file
+    template_text = template_file.read_text().rstrip(constants.markers.Newline)
+    return compile_template(template_text)
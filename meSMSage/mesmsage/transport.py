@@ -0,0 +1,66 @@
+"""Send the requests to Twilio over a pool of connections that are kept alive between messages."""
+
+from typing import NamedTuple
+
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient  # type: ignore
+
+from mesmsage import constants
+
+
+class TransportStatistics(NamedTuple):
+    """Define the number of requests made and the number of connections opened to make them."""
+
+    requests: int
+    connections: int
+
+
+class PooledHttpClient(TwilioHttpClient):
+    """Define an HTTP client for Twilio with a pool of keep-alive connections, timeouts, and a proxy."""
+
+    def __init__(
+        self,
+        pool_size: int = constants.sizes.Workers,
+        connect_timeout: float = constants.transport.Connect_Timeout,
+        read_timeout: float = constants.transport.Read_Timeout,
+        proxy: str = None,
+    ) -> None:
+        """Create the session with a pool that has a connection for each thread that sends messages."""
+        super().__init__(
+            pool_connections=True,
+            proxy=(
+                {scheme: proxy for scheme in constants.transport.Schemes}
+                if proxy
+                else None
+            ),
+        )
+        # the session keeps each connection alive after a response so that
+        # the next request to Twilio reuses it instead of connecting, and
+        # doing a TLS handshake, again; when every connection in the pool is
+        # in use a thread waits for one instead of opening a connection that
+        # would be closed after its request because the pool is full
+        adapter = HTTPAdapter(
+            pool_connections=constants.transport.Hosts,
+            pool_maxsize=pool_size,
+            pool_block=True,
+        )
+        for scheme in constants.transport.Schemes:
+            self.session.mount(scheme + "://", adapter)
+        self.adapter = adapter
+        # a connection to Twilio fails fast while a response, which may take
+        # longer when Twilio is busy, has more time to arrive; note that the
+        # pair of timeouts is set after creating the client since the client
+        # only checks a timeout that is a single number
+        self.timeout = (connect_timeout, read_timeout)
+
+    def get_statistics(self) -> TransportStatistics:
+        """Count the requests made and the connections opened across all of the pools."""
+        requests_count = 0
+        connections_count = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requests_count = requests_count + pool.num_requests
+                connections_count = connections_count + pool.num_connections
+        return TransportStatistics(requests_count, connections_count)
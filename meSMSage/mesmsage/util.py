@@ -1,9 +1,24 @@
 """Utility functions for manipulating the environment and textual content."""
 
+import collections
+import contextlib
+import importlib.util
+import queue
+import sys
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
 from textwrap import indent
 from textwrap import wrap
+from types import ModuleType
+from typing import Callable
 from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Tuple
 
 from dotenv import load_dotenv
 
@@ -21,6 +36,24 @@ def load_environment(env_file_name: str = None) -> None:
         load_dotenv(dotenv_path=env_file_name)
 
 
+def import_lazily(module_name: str) -> ModuleType:
+    """Import a module that only runs, importing its own dependencies, when one of its attributes is first used."""
+    # a module that was already imported is used as is
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    # note that an import of the module elsewhere, like "from mesmsage import
+    # sheets", finds the same lazy module and thus the module only runs once
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {module_name}", name=module_name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    loader.exec_module(module)
+    return module
+
+
 def get_printable_dictionary_list(provided_dict: Dict[str, List[str]]) -> str:
     """Create a textual representation of a dictionary where the value is a list."""
     lines = []
@@ -63,3 +96,92 @@ def get_spiffy_list(contents: List[str]) -> str:
 def reindent(text: str, num_spaces: int = 4) -> str:
     """Add indentation spaces to a (potentially) multiline string."""
     return indent(text, constants.markers.Space * num_spaces)
+
+
+def buffer_iterator(
+    iterable: Iterable, buffer_size: int, wait: float = constants.sizes.Buffer_Wait
+) -> Iterator:
+    """Iterate through the iterable while a background thread fills a bounded buffer."""
+    # the background thread can produce at most buffer_size items
+    # before the consumer of this iterator takes the first of them
+    buffer: queue.Queue = queue.Queue(maxsize=buffer_size)
+    end_marker = object()
+    # the consumer sets the event when it stops iterating, even after an
+    # error, so that the background thread does not wait on a full buffer
+    # forever and instead stops after waiting for at most one more wait
+    stopping = threading.Event()
+
+    def put_item(entry: Tuple) -> bool:
+        """Put the entry in the buffer unless the consumer stopped, returning if it was put."""
+        while not stopping.is_set():
+            try:
+                buffer.put(entry, timeout=wait)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fill_buffer() -> None:
+        """Put every item in the buffer, followed by the end marker and any error."""
+        try:
+            for item in iterable:
+                if not put_item((item, None)):
+                    return
+            put_item((end_marker, None))
+        # pass the error to the consumer so that it is raised in its thread
+        except Exception as error:  # pylint: disable=broad-except
+            put_item((end_marker, error))
+
+    thread = threading.Thread(target=fill_buffer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is end_marker:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopping.set()
+
+
+def ordered_lane_map(
+    function: Callable,
+    iterable: Iterable,
+    get_lane: Callable[..., Hashable],
+    lanes: Iterable[Hashable],
+    workers: int = 1,
+    window: int = None,
+) -> Iterator:
+    """Call the function for each item with the pool of threads of its lane, producing results in order."""
+    lanes = list(lanes)
+    # keep at most window calls submitted to all of the lanes at once,
+    # defaulting to two calls per thread in each of the lanes
+    if window is None:
+        window = 2 * workers * len(lanes)
+    with contextlib.ExitStack() as stack:
+        # each lane has its own pool of threads so that the calls in one
+        # lane never wait for a thread that is busy with another lane
+        executors = {
+            lane: stack.enter_context(ThreadPoolExecutor(max_workers=workers))
+            for lane in lanes
+        }
+        pending: collections.deque = collections.deque()
+        try:
+            for item in iterable:
+                pending.append(executors[get_lane(item)].submit(function, item))
+                if len(pending) >= window:
+                    yield pending[constants.sizes.First].result()
+                    pending.popleft()
+        except GeneratorExit:
+            raise
+        except BaseException:
+            # the calls already submitted finish even when the iterable or the
+            # wait for a result is interrupted, like by an error in producing
+            # the next item, and so their results are produced before the error
+            while pending:
+                yield pending.popleft().result()
+            raise
+        while pending:
+            yield pending.popleft().result()
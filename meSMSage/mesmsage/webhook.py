@@ -0,0 +1,187 @@
+"""Receive the status callbacks from Twilio and record them in the journal in batches."""
+
+import logging
+import queue
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+from urllib.parse import parse_qs
+
+from twilio.request_validator import RequestValidator  # type: ignore
+
+from mesmsage import constants
+from mesmsage import journal
+
+
+class StatusCallbackHandler(BaseHTTPRequestHandler):
+    """Accept a status callback from Twilio and queue it to be recorded."""
+
+    # keep the connection alive so that Twilio, or a proxy in front of
+    # the receiver, can deliver many callbacks over the same connection
+    protocol_version = "HTTP/1.1"
+
+    server: "StatusReceiver"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Log each request at the debugging level instead of to standard error."""
+        logger = logging.getLogger(constants.logging.Rich)
+        logger.debug(format % args)
+
+    def send_empty_response(self, status: int) -> None:
+        """Send a response without a body."""
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):  # noqa: N802
+        """Queue the status in the callback and respond without waiting for it to be recorded."""
+        # the body of a request without a valid length can never be found
+        # on the connection and so the connection is closed after answering
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self.send_empty_response(400)
+            return
+        form = {
+            key: values[0]
+            for key, values in parse_qs(self.rfile.read(length).decode()).items()
+        }
+        if not self.server.is_valid(
+            self.path, form, self.headers.get(constants.webhook.Signature)
+        ):
+            self.send_empty_response(403)
+            return
+        sid = form.get(constants.webhook.Message_Sid)
+        status = form.get(constants.webhook.Message_Status)
+        if not sid or not status:
+            self.send_empty_response(400)
+            return
+        # the status is recorded by the writer thread along with the other
+        # statuses in its batch and so each callback does not wait for a
+        # transaction to be committed to the disk before it is answered
+        self.server.statuses.put(
+            journal.MessageStatus(
+                sid,
+                form.get(constants.webhook.To, constants.markers.Nothing),
+                status,
+                form.get(constants.webhook.Error_Code),
+                None,
+            )
+        )
+        self.send_empty_response(204)
+
+
+class StatusReceiver(ThreadingHTTPServer):
+    """Define a server that receives the status callbacks and records them in batches."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        journal_file: Path,
+        host: str = constants.webhook.Host,
+        port: int = constants.webhook.Port,
+        batch_size: int = constants.webhook.Batch_Size,
+        flush_interval: float = constants.webhook.Flush_Interval,
+        auth_token: Optional[str] = None,
+        public_url: str = None,
+    ) -> None:
+        """Bind to the host and port and prepare the thread that writes to the journal."""
+        super().__init__((host, port), StatusCallbackHandler)
+        self.journal_file = journal_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # a callback is only accepted when it is signed by Twilio with the
+        # auth token for the URL at which Twilio reaches the receiver
+        self.validator = RequestValidator(auth_token) if auth_token else None
+        self.public_url = public_url
+        self.statuses: "queue.Queue[Optional[journal.MessageStatus]]" = queue.Queue()
+        self.recorded = 0
+        self.status_counts: Dict[str, int] = {}
+        self.writer = threading.Thread(target=self.write_statuses, daemon=True)
+        self.serving = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Get the URL at which the receiver accepts the status callbacks."""
+        host, port = self.server_address[:2]
+        # the address of a socket may name its host with bytes
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}/"
+
+    def is_valid(self, path: str, form: Dict[str, str], signature: str = None) -> bool:
+        """Determine whether or not the callback was signed by Twilio."""
+        if self.validator is None:
+            return True
+        if signature is None:
+            return False
+        url = (self.public_url or self.url).rstrip("/") + path
+        return self.validator.validate(url, form, signature)
+
+    def collect_batch(self) -> Optional[List[journal.MessageStatus]]:
+        """Wait for a status and then collect a batch of statuses, or None when stopping."""
+        first_status = self.statuses.get()
+        if first_status is None:
+            return None
+        batch = [first_status]
+        # a batch is written when it is full or when its first status has
+        # waited for the flush interval, whichever happens first
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                message_status = self.statuses.get(timeout=timeout)
+            except queue.Empty:
+                break
+            # stop after writing the statuses that were received before stopping
+            if message_status is None:
+                self.statuses.put(None)
+                break
+            batch.append(message_status)
+        return batch
+
+    def write_statuses(self) -> None:
+        """Record the batches of statuses in the journal until the receiver stops."""
+        logger = logging.getLogger(constants.logging.Rich)
+        # the receiver only ever writes to the journal from this one thread
+        connection = journal.connect(self.journal_file)
+        try:
+            while True:
+                batch = self.collect_batch()
+                if batch is None:
+                    return
+                status_counts = journal.record_statuses(connection, batch, len(batch))
+                for status, count in status_counts.items():
+                    self.status_counts[status] = (
+                        self.status_counts.get(status, 0) + count
+                    )
+                self.recorded = self.recorded + len(batch)
+                logger.debug(f"Recorded {len(batch)} status callback(s)")
+        finally:
+            connection.close()
+
+    def start(self) -> None:
+        """Start receiving the status callbacks and writing them to the journal."""
+        self.writer.start()
+        self.serving.start()
+
+    def stop(self) -> None:
+        """Stop receiving the status callbacks and record the ones that were received."""
+        # note that shutting down waits for the server to stop serving
+        if self.serving.is_alive():
+            self.shutdown()
+        self.server_close()
+        self.statuses.put(None)
+        self.writer.join()
@@ -23,7 +23,9 @@ def test(c, noexternal=False):
     print("Begin " + inspect.currentframe().f_code.co_name + " --->")
     # run the test suite
     if noexternal:
-        c.run("poetry run pytest -x -s -m 'not googlesheets and not twilio'")
+        c.run(
+            "poetry run pytest -x -s -m 'not googlesheets and not twilio and not benchmark'"
+        )
     else:
         c.run("poetry run pytest -x -s")
     print("---> End " + inspect.currentframe().f_code.co_name)
@@ -37,13 +39,23 @@ def debugtest(c, noexternal=False):
     # run the test suite
     if noexternal:
         c.run(
-            "poetry run pytest -x -s --log-cli-level=DEBUG -m 'not googlesheets and not twilio'"
+            "poetry run pytest -x -s --log-cli-level=DEBUG -m 'not googlesheets and not twilio and not benchmark'"
         )
     else:
         c.run("poetry run pytest -x -s --log-cli-level=DEBUG")
     print("---> End " + inspect.currentframe().f_code.co_name)
 
 
+@task
+def benchmark(c):
+    """Run the performance benchmarks."""
+    display_internal_python_version(c)
+    print("Begin " + inspect.currentframe().f_code.co_name + " --->")
+    # run only the benchmarks, which are not part of the default test suite
+    c.run("poetry run pytest -x -s -m benchmark")
+    print("---> End " + inspect.currentframe().f_code.co_name)
+
+
 @task
 def cover(c):
     """Run the test suite and collect coverage information."""
@@ -51,7 +63,7 @@ def cover(c):
     print("Begin " + inspect.currentframe().f_code.co_name + " --->")
     # run the test suite and collect coverage information
     c.run(
-        "poetry run pytest -s --cov-config .coveragerc --cov-report term-missing --cov=mesmsage --cov-branch -m 'not twilio'"
+        "poetry run pytest -s --cov-config .coveragerc --cov-report term-missing --cov=mesmsage --cov-branch -m 'not twilio and not benchmark'"
     )
     print("---> End " + inspect.currentframe().f_code.co_name)
 
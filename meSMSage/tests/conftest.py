@@ -1,7 +1,25 @@
 """Configuration file for the test suite."""
 
+import json
 import os
 import sys
+import threading
+import time
+import uuid
+
+from datetime import datetime
+from datetime import timezone
+from email.utils import format_datetime
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+
+import pytest
+
+from twilio.rest import Client
 
 GO_BACK_A_DIRECTORY = "/../"
 
@@ -22,3 +40,143 @@ from mesmsage import constants  # noqa: E402
 
 configure.configure_tracebacks()
 _ = configure.configure_logging(constants.logging.Error)
+
+FAKE_ACCOUNT_SID = "AC" + "0" * 32
+
+
+def parse_iso_datetime(value):
+    """Parse a time in the ISO 8601 format that the Twilio client sends as a filter."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class FakeTwilioHandler(BaseHTTPRequestHandler):
+    """Respond to requests for the Messages resource like the Twilio service."""
+
+    # keep the connections alive like the Twilio service
+    protocol_version = "HTTP/1.1"
+
+    # send the body of a response without waiting for the headers to be
+    # acknowledged, which would otherwise delay every kept-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Do not log the requests to the fake Twilio service."""
+
+    def send_json(self, status, payload, headers=None):
+        """Send the payload as a JSON response with the status."""
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):  # noqa: N802
+        """Create a message, failing for the numbers and the texts that the server rejects."""
+        length = int(self.headers.get("Content-Length", 0))
+        form = {
+            key: values[0]
+            for key, values in parse_qs(self.rfile.read(length).decode()).items()
+        }
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            throttled = self.server.throttled > 0
+            if throttled:
+                self.server.throttled = self.server.throttled - 1
+        if throttled:
+            self.send_json(
+                429,
+                {"code": 20429, "message": "Too Many Requests", "status": 429},
+                {"Retry-After": self.server.retry_after},
+            )
+            return
+        if form["To"] in self.server.failing_numbers or any(
+            text in form.get("Body", "") for text in self.server.failing_texts
+        ):
+            self.send_json(
+                400,
+                {
+                    "code": 21211,
+                    "message": f"The 'To' number {form['To']} is not valid.",
+                    "status": 400,
+                },
+            )
+            return
+        message = {
+            "sid": "SM" + uuid.uuid4().hex,
+            "account_sid": FAKE_ACCOUNT_SID,
+            "to": form["To"],
+            "from": form.get("From"),
+            "messaging_service_sid": form.get("MessagingServiceSid"),
+            "body": form.get("Body"),
+            "status": "queued",
+            "date_sent": format_datetime(datetime.now(timezone.utc), usegmt=True),
+            "error_code": None,
+            "error_message": None,
+        }
+        with self.server.lock:
+            self.server.messages.append(message)
+        self.send_json(201, message)
+
+    def do_GET(self):  # noqa: N802
+        """List the messages, newest first, a page at a time with the filters."""
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        page_size = int(query.get("PageSize", 50))
+        page = int(query.get("Page", 0))
+        with self.server.lock:
+            self.server.page_requests = self.server.page_requests + 1
+            messages = list(reversed(self.server.messages))
+        if "From" in query:
+            messages = [m for m in messages if m["from"] == query["From"]]
+        if "DateSent>" in query:
+            after = parse_iso_datetime(query["DateSent>"])
+            messages = [
+                m for m in messages if parsedate_to_datetime(m["date_sent"]) >= after
+            ]
+        if "DateSent<" in query:
+            before = parse_iso_datetime(query["DateSent<"])
+            messages = [
+                m for m in messages if parsedate_to_datetime(m["date_sent"]) <= before
+            ]
+        start = page * page_size
+        next_page_uri = None
+        if start + page_size < len(messages):
+            next_query = dict(query, Page=page + 1, PageToken=f"PA{start + page_size}")
+            next_page_uri = f"{url.path}?{urlencode(next_query)}"
+        self.send_json(
+            200,
+            {
+                "messages": messages[start : start + page_size],
+                "page": page,
+                "page_size": page_size,
+                "start": start,
+                "uri": self.path,
+                "next_page_uri": next_page_uri,
+            },
+        )
+
+
+@pytest.fixture
+def fake_twilio():
+    """Run a fake Twilio service on localhost and provide a client connected to it."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTwilioHandler)
+    server.daemon_threads = True
+    server.delay = 0
+    server.failing_numbers = set()
+    server.failing_texts = set()
+    server.throttled = 0
+    server.retry_after = "0"
+    server.messages = []
+    server.page_requests = 0
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = Client(FAKE_ACCOUNT_SID, "fake-auth-token")
+    client.api.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.client = client
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,588 @@
+"""Benchmark the performance of the functions that process large spreadsheets."""
+
+import asyncio
+import concurrent.futures
+import http.client
+import subprocess
+import sys
+import time
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy
+import pandas
+
+import phonenumbers
+import pytest
+
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+from pfzy import fuzzy_match
+
+from mesmsage import extract
+from mesmsage import journal
+from mesmsage import phone
+from mesmsage import roster
+from mesmsage import scheduler
+from mesmsage import search
+from mesmsage import sheets
+from mesmsage import shifts
+from mesmsage import sms
+from mesmsage import template
+from mesmsage import transport
+from mesmsage import util
+from mesmsage import webhook
+
+# allow for noise in the timing of small inputs when checking for linear scaling
+LINEAR_SCALING_TOLERANCE = 3
+
+# allow for the template path also finding the households that share a phone
+# number, which the concatenation of each individual's message never does
+HOUSEHOLD_TOLERANCE = 1.5
+
+
+def create_roster_dataframe(
+    individuals_count: int, activities_count: int, density: float = 0.05
+) -> pandas.DataFrame:
+    """Create a data frame of individuals with randomly checked activities."""
+    random = numpy.random.default_rng(seed=42)
+    roster = {
+        "Individual Name": [f"Individual {i}" for i in range(individuals_count)],
+        "Individual Phone Number": [
+            f"888-{i // 10000:03d}-{i % 10000:04d}" for i in range(individuals_count)
+        ],
+    }
+    for activity in range(activities_count):
+        roster[f"Shift {activity}"] = random.random(individuals_count) < density
+    return pandas.DataFrame(roster)
+
+
+def time_function(function, *arguments) -> float:
+    """Return the best elapsed time of several calls to the function."""
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        function(*arguments)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+@pytest.mark.benchmark
+def test_benchmark_individual_activities_scale_linearly():
+    """Ensure that getting the activities scales linearly with the number of cells."""
+    timings = {}
+    for individuals_count in [1000, 10000, 100000]:
+        dataframe = create_roster_dataframe(individuals_count, 100)
+        names = dataframe["Individual Name"].tolist()
+        timings[individuals_count] = time_function(
+            extract.get_individual_activities, dataframe, names
+        )
+        print(
+            f"get_individual_activities: {individuals_count * 100} cells"
+            f" in {timings[individuals_count]:.4f} seconds"
+        )
+    assert timings[100000] < timings[10000] * 10 * LINEAR_SCALING_TOLERANCE
+
+
+def get_individual_numbers_with_iterrows(
+    individuals_dataframe: pandas.DataFrame, chosen_individuals_list
+):
+    """Get the phone numbers of individuals by iterating through the rows."""
+    phone_numbers = individuals_dataframe.loc[
+        individuals_dataframe["Individual Name"].isin(chosen_individuals_list),
+        ["Individual Name", "Individual Phone Number"],
+    ]
+    phone_numbers_dictionary = {}
+    for _, row in phone_numbers.iterrows():
+        phone_numbers_dictionary[row["Individual Name"]] = row[
+            "Individual Phone Number"
+        ]
+    return phone_numbers_dictionary
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("individuals_count", [10000, 100000, 1000000])
+def test_benchmark_individual_numbers_faster_than_iterrows(individuals_count):
+    """Ensure that getting the phone numbers is faster than iterating through the rows."""
+    dataframe = create_roster_dataframe(individuals_count, 0)
+    names = dataframe["Individual Name"].tolist()
+    columnar_timing = time_function(extract.get_individual_numbers, dataframe, names)
+    start = time.perf_counter()
+    expected_phone_numbers = get_individual_numbers_with_iterrows(dataframe, names)
+    iterrows_timing = time.perf_counter() - start
+    print(
+        f"get_individual_numbers: {individuals_count} rows in {columnar_timing:.4f}"
+        f" seconds versus {iterrows_timing:.4f} seconds with iterrows"
+        f" ({iterrows_timing / columnar_timing:.1f}x speedup)"
+    )
+    assert extract.get_individual_numbers(dataframe, names) == expected_phone_numbers
+    assert columnar_timing < iterrows_timing
+
+
+@pytest.mark.benchmark
+def test_benchmark_roster_index_memory_smaller_than_dataframe():
+    """Ensure that the index of a wide and sparse roster is much smaller than its data frame."""
+    # create a roster of one million cells that stores a Python object in
+    # every cell, as is the case for a data frame made from a Google Sheet
+    dataframe = create_roster_dataframe(10000, 100).astype(object)
+    roster_index = extract.create_roster_index(dataframe)
+    # note that the shallow memory usage only counts the object pointers in the
+    # data frame and is thus a lower bound on the size of the data frame
+    dataframe_bytes = dataframe.memory_usage().sum()
+    print(
+        f"RosterIndex: {roster_index.nbytes / 2**20:.2f} MiB versus"
+        f" {dataframe_bytes / 2**20:.2f} MiB for the data frame"
+    )
+    assert roster_index.nbytes * 10 < dataframe_bytes
+
+
+def get_sms_messages_with_concatenation(number_dictionary, activities_dictionary):
+    """Create the messages by concatenating strings for every individual."""
+    sms_dictionary = {}
+    for name, activity in activities_dictionary.items():
+        sms_dictionary[number_dictionary[name]] = (
+            "Hello "
+            + name
+            + "! You are working the following shift(s) at the Motzing Center: "
+            + util.get_spiffy_list(activity)
+            + ". "
+            + "If you are unable to work any shift(s) please text Jessica at 814-573-3283. Thank you!"
+        )
+    return sms_dictionary
+
+
+@pytest.mark.benchmark
+def test_benchmark_sms_messages_template_with_repeated_activities():
+    """Ensure that the messages from the compiled template match concatenated messages."""
+    dataframe = create_roster_dataframe(100000, 20, density=0.1)
+    # the phone numbers are normalized when the sheet is loaded
+    phone.add_e164_numbers(dataframe)
+    names = dataframe["Individual Name"].tolist()
+    number_dictionary = extract.get_individual_numbers(dataframe, names)
+    activities_dictionary = extract.get_individual_activities(dataframe, names)
+    template_timing = time_function(
+        extract.get_sms_messages, number_dictionary, activities_dictionary
+    )
+    concatenation_timing = time_function(
+        get_sms_messages_with_concatenation, number_dictionary, activities_dictionary
+    )
+    print(
+        f"get_sms_messages: {len(activities_dictionary)} messages in"
+        f" {template_timing:.4f} seconds versus {concatenation_timing:.4f}"
+        f" seconds with concatenation; {template.get_activities_fragment.cache_info()}"
+    )
+    assert extract.get_sms_messages(
+        number_dictionary, activities_dictionary
+    ) == get_sms_messages_with_concatenation(number_dictionary, activities_dictionary)
+    assert template_timing < concatenation_timing * HOUSEHOLD_TOLERANCE
+
+
+@pytest.mark.benchmark
+def test_benchmark_typed_dataframe_memory_smaller_than_object_dataframe():
+    """Ensure that the typed data frame from a sheet uses less memory than an object data frame."""
+    # create the values of a sheet with checkboxes as the text of booleans
+    dataframe = create_roster_dataframe(10000, 100)
+    values = [dataframe.columns.tolist()] + [
+        [
+            ("TRUE" if cell else "FALSE") if isinstance(cell, bool) else cell
+            for cell in row
+        ]
+        for row in dataframe.itertuples(index=False)
+    ]
+    object_dataframe = pandas.DataFrame(values[1 : len(values)], columns=values[0])
+    typed_dataframe = sheets.create_dataframe(values)
+    object_bytes = object_dataframe.memory_usage(deep=True).sum()
+    typed_bytes = typed_dataframe.memory_usage(deep=True).sum()
+    print(
+        f"create_dataframe: {typed_bytes / 2**20:.2f} MiB versus"
+        f" {object_bytes / 2**20:.2f} MiB with object columns"
+        f" ({(object_bytes - typed_bytes) / 2**20:.2f} MiB saved)"
+    )
+    assert typed_bytes < object_bytes
+
+
+@pytest.mark.benchmark
+def test_benchmark_concurrent_sends_scale_with_workers(fake_twilio, monkeypatch):
+    """Ensure that the throughput of sending to a fake Twilio service grows with the workers."""
+    monkeypatch.setenv("TWILIO_PHONE_NUMBER", "814-555-0000")
+    # simulate the latency of a round trip to the Twilio service
+    fake_twilio.delay = 0.02
+    message_dictionary = {
+        f"888-{number // 10000:03d}-{number % 10000:04d}": f"Message {number}"
+        for number in range(200)
+    }
+    throughputs = {}
+    for workers in [1, 4, 16]:
+        start = time.perf_counter()
+        results = sms.send_messages_concurrently(
+            message_dictionary, workers, twilio_client=fake_twilio.client
+        )
+        throughputs[workers] = len(results) / (time.perf_counter() - start)
+        print(
+            f"send_messages_concurrently: {workers} worker(s) sent"
+            f" {throughputs[workers]:.1f} messages per second"
+        )
+    assert throughputs[4] > 2 * throughputs[1]
+    assert throughputs[16] > throughputs[4]
+
+
+@pytest.mark.benchmark
+def test_benchmark_sender_pool_throughput_scales_with_senders(fake_twilio, monkeypatch):
+    """Ensure that the throughput of rate limited sending grows with the senders in the pool."""
+    monkeypatch.delenv("TWILIO_MESSAGING_SERVICE_SID", raising=False)
+    # each sender can only send 50 messages per second
+    rate = 50.0
+    message_dictionary = {
+        f"888-{number // 10000:03d}-{number % 10000:04d}": f"Message {number}"
+        for number in range(300)
+    }
+    throughputs = {}
+    for senders_count in [1, 2, 4]:
+        monkeypatch.setenv(
+            "TWILIO_PHONE_NUMBERS",
+            ",".join(f"814-555-{number:04d}" for number in range(senders_count)),
+        )
+        start = time.perf_counter()
+        results = sms.send_messages_concurrently(
+            message_dictionary, 4, twilio_client=fake_twilio.client, rate=rate
+        )
+        throughputs[senders_count] = len(results) / (time.perf_counter() - start)
+        print(
+            f"send_messages_concurrently: {senders_count} sender(s) sent"
+            f" {throughputs[senders_count]:.1f} messages per second"
+        )
+    assert throughputs[2] > 1.5 * throughputs[1]
+    assert throughputs[4] > 1.5 * throughputs[2]
+
+
+@pytest.mark.benchmark
+def test_benchmark_pooled_connections_against_connection_per_message(
+    fake_twilio, monkeypatch
+):
+    """Ensure that sending over kept-alive connections is faster than connecting for every message."""
+    monkeypatch.setenv("TWILIO_PHONE_NUMBER", "814-555-0000")
+    workers = 4
+    message_dictionary = {
+        f"888-{number // 10000:03d}-{number % 10000:04d}": f"Message {number}"
+        for number in range(400)
+    }
+    http_clients = {
+        "connection per message": TwilioHttpClient(pool_connections=False),
+        "pooled connections": transport.PooledHttpClient(pool_size=workers),
+    }
+    throughputs = {}
+    for name, http_client in http_clients.items():
+        twilio_client = Client(
+            fake_twilio.client.account_sid, "fake-auth-token", http_client=http_client
+        )
+        twilio_client.api.base_url = fake_twilio.client.api.base_url
+        start = time.perf_counter()
+        results = sms.send_messages_concurrently(
+            message_dictionary, workers, twilio_client=twilio_client
+        )
+        throughputs[name] = len(results) / (time.perf_counter() - start)
+        print(
+            f"send_messages_concurrently: {name} sent"
+            f" {throughputs[name]:.1f} messages per second"
+        )
+    statistics = http_clients["pooled connections"].get_statistics()
+    print(
+        f"PooledHttpClient: {statistics.requests} request(s) over"
+        f" {statistics.connections} connection(s)"
+    )
+    assert statistics.requests == len(message_dictionary)
+    assert statistics.connections <= workers
+    assert throughputs["pooled connections"] > throughputs["connection per message"]
+
+
+@pytest.mark.benchmark
+def test_benchmark_normalized_numbers_are_not_parsed_when_sending(monkeypatch):
+    """Ensure that converting the normalized phone numbers when sending never parses them."""
+    individuals_dataframe = create_roster_dataframe(5000, 1)
+    phone.add_e164_numbers(individuals_dataframe)
+    e164_numbers = roster.RosterIndex(individuals_dataframe).numbers.tolist()
+    assert e164_numbers[0].startswith("+1")
+    # spy on the parsing of the numbers after forgetting the memoized numbers
+    # so that every one of the normalized numbers is converted again
+    parsed_numbers = []
+    parse = phonenumbers.parse
+
+    def spy_on_parse(number, *arguments, **keyword_arguments):
+        parsed_numbers.append(number)
+        return parse(number, *arguments, **keyword_arguments)
+
+    monkeypatch.setattr(phonenumbers, "parse", spy_on_parse)
+    phone.get_e164_number.cache_clear()
+    converted_numbers = [sms.get_e164_number(number) for number in e164_numbers]
+    print(
+        f"5000 phone numbers: {len(parsed_numbers)} parsed when converting"
+        f" {phone.get_e164_number.cache_info().misses} normalized number(s)"
+    )
+    assert converted_numbers == e164_numbers
+    assert parsed_numbers == []
+
+
+@pytest.mark.benchmark
+def test_benchmark_history_pages_of_million_messages(tmp_path):
+    """Ensure that a filtered page of a history of one million messages is found in under a second."""
+    connection = journal.connect(tmp_path / "journal.sqlite3")
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    messages_count = 1000000
+    with connection:
+        connection.executemany(
+            journal.UPSERT_MESSAGE,
+            (
+                (
+                    f"run {number // 1000}",
+                    f"+1888{number % 20000:07d}",
+                    "body",
+                    f"Individual {number % 20000}",
+                    f"SM{number}",
+                    "sent" if number % 10 else "failed",
+                    None,
+                    journal.format_timestamp(start + timedelta(seconds=30 * number)),
+                )
+                for number in range(messages_count)
+            ),
+        )
+    filters = [
+        {},
+        {"name": "Individual 42"},
+        {"phone_number": "+18880000042"},
+        {"status": "failed", "since": start + timedelta(days=100)},
+        {"since": start + timedelta(days=50), "until": start + timedelta(days=60)},
+    ]
+    for history_filter in filters:
+        # read the first page and then a page that follows a cursor
+        page_timing = time_function(
+            lambda: journal.get_history_page(connection, **history_filter)
+        )
+        cursor = journal.get_history_page(connection, **history_filter).cursor
+        next_page_timing = time_function(
+            lambda: journal.get_history_page(
+                connection, cursor=cursor, **history_filter
+            )
+        )
+        print(
+            f"get_history_page: {messages_count} messages filtered by"
+            f" {sorted(history_filter)} in {page_timing * 1e3:.2f} ms and the"
+            f" next page in {next_page_timing * 1e3:.2f} ms"
+        )
+        assert page_timing < 1
+        assert next_page_timing < 1
+    connection.close()
+
+
+@pytest.mark.benchmark
+def test_benchmark_status_callbacks_received_per_second(tmp_path):
+    """Ensure that the receiver of status callbacks handles thousands of callbacks per second."""
+    receiver = webhook.StatusReceiver(tmp_path / "journal.sqlite3", port=0)
+    receiver.start()
+    host, port = receiver.server_address[:2]
+    senders_count = 8
+    callbacks_count = 1000
+
+    def post_callbacks(sender):
+        """Post the callbacks for one sender over a connection that stays alive."""
+        connection = http.client.HTTPConnection(host, port)
+        for number in range(callbacks_count):
+            connection.request(
+                "POST",
+                "/",
+                urlencode(
+                    {
+                        "MessageSid": f"SM{sender}x{number}",
+                        "MessageStatus": "delivered",
+                        "To": "+18881115500",
+                    }
+                ),
+                {"Content-Type": "application/x-www-form-urlencoded"},
+            )
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 204
+        connection.close()
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(senders_count) as executor:
+        list(executor.map(post_callbacks, range(senders_count)))
+    receiving_timing = time.perf_counter() - start
+    receiver.stop()
+    recording_timing = time.perf_counter() - start
+    callbacks_total = senders_count * callbacks_count
+    print(
+        f"StatusReceiver: {callbacks_total / receiving_timing:.0f} callbacks per second"
+        f" received and {callbacks_total / recording_timing:.0f} per second recorded"
+    )
+    assert receiver.recorded == callbacks_total
+    assert callbacks_total / recording_timing > 1000
+
+
+def create_names(names_count: int):
+    """Create the names of individuals from random syllables."""
+    random = numpy.random.default_rng(seed=42)
+    syllables = ["ka", "pf", "ham", "mer", "jes", "si", "ca", "gre", "go", "ry"]
+    syllables = syllables + ["smi", "th", "mar", "bil", "lo", "an", "de", "ri"]
+
+    def create_word():
+        """Create a capitalized word from two to four syllables."""
+        count = random.integers(2, 5)
+        return "".join(random.choice(syllables, count)).capitalize()
+
+    return [f"{create_word()} {create_word()}" for _ in range(names_count)]
+
+
+@pytest.mark.benchmark
+def test_benchmark_name_search_latency_against_roster_size():
+    """Ensure that searching the indexed names is much faster than scoring every name."""
+    queries = ["k", "kap", "kapf", "gre smi", "hammer jes", "marbil"]
+    timings = {}
+    for names_count in [1000, 10000, 100000]:
+        names = create_names(names_count)
+        start = time.perf_counter()
+        name_index = search.NameIndex(names)
+        indexing_timing = time.perf_counter() - start
+        timings[names_count] = max(
+            time_function(name_index.search, query) for query in queries
+        )
+        print(
+            f"NameIndex: {names_count} names indexed in {indexing_timing:.3f} seconds"
+            f" with the slowest query in {timings[names_count] * 1e3:.2f} ms"
+        )
+    # score every name like the fuzzy prompt does for each keystroke
+    haystacks = [{"name": name} for name in names]
+    scoring_timing = time_function(
+        lambda: asyncio.run(fuzzy_match("kapf", haystacks, key="name"))
+    )
+    index_timing = time_function(name_index.search, "kapf")
+    print(
+        f"fuzzy_match: {len(names)} names scored in {scoring_timing * 1e3:.1f} ms"
+        f" versus {index_timing * 1e3:.2f} ms with the index"
+    )
+    assert index_timing * 10 < scoring_timing
+    # a keystroke is filtered well within the time between keystrokes
+    assert timings[100000] < 0.1
+
+
+@pytest.mark.benchmark
+def test_benchmark_window_activities_against_whole_season():
+    """Ensure that the activities in a window are found much faster than for the whole season."""
+    # create a season with four shifts on each day of the year
+    season_start = datetime(2021, 1, 1, 8)
+    headers = [
+        (season_start + timedelta(days=day, hours=hour)).strftime("%b %d %I:%M %p")
+        for day in range(365)
+        for hour in (0, 4, 8, 12)
+    ]
+    dataframe = create_roster_dataframe(20000, len(headers), density=0.01)
+    dataframe.columns = ["Individual Name", "Individual Phone Number"] + headers
+    roster_index = extract.create_roster_index(dataframe)
+    names = roster_index.names.tolist()
+    now = datetime(2021, 6, 1, 9)
+    start = time.perf_counter()
+    shift_index = shifts.ShiftIndex(roster_index.activity_columns, now)
+    indexing_timing = time.perf_counter() - start
+
+    def get_window_activities():
+        columns = shift_index.get_window_columns(timedelta(hours=24), now)
+        window_index = roster_index.restrict_activities(columns)
+        chosen_names = window_index.select(scheduled=True)
+        return extract.get_individual_activities(window_index, chosen_names)
+
+    window_timing = time_function(get_window_activities)
+    season_timing = time_function(
+        extract.get_individual_activities, roster_index, names
+    )
+    print(
+        f"ShiftIndex: {len(shift_index)} shifts indexed in {indexing_timing:.3f} seconds;"
+        f" activities in a window of 24h in {window_timing * 1e3:.2f} ms versus"
+        f" {season_timing * 1e3:.1f} ms for the whole season"
+    )
+    assert len(shift_index) == len(headers)
+    window_activities = get_window_activities()
+    assert window_activities
+    assert all(len(activities) <= 4 for activities in window_activities.values())
+    assert window_timing * 10 < season_timing
+
+
+@pytest.mark.benchmark
+def test_benchmark_warm_reminder_latency_against_cold_start():
+    """Ensure that a reminder from the resident roster is much faster than rebuilding the roster."""
+    season_start = datetime(2021, 1, 1, 8)
+    headers = [
+        (season_start + timedelta(days=day, hours=hour)).strftime("%b %d %I:%M %p")
+        for day in range(365)
+        for hour in (0, 4, 8, 12)
+    ]
+    dataframe = create_roster_dataframe(20000, len(headers), density=0.01)
+    dataframe.columns = ["Individual Name", "Individual Phone Number"] + headers
+    message_template = template.compile_template()
+    now = datetime(2021, 6, 1, 9)
+
+    def compose_reminders(roster_index, _):
+        names = roster_index.select(scheduled=True)
+        extract.coalesce_sms_messages(
+            extract.get_individual_numbers(roster_index, names),
+            extract.get_individual_activities(roster_index, names),
+            message_template,
+        )
+        # every composed message counts as sent
+        return 0
+
+    def cold_reminder():
+        roster_index = extract.create_roster_index(dataframe)
+        shift_index = shifts.ShiftIndex(roster_index.activity_columns, now)
+        columns = shift_index.get_window_columns(timedelta(hours=4), now)
+        return compose_reminders(roster_index.restrict_activities(columns), None)
+
+    roster_index = extract.create_roster_index(dataframe)
+    reminder_scheduler = scheduler.ReminderScheduler(
+        lambda: roster_index, compose_reminders, timedelta(hours=4)
+    )
+    reminder_scheduler.refresh(now - timedelta(days=1))
+    # fire the reminders for the following shifts one at a time like the daemon
+    warm_timings = []
+    for hour in range(1, 25):
+        start = time.perf_counter()
+        reminder_scheduler.run_pending(now + timedelta(hours=hour))
+        warm_timings.append(time.perf_counter() - start)
+    warm_timing = max(warm_timings)
+    cold_timing = time_function(cold_reminder)
+    print(
+        f"ReminderScheduler: slowest reminder in {warm_timing * 1e3:.2f} ms"
+        f" versus {cold_timing * 1e3:.1f} ms when rebuilding the roster"
+    )
+    assert warm_timing * 10 < cold_timing
+
+
+# the most time that starting the program to run a command that does not
+# download a spreadsheet or send messages may take, including the interpreter
+STARTUP_BUDGET = 0.5
+
+
+@pytest.mark.benchmark
+def test_benchmark_startup_of_commands_within_budget(tmp_path):
+    """Ensure that displaying the help and the history starts within the budget."""
+    journal_file = str(tmp_path / "journal.sqlite3")
+    project_directory = Path(__file__).parent.parent
+    for arguments in (["--help"], ["history", "--journal-file", journal_file]):
+
+        def run_command():
+            subprocess.run(
+                [sys.executable, "-m", "mesmsage", *arguments],
+                cwd=project_directory,
+                capture_output=True,
+                check=True,
+            )
+
+        startup_timing = time_function(run_command)
+        print(
+            f"mesmsage {arguments[0]}: started and finished in"
+            f" {startup_timing * 1e3:.0f} ms"
+        )
+        assert startup_timing < STARTUP_BUDGET
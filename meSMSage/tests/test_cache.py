@@ -0,0 +1,94 @@
+"""Test the functions in the cache module."""
+
+import os
+import stat
+
+from pathlib import Path
+
+import pandas
+import pytest
+
+from mesmsage import cache
+
+
+def test_get_cache_file_contains_spreadsheet_and_sheet():
+    """Ensure that the name of the cache file is derived from the spreadsheet and the sheet."""
+    cache_file = cache.get_cache_file(
+        cache.get_cache_directory(), "abc123", "Sheet 1/2"
+    )
+    assert cache_file.parent.name == "mesmsage"
+    assert cache_file.name == "abc123-Sheet_1_2.pickle"
+
+
+def test_write_and_read_cache(tmp_path):
+    """Ensure that a data frame written to the cache is read back with its revision."""
+    dataframe = pandas.DataFrame(
+        {"Individual Name": ["Gregory", "Jessica"], "Read Email": [True, False]}
+    )
+    cache_file = cache.get_cache_file(tmp_path / "cache", "abc123", "Sheet1")
+    cache.write_cache(cache_file, "42", dataframe)
+    revision, cached_dataframe = cache.read_cache(cache_file)
+    assert revision == "42"
+    pandas.testing.assert_frame_equal(cached_dataframe, dataframe)
+    assert list((tmp_path / "cache").iterdir()) == [cache_file]
+
+
+def test_read_cache_does_not_exist(tmp_path):
+    """Ensure that reading a cache file that does not exist produces an empty cache."""
+    revision, dataframe = cache.read_cache(tmp_path / "missing.pickle")
+    assert revision is None
+    assert dataframe is None
+
+
+def test_read_cache_is_corrupt(tmp_path):
+    """Ensure that reading a corrupt cache file produces an empty cache."""
+    cache_file = tmp_path / "corrupt.pickle"
+    cache_file.write_bytes(b"not a pickle")
+    revision, dataframe = cache.read_cache(cache_file)
+    assert revision is None
+    assert dataframe is None
+
+
+def test_get_cache_file_for_projection_is_separate():
+    """Ensure that the cache file for part of a worksheet is not the one for the worksheet."""
+    cache_directory = cache.get_cache_directory()
+    complete_cache_file = cache.get_cache_file(cache_directory, "abc123", "Sheet1")
+    projected_cache_file = cache.get_cache_file(
+        cache_directory, "abc123", "Sheet1", "['Monday']"
+    )
+    assert projected_cache_file != complete_cache_file
+    assert projected_cache_file.name.startswith("abc123-Sheet1-")
+    assert projected_cache_file == cache.get_cache_file(
+        cache_directory, "abc123", "Sheet1", "['Monday']"
+    )
+
+
+def test_get_cache_directory_is_in_user_cache_home(monkeypatch, tmp_path):
+    """Ensure that the default cache directory is in the user's cache directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert cache.get_cache_directory() == tmp_path / "mesmsage"
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    assert cache.get_cache_directory() == Path.home() / ".cache" / "mesmsage"
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="requires POSIX permissions")
+def test_write_cache_is_private(tmp_path):
+    """Ensure that only the current user may read or write the cache directory and file."""
+    cache_file = cache.get_cache_file(tmp_path / "cache", "abc123", "Sheet1")
+    cache.write_cache(cache_file, "42", pandas.DataFrame({"A": [1]}))
+    assert stat.S_IMODE(cache_file.parent.stat().st_mode) == 0o700
+    assert stat.S_IMODE(cache_file.stat().st_mode) == 0o600
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="requires POSIX permissions")
+def test_read_cache_ignores_file_that_others_may_write(tmp_path):
+    """Ensure that a cache file that others may write is never unpickled."""
+    cache_file = cache.get_cache_file(tmp_path / "cache", "abc123", "Sheet1")
+    cache.write_cache(cache_file, "42", pandas.DataFrame({"A": [1]}))
+    cache_file.chmod(0o666)
+    assert cache.read_cache(cache_file) == (None, None)
+    cache_file.chmod(0o600)
+    cache_file.parent.chmod(0o777)
+    assert cache.read_cache(cache_file) == (None, None)
+    cache_file.parent.chmod(0o700)
+    assert cache.read_cache(cache_file)[0] == "42"
@@ -11,6 +11,7 @@ def test_dataframes_constant_defined():
     """Check correctness for the variables in the dataframes constant."""
     assert constants.dataframes.Index == "index"
     assert constants.dataframes.List == "list"
+    assert constants.dataframes.String == "string"
 
 
 def test_dataframes_constant_cannot_redefine():
@@ -19,12 +20,21 @@ def test_dataframes_constant_cannot_redefine():
         constants.dataframes.Index = CANNOT_SET_CONSTANT_VARIABLE
     with pytest.raises(AttributeError):
         constants.dataframes.List = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.dataframes.String = CANNOT_SET_CONSTANT_VARIABLE
 
 
 def test_environment_constant_defined():
     """Check correctness for the variables in the environment constant."""
+    assert constants.environment.Cache_Home == "XDG_CACHE_HOME"
+    assert constants.environment.Local_App_Data == "LOCALAPPDATA"
     assert constants.environment.Recipient_Phone_Number == "RECIPIENT_PHONE_NUMBER"
+    assert constants.environment.Twilio_Auth_Token == "TWILIO_AUTH_TOKEN"
     assert constants.environment.Twilio_Phone_Number == "TWILIO_PHONE_NUMBER"
+    assert constants.environment.Twilio_Phone_Numbers == "TWILIO_PHONE_NUMBERS"
+    assert (
+        constants.environment.Twilio_Messaging_Service == "TWILIO_MESSAGING_SERVICE_SID"
+    )
 
 
 def test_environment_constant_cannot_redefine():
@@ -33,17 +43,67 @@ def test_environment_constant_cannot_redefine():
         constants.environment.Recipient_Phone_Number = CANNOT_SET_CONSTANT_VARIABLE
     with pytest.raises(AttributeError):
         constants.environment.Twilio_Phone_Number = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.environment.Twilio_Phone_Numbers = CANNOT_SET_CONSTANT_VARIABLE
 
 
 def test_files_constant_defined():
     """Check correctness for the variables in the files constant."""
+    assert constants.files.Cache == "mesmsage"
+    assert constants.files.Cache_Extension == ".pickle"
+    assert constants.files.Cache_Home == ".cache"
     assert constants.files.Env == ".env"
+    assert constants.files.Journal == "journal.sqlite3"
+    assert constants.files.Private_Directory_Mode == 0o700
+    assert constants.files.Private_File_Mode == 0o600
+    assert constants.files.Shared_Write_Mode == 0o022
+    assert constants.files.Temporary_Extension == ".tmp"
+    assert constants.files.Windows == "nt"
 
 
 def test_files_constant_cannot_redefine():
     """Check cannot redefine the variables in the files constant."""
     with pytest.raises(AttributeError):
         constants.files.Env = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.files.Cache = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.files.Cache_Extension = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.files.Temporary_Extension = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.files.Journal = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.files.Private_File_Mode = CANNOT_SET_CONSTANT_VARIABLE
+
+
+def test_journal_constant_defined():
+    """Check correctness for the variables in the journal constant."""
+    assert constants.journal.Batch_Size == 100
+    assert constants.journal.Delete_Batch_Size == 10000
+    assert constants.journal.Failed == "failed"
+    assert constants.journal.Page_Size == 20
+    assert constants.journal.Retention_Days == 365
+    assert constants.journal.Run_Format == "%Y%m%dT%H%M%S"
+    assert constants.journal.Sent == "sent"
+    assert constants.journal.Status_Page_Size == 1000
+    assert constants.journal.Synced_Run == "twilio"
+
+
+def test_journal_constant_cannot_redefine():
+    """Check cannot redefine the variables in the journal constant."""
+    with pytest.raises(AttributeError):
+        constants.journal.Batch_Size = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.journal.Failed = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.journal.Page_Size = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.journal.Retention_Days = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.journal.Sent = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.journal.Synced_Run = CANNOT_SET_CONSTANT_VARIABLE
 
 
 def test_locations_constant_defined():
@@ -95,10 +155,13 @@ def test_markers_constant_defined():
     """Check correctness for the variables in the markers constant."""
     assert constants.markers.All_Individuals == "All Individuals"
     assert constants.markers.Empty == b""
+    assert constants.markers.Comma == ","
+    assert constants.markers.Comment == "#"
     assert constants.markers.Indent == "  "
     assert constants.markers.In_A_File == "in a file"
     assert constants.markers.Newline == "\n"
     assert constants.markers.Nothing == ""
+    assert constants.markers.Separator == "-"
     assert constants.markers.Space == " "
 
 
@@ -116,6 +179,8 @@ def test_markers_constant_cannot_redefine():
         constants.markers.Newline = CANNOT_SET_CONSTANT_VARIABLE
     with pytest.raises(AttributeError):
         constants.markers.Nothing = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.markers.Separator = CANNOT_SET_CONSTANT_VARIABLE
     with pytest.raises(AttributeError):
         constants.markers.Space = CANNOT_SET_CONSTANT_VARIABLE
 
@@ -142,23 +207,129 @@ def test_messages_constant_defined():
     assert (
         constants.messages.Sms_Did_Not_Work == "Sending SMS with Twilio did not work:"
     )
+    assert constants.messages.Sender_Not_Set.startswith("There is no Twilio")
 
 
 def test_messages_constant_cannot_redefine():
     """Check cannot redefine the variables in the messages constant."""
     with pytest.raises(AttributeError):
         constants.messages.Sms_Did_Not_Work = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.messages.Number_Not_Valid = CANNOT_SET_CONSTANT_VARIABLE
+
+
+def test_phone_constant_defined():
+    """Check correctness for the variables in the phone constant."""
+    assert constants.phone.Maximum_E164_Length == 16
+    assert constants.phone.Plus == "+"
+    assert constants.phone.Zero == "0"
+
+
+def test_phone_constant_cannot_redefine():
+    """Check cannot redefine the variables in the phone constant."""
+    with pytest.raises(AttributeError):
+        constants.phone.Maximum_E164_Length = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.phone.Plus = CANNOT_SET_CONSTANT_VARIABLE
+
+
+def test_rates_constant_defined():
+    """Check correctness for the variables in the rates constant."""
+    assert constants.rates.Base_Delay == 1.0
+    assert constants.rates.Increase_Fraction == 0.05
+    assert constants.rates.Maximum_Attempts == 5
+    assert constants.rates.Maximum_Delay == 60.0
+    assert constants.rates.Minimum_Fraction == 0.1
+    assert constants.rates.Response_Hook == "response"
+    assert constants.rates.Retry_After == "Retry-After"
+    assert constants.rates.Server_Error == 500
+    assert constants.rates.Too_Many_Requests == 429
+
+
+def test_rates_constant_cannot_redefine():
+    """Check cannot redefine the variables in the rates constant."""
+    with pytest.raises(AttributeError):
+        constants.rates.Base_Delay = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.rates.Maximum_Attempts = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.rates.Retry_After = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.rates.Too_Many_Requests = CANNOT_SET_CONSTANT_VARIABLE
+
+
+def test_scheduler_constant_defined():
+    """Check correctness for the variables in the scheduler constant."""
+    assert constants.scheduler.Lead == "24h"
+    assert constants.scheduler.Maximum_Retry_Delay == 3600.0
+    assert constants.scheduler.Refresh_Interval == 300
+    assert constants.scheduler.Remind_At_Format == "%H:%M"
+    assert constants.scheduler.Retry_Delay == 60.0
+    assert constants.scheduler.Run_Prefix == "serve"
+
+
+def test_scheduler_constant_cannot_redefine():
+    """Check cannot redefine the variables in the scheduler constant."""
+    with pytest.raises(AttributeError):
+        constants.scheduler.Lead = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.scheduler.Run_Prefix = CANNOT_SET_CONSTANT_VARIABLE
+
+
+def test_segments_constant_defined():
+    """Check correctness for the variables in the segments constant."""
+    assert constants.segments.Extension_Units == 2
+    assert constants.segments.Gsm7_Multiple == 153
+    assert constants.segments.Gsm7_Single == 160
+    assert constants.segments.Maximum_Basic_Character == 0xFFFF
+    assert constants.segments.Single_Unit == 1
+    assert constants.segments.Surrogate_Units == 2
+    assert constants.segments.Ucs2_Multiple == 67
+    assert constants.segments.Ucs2_Single == 70
+
+
+def test_segments_constant_cannot_redefine():
+    """Check cannot redefine the variables in the segments constant."""
+    with pytest.raises(AttributeError):
+        constants.segments.Gsm7_Single = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.segments.Ucs2_Single = CANNOT_SET_CONSTANT_VARIABLE
+
+
+def test_senders_constant_defined():
+    """Check correctness for the variables in the senders constant."""
+    assert constants.senders.Messaging_Service_Prefix == "MG"
+
+
+def test_senders_constant_cannot_redefine():
+    """Check cannot redefine the variables in the senders constant."""
+    with pytest.raises(AttributeError):
+        constants.senders.Messaging_Service_Prefix = CANNOT_SET_CONSTANT_VARIABLE
 
 
 def test_sizes_constant_defined():
     """Check correctness for the variables in the sizes constant."""
+    assert constants.sizes.Buffer == 100
+    assert constants.sizes.Buffer_Wait == 0.1
+    assert constants.sizes.Hash == 12
+    assert constants.sizes.Month_Prefix == 3
+    assert constants.sizes.Run == 8
+    assert constants.sizes.Number_Cache == 65536
+    assert constants.sizes.Workers == 8
     assert constants.sizes.First == 0
     assert constants.sizes.Singleton == 1
     assert constants.sizes.Tab == 4
+    assert constants.sizes.Trigram == 3
 
 
 def test_sizes_constant_cannot_redefine():
     """Check cannot redefine the variables in the sizes constant."""
+    with pytest.raises(AttributeError):
+        constants.sizes.Buffer = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.sizes.Hash = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.sizes.Workers = CANNOT_SET_CONSTANT_VARIABLE
     with pytest.raises(AttributeError):
         constants.progress.First = CANNOT_SET_CONSTANT_VARIABLE
     with pytest.raises(AttributeError):
@@ -167,12 +338,50 @@ def test_sizes_constant_cannot_redefine():
         constants.progress.Tab = CANNOT_SET_CONSTANT_VARIABLE
 
 
+def test_templates_constant_defined():
+    """Check correctness for the variables in the templates constant."""
+    assert constants.templates.Activities == "activities"
+    assert constants.templates.Cache_Size == 1024
+    assert constants.templates.Household_Format == "{activities} ({name})"
+    assert constants.templates.Household_Separator == "; "
+    assert constants.templates.Maximum_Length == 1600
+    assert constants.templates.Default.startswith("Hello {name}!")
+    assert constants.templates.Name == "name"
+    assert constants.templates.Placeholders == ("name", "activities")
+
+
+def test_templates_constant_cannot_redefine():
+    """Check cannot redefine the variables in the templates constant."""
+    with pytest.raises(AttributeError):
+        constants.templates.Activities = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.templates.Cache_Size = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.templates.Default = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.templates.Name = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.templates.Placeholders = CANNOT_SET_CONSTANT_VARIABLE
+
+
 def test_sheets_constant_defined():
     """Check correctness for the variables in the sheets constant."""
+    assert constants.sheets.Checked == "TRUE"
     assert constants.sheets.Default == "Sheet1"
     assert constants.sheets.Name == "Individual Name"
     assert constants.sheets.Name_Prompt == "individual's name"
     assert constants.sheets.Number == "Individual Phone Number"
+    assert constants.sheets.Number_E164 == "Individual Phone Number E164"
+    assert constants.sheets.Revision_Fields == "version"
+    assert constants.sheets.Columns == "COLUMNS"
+    assert constants.sheets.Rows == "ROWS"
+    assert constants.sheets.Formatted_Value == "FORMATTED_VALUE"
+    assert constants.sheets.Header_Row == "1:1"
+    assert constants.sheets.Quote == "'"
+    assert constants.sheets.Sheet_Separator == "!"
+    assert constants.sheets.Value_Ranges == "valueRanges"
+    assert constants.sheets.Values == "values"
+    assert constants.sheets.Unchecked == "FALSE"
 
 
 def test_sheets_constant_cannot_redefine():
@@ -185,3 +394,58 @@ def test_sheets_constant_cannot_redefine():
         constants.sheets.Name_Prompt = CANNOT_SET_CONSTANT_VARIABLE
     with pytest.raises(AttributeError):
         constants.sheets.Number = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.sheets.Checked = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.sheets.Unchecked = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.sheets.Revision_Fields = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.sheets.Columns = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.sheets.Rows = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.sheets.Formatted_Value = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.sheets.Value_Ranges = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.sheets.Values = CANNOT_SET_CONSTANT_VARIABLE
+
+
+def test_webhook_constant_defined():
+    """Check correctness for the variables in the webhook constant."""
+    assert constants.webhook.Batch_Size == 500
+    assert constants.webhook.Error_Code == "ErrorCode"
+    assert constants.webhook.Flush_Interval == 0.25
+    assert constants.webhook.Host == "127.0.0.1"
+    assert constants.webhook.Message_Sid == "MessageSid"
+    assert constants.webhook.Message_Status == "MessageStatus"
+    assert constants.webhook.Port == 8080
+    assert constants.webhook.Signature == "X-Twilio-Signature"
+    assert constants.webhook.To == "To"
+
+
+def test_webhook_constant_cannot_redefine():
+    """Check cannot redefine the variables in the webhook constant."""
+    with pytest.raises(AttributeError):
+        constants.webhook.Batch_Size = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.webhook.Flush_Interval = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.webhook.Port = CANNOT_SET_CONSTANT_VARIABLE
+
+
+def test_transport_constant_defined():
+    """Check correctness for the variables in the transport constant."""
+    assert constants.transport.Connect_Timeout == 5.0
+    assert constants.transport.Hosts == 4
+    assert constants.transport.Read_Timeout == 30.0
+    assert constants.transport.Schemes == ("http", "https")
+
+
+def test_transport_constant_cannot_redefine():
+    """Check cannot redefine the variables in the transport constant."""
+    with pytest.raises(AttributeError):
+        constants.transport.Connect_Timeout = CANNOT_SET_CONSTANT_VARIABLE
+    with pytest.raises(AttributeError):
+        constants.transport.Read_Timeout = CANNOT_SET_CONSTANT_VARIABLE
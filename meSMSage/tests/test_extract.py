@@ -1,10 +1,12 @@
 """Test the functions in the extract module."""
 
+import numpy
 import pandas
 
 import pytest
 
 from mesmsage import extract
+from mesmsage import template
 
 
 def test_convert_series_to_list():
@@ -206,3 +208,217 @@ def test_extract_individual_activities_single_individuals_no_activities():
     )
     assert individual_activities is not None
     assert len(individual_activities.keys()) == 0
+
+
+def test_extract_individual_activities_numpy_booleans_and_repeated_individual():
+    """Ensure that activities are found for numpy booleans and collected across repeated rows."""
+    dataframe = pandas.DataFrame(
+        {
+            "Individual Name": ["Gregory", "Jessica", "Gregory"],
+            "Individual Phone Number": ["888-111-5555", "888-222-5555", "888-111-5555"],
+            "Read Email": numpy.array([True, False, False]),
+            "Wash Car": numpy.array([False, True, True]),
+            "Write Python": [True, False, "TRUE"],
+        }
+    )
+    individual_names_list = ["Gregory", "Jessica"]
+    individual_activities = extract.get_individual_activities(
+        dataframe, individual_names_list
+    )
+    assert individual_activities is not None
+    assert list(individual_activities.keys()) == ["Gregory", "Jessica"]
+    assert individual_activities["Gregory"] == [
+        "Read Email",
+        "Write Python",
+        "Wash Car",
+    ]
+    assert individual_activities["Jessica"] == ["Wash Car"]
+
+
+def test_get_sms_messages_default_template():
+    """Ensure that the messages are created with the default template."""
+    number_dictionary = {"Gregory": "888-111-5555", "Jessica": "888-222-5555"}
+    activities_dictionary = {"Gregory": ["Read Email", "Wash Car"]}
+    sms_messages = extract.get_sms_messages(number_dictionary, activities_dictionary)
+    assert sms_messages == {
+        "888-111-5555": "Hello Gregory! You are working the following shift(s) at the"
+        " Motzing Center: Read Email, and Wash Car. If you are unable to work any"
+        " shift(s) please text Jessica at 814-573-3283. Thank you!"
+    }
+
+
+def test_get_sms_messages_provided_template():
+    """Ensure that the messages are created with a provided template."""
+    number_dictionary = {"Gregory": "888-111-5555", "Jessica": "888-222-5555"}
+    activities_dictionary = {"Gregory": ["Read Email"], "Jessica": ["Wash Car"]}
+    message_template = template.compile_template("{name}: {activities}")
+    sms_messages = extract.get_sms_messages(
+        number_dictionary, activities_dictionary, message_template
+    )
+    assert sms_messages == {
+        "888-111-5555": "Gregory: Read Email",
+        "888-222-5555": "Jessica: Wash Car",
+    }
+
+
+def test_get_sms_messages_template_without_placeholders():
+    """Ensure that a template without placeholders creates a message for each individual."""
+    number_dictionary = {"Gregory": "888-111-5555", "Jessica": "888-222-5555"}
+    activities_dictionary = {"Gregory": ["Read Email"], "Jessica": ["Wash Car"]}
+    message_template = template.compile_template("The center is closed today.")
+    sms_messages = extract.get_sms_messages(
+        number_dictionary, activities_dictionary, message_template
+    )
+    assert sms_messages == {
+        "888-111-5555": "The center is closed today.",
+        "888-222-5555": "The center is closed today.",
+    }
+
+
+def test_generate_individual_activities_in_sheet_order():
+    """Ensure that the individuals and their activities are generated in the order of the sheet."""
+    dataframe = pandas.DataFrame(
+        {
+            "Individual Name": ["Gregory", "Jessica", "Madelyn", "Gregory"],
+            "Individual Phone Number": [
+                "888-111-5555",
+                "888-222-5555",
+                "888-333-5555",
+                "888-444-5555",
+            ],
+            "Read Email": [True, False, True, False],
+            "Wash Car": [False, False, True, True],
+        }
+    )
+    individual_activities = list(
+        extract.generate_individual_activities(
+            dataframe, ["Madelyn", "Jessica", "Gregory", "Not There"]
+        )
+    )
+    assert individual_activities == [
+        ("Gregory", "888-444-5555", ["Read Email", "Wash Car"]),
+        ("Madelyn", "888-333-5555", ["Read Email", "Wash Car"]),
+    ]
+
+
+def test_generate_sms_messages_matches_get_sms_messages():
+    """Ensure that the generated messages are the same as the dictionary of messages."""
+    number_dictionary = {"Gregory": "888-111-5555", "Jessica": "888-222-5555"}
+    activities_dictionary = {"Gregory": ["Read Email"], "Jessica": ["Wash Car"]}
+    individual_activities = [
+        (name, number_dictionary[name], activities)
+        for name, activities in activities_dictionary.items()
+    ]
+    sms_messages = dict(extract.generate_sms_messages(individual_activities))
+    assert sms_messages == extract.get_sms_messages(
+        number_dictionary, activities_dictionary
+    )
+
+
+def test_get_sms_messages_shared_phone_number_not_overwritten():
+    """Ensure that individuals who share a phone number receive one combined message."""
+    number_dictionary = {"Gregory": "888-111-5555", "Jessica": "(888) 111-5555"}
+    activities_dictionary = {"Gregory": ["Read Email"], "Jessica": ["Wash Car"]}
+    message_template = template.compile_template("{name}: {activities}")
+    sms_messages = extract.get_sms_messages(
+        number_dictionary, activities_dictionary, message_template
+    )
+    assert sms_messages == {
+        "888-111-5555": "Gregory, and Jessica: Read Email (Gregory); Wash Car (Jessica)"
+    }
+
+
+def test_coalesce_sms_messages_shared_activities():
+    """Ensure that a household working the same shift(s) has one list of activities."""
+    number_dictionary = {
+        "Gregory": "+18881115555",
+        "Jessica": "+18881115555",
+        "Madelyn": "+18883335555",
+    }
+    activities_dictionary = {
+        "Gregory": ["Read Email", "Wash Car"],
+        "Madelyn": ["Wash Car"],
+        "Jessica": ["Read Email", "Wash Car"],
+    }
+    message_template = template.compile_template("{name}: {activities}")
+    sms_messages = extract.coalesce_sms_messages(
+        number_dictionary, activities_dictionary, message_template
+    )
+    assert sms_messages == [
+        ("+18881115555", "Gregory, and Jessica: Read Email, and Wash Car"),
+        ("+18883335555", "Madelyn: Wash Car"),
+    ]
+
+
+def test_coalesce_sms_messages_splits_messages_that_are_too_long():
+    """Ensure that a household whose combined message is too long receives several messages."""
+    names = ["Gregory", "Jessica", "Madelyn"]
+    number_dictionary = {name: "888-111-5555" for name in names}
+    activities_dictionary = {name: [f"Shift for {name}"] for name in names}
+    message_template = template.compile_template("{name}: {activities}")
+    sms_messages = extract.coalesce_sms_messages(
+        number_dictionary, activities_dictionary, message_template, maximum_length=80
+    )
+    assert sms_messages == [
+        (
+            "888-111-5555",
+            "Gregory, and Jessica: Shift for Gregory (Gregory); Shift for Jessica (Jessica)",
+        ),
+        ("888-111-5555", "Madelyn: Shift for Madelyn"),
+    ]
+    assert all(len(message) <= 80 for _, message in sms_messages)
+
+
+def test_coalesce_sms_messages_single_individual_is_never_split():
+    """Ensure that the message for a single individual is sent even when it is too long."""
+    sms_messages = extract.coalesce_sms_messages(
+        {"Gregory": "888-111-5555"},
+        {"Gregory": ["Read Email"]},
+        maximum_length=10,
+    )
+    assert len(sms_messages) == 1
+
+
+def test_generate_coalesced_sms_messages_waits_for_household():
+    """Ensure that a streamed household receives one message once its last individual is found."""
+    number_dictionary = {
+        "Gregory": "888-111-5555",
+        "Madelyn": "888-333-5555",
+        "Jessica": "(888) 111-5555",
+        "Simon": "888-444-5555",
+        "Violet": "888-444-5555",
+    }
+    individual_activities = iter(
+        [
+            ("Gregory", "888-111-5555", ["Read Email"]),
+            ("Madelyn", "888-333-5555", ["Wash Car"]),
+            ("Jessica", "(888) 111-5555", ["Read Email"]),
+            ("Simon", "888-444-5555", ["Wash Car"]),
+        ]
+    )
+    message_template = template.compile_template("{name}: {activities}")
+    sms_messages = extract.generate_coalesced_sms_messages(
+        individual_activities, number_dictionary, message_template
+    )
+    # the message for an individual who does not share a number is not delayed
+    assert next(sms_messages) == ("888-333-5555", "Madelyn: Wash Car")
+    assert list(sms_messages) == [
+        ("888-111-5555", "Gregory, and Jessica: Read Email"),
+        # an individual in a household without any activities is never found
+        ("888-444-5555", "Simon: Wash Car"),
+    ]
+
+
+def test_extract_get_phone_numbers_does_not_index_data_frame(monkeypatch):
+    """Ensure that the phone numbers are read from the columns of a data frame without an index."""
+    dataframe = pandas.DataFrame(
+        {
+            "Individual Name": ["Gregory", "Jessica", "Madelyn"],
+            "Individual Phone Number": ["888-111-5555", "888-222-5555", "888-333-5555"],
+            "Individual Phone Number E164": ["+18881115555", None, "+18883335555"],
+            "Wash Car": ["TRUE", "FALSE", "TRUE"],
+        }
+    )
+    monkeypatch.setattr(extract, "create_roster_index", None)
+    phone_numbers = extract.get_individual_numbers(dataframe, ["Jessica", "Madelyn"])
+    assert phone_numbers == {"Jessica": "888-222-5555", "Madelyn": "+18883335555"}
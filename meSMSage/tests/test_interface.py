@@ -1,5 +1,9 @@
 """Test the functions in the interface module."""
 
+from prompt_toolkit.application import create_app_session
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+
 from mesmsage import constants
 from mesmsage import interface
 
@@ -45,3 +49,28 @@ def test_not_select_all_individuals_two_of_choice():
     assert len(final_list) == 2
     assert "First Person" in final_list
     assert "Second Person" in final_list
+
+
+def test_fuzzy_selection_filters_with_index():
+    """Ensure that the fuzzy selector filters the choices with the index as the text is typed."""
+    source = [
+        constants.markers.All_Individuals,
+        "Jessica Smith",
+        "Gregory Kapfhammer",
+        "Bill Kap",
+    ]
+    with create_pipe_input() as pipe_input:
+        with create_app_session(input=pipe_input, output=DummyOutput()):
+            # type part of a name, select the first match, and confirm it
+            pipe_input.send_text("kap\t\r")
+            assert interface.perform_fuzzy_selection(source) == ["Gregory Kapfhammer"]
+
+
+def test_read_recipients_file_skips_blank_lines_and_comments(tmp_path):
+    """Ensure that the names are read from a file without blank lines and comments."""
+    recipients_file = tmp_path / "recipients.txt"
+    recipients_file.write_text("# volunteers\nGregory M. Kapfhammer\n\n  Jessica  \n")
+    assert interface.read_recipients_file(recipients_file) == [
+        "Gregory M. Kapfhammer",
+        "Jessica",
+    ]
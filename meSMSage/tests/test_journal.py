@@ -0,0 +1,324 @@
+"""Test suite for the journal module."""
+
+import sqlite3
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+import pytest
+
+from mesmsage import constants
+from mesmsage import journal
+from mesmsage import sms
+
+
+def create_messages(count):
+    """Create the {phone number, message} pairs for count individuals."""
+    return [(f"888-111-55{number:02d}", f"Message {number}") for number in range(count)]
+
+
+def test_create_run_id_is_unique_and_sortable():
+    """Ensure that run identifiers are distinct and start with the time of the run."""
+    first = journal.create_run_id()
+    second = journal.create_run_id()
+    assert first != second
+    assert first[:8].isdigit()
+    assert len(first.split(constants.markers.Separator)[1]) == constants.sizes.Run
+
+
+def test_get_body_hash_identifies_body():
+    """Ensure that the hash of a body is stable and different for another body."""
+    assert journal.get_body_hash("Hello") == journal.get_body_hash("Hello")
+    assert journal.get_body_hash("Hello") != journal.get_body_hash("Hello!")
+    assert len(journal.get_body_hash("Hello")) == constants.sizes.Hash
+
+
+def test_connect_uses_write_ahead_logging(tmp_path):
+    """Ensure that the journal is created in the write-ahead logging mode."""
+    connection = journal.connect(tmp_path / "journal" / constants.files.Journal)
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    connection.close()
+
+
+def test_send_journal_commits_in_batches(tmp_path):
+    """Ensure that results are committed once a batch is full and when closing."""
+    journal_file = tmp_path / constants.files.Journal
+    send_journal = journal.SendJournal(journal_file, "run", batch_size=3)
+    tracked = list(send_journal.track(create_messages(4), {"888-111-5500": "Gregory"}))
+    assert len(tracked) == 4
+    for number in range(4):
+        send_journal.record(f"SM{number}")
+    reader = sqlite3.connect(str(journal_file))
+    assert reader.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 3
+    send_journal.close()
+    assert reader.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 4
+    assert reader.execute(
+        "SELECT name, sid, status FROM messages WHERE phone_number = '888-111-5500'"
+    ).fetchone() == ("Gregory", "SM0", constants.journal.Sent)
+    reader.close()
+
+
+def test_send_journal_skips_messages_sent_in_run(tmp_path):
+    """Ensure that resuming a run only tracks the messages that were not sent."""
+    journal_file = tmp_path / constants.files.Journal
+    with journal.SendJournal(journal_file, "run") as send_journal:
+        list(send_journal.track(create_messages(3)))
+        assert send_journal.record("SM0") == "888-111-5500"
+        assert send_journal.record(None, "not valid") == "888-111-5501"
+        assert send_journal.record("SM2") == "888-111-5502"
+    with journal.SendJournal(journal_file, "run") as send_journal:
+        tracked = list(send_journal.track(create_messages(3)))
+        assert tracked == [("888-111-5501", "Message 1")]
+        assert send_journal.skipped == 2
+    # a different run, or a changed message, is not skipped
+    with journal.SendJournal(journal_file, "other") as send_journal:
+        assert len(list(send_journal.track(create_messages(3)))) == 3
+    with journal.SendJournal(journal_file, "run") as send_journal:
+        changed = [("888-111-5500", "Changed Message")]
+        assert list(send_journal.track(changed)) == changed
+
+
+def test_run_exists(tmp_path):
+    """Ensure that only a run with messages in the journal exists."""
+    journal_file = tmp_path / constants.files.Journal
+    assert journal.run_exists(journal_file, "run") is False
+    with journal.SendJournal(journal_file, "run") as send_journal:
+        list(send_journal.track(create_messages(1)))
+        send_journal.record("SM0")
+    assert journal.run_exists(journal_file, "run") is True
+    assert journal.run_exists(journal_file, "other") is False
+
+
+def test_resume_interrupted_send_fake_twilio(tmp_path, fake_twilio, monkeypatch):
+    """Ensure that resuming an interrupted run sends only the messages that were not sent."""
+    monkeypatch.setenv(constants.environment.Twilio_Phone_Number, "814-555-0000")
+    monkeypatch.setattr(sms, "client", fake_twilio.client)
+    fake_twilio.failing_numbers = {"+18881115503"}
+    journal_file = tmp_path / constants.files.Journal
+    messages = create_messages(6)
+    # the first attempt stops at the message that cannot be sent
+    with journal.SendJournal(journal_file, "run") as send_journal:
+        with pytest.raises(sms.TwilioCommunicationError):
+            for sid in sms.send_message_stream(
+                send_journal.track(messages), buffer_size=1
+            ):
+                send_journal.record(sid)
+        send_journal.record(None, "not valid")
+    assert len(fake_twilio.messages) == 3
+    # the resumed attempt sends the rest of the messages exactly once
+    fake_twilio.failing_numbers = set()
+    with journal.SendJournal(journal_file, "run") as send_journal:
+        for sid in sms.send_message_stream(send_journal.track(messages)):
+            send_journal.record(sid)
+        assert send_journal.skipped == 3
+    sent_numbers = [message["to"] for message in fake_twilio.messages]
+    assert sorted(sent_numbers) == [f"+188811155{number:02d}" for number in range(6)]
+
+
+def create_history(connection, count, start=datetime(2026, 1, 1, tzinfo=timezone.utc)):
+    """Record count messages, each sent one hour after the previous one."""
+    rows = [
+        (
+            "run",
+            f"+18881115{number % 3:03d}",
+            f"{number:012d}",
+            f"Individual {number % 3}",
+            f"SM{number}" if number % 4 else None,
+            constants.journal.Sent if number % 4 else constants.journal.Failed,
+            None if number % 4 else "not valid",
+            journal.format_timestamp(start + timedelta(hours=number)),
+        )
+        for number in range(count)
+    ]
+    with connection:
+        connection.executemany(journal.UPSERT_MESSAGE, rows)
+
+
+def test_connect_creates_history_indexes(tmp_path):
+    """Ensure that a filtered page of the history is read from an index without sorting."""
+    connection = journal.connect(tmp_path / constants.files.Journal)
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN "
+        + journal.SELECT_HISTORY
+        + " WHERE phone_number = ? AND (sent_at, rowid) < (?, ?)"
+        + " ORDER BY sent_at DESC, rowid DESC LIMIT 10",
+        ("+18881115000", "2026-01-01T00:00:00+00:00", 1),
+    ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "messages_phone_number" in details
+    assert "TEMP B-TREE" not in details
+    connection.close()
+
+
+def test_get_history_page_follows_cursor(tmp_path):
+    """Ensure that the pages of the history contain every message once from newest to oldest."""
+    connection = journal.connect(tmp_path / constants.files.Journal)
+    create_history(connection, 25)
+    rowids = []
+    cursor = None
+    pages_count = 0
+    while True:
+        page = journal.get_history_page(connection, cursor=cursor, page_size=10)
+        rowids.extend(record.rowid for record in page.records)
+        pages_count = pages_count + 1
+        if page.cursor is None:
+            break
+        cursor = page.cursor
+    assert pages_count == 3
+    assert len(set(rowids)) == 25
+    first_page = journal.get_history_page(connection, page_size=25)
+    assert first_page.cursor is None
+    assert first_page.records[0].sent_at > first_page.records[-1].sent_at
+    connection.close()
+
+
+def test_get_history_page_filters(tmp_path):
+    """Ensure that the history is filtered by person, phone number, status, and time."""
+    connection = journal.connect(tmp_path / constants.files.Journal)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    create_history(connection, 24, start)
+    page = journal.get_history_page(connection, name="Individual 1")
+    assert len(page.records) == 8
+    assert {record.phone_number for record in page.records} == {"+18881115001"}
+    page = journal.get_history_page(connection, phone_number="+18881115002")
+    assert {record.name for record in page.records} == {"Individual 2"}
+    page = journal.get_history_page(connection, status=constants.journal.Failed)
+    assert len(page.records) == 6
+    assert {record.error for record in page.records} == {"not valid"}
+    page = journal.get_history_page(
+        connection,
+        since=start + timedelta(hours=10),
+        until=start + timedelta(hours=15),
+    )
+    assert [record.sent_at for record in page.records] == [
+        journal.format_timestamp(start + timedelta(hours=hours))
+        for hours in range(14, 9, -1)
+    ]
+    assert journal.get_history_page(connection, run_id="other").records == []
+    connection.close()
+
+
+def test_parse_cursor_rejects_cursor_that_is_not_valid():
+    """Ensure that a cursor round trips and that a mangled cursor is rejected."""
+    record = journal.HistoryRecord(
+        7, "run", "+18881115000", None, "SM7", "sent", None, "2026-01-01T00:00:00+00:00"
+    )
+    assert journal.parse_cursor(journal.create_cursor(record)) == (record.sent_at, 7)
+    with pytest.raises(journal.HistoryCursorError):
+        journal.parse_cursor("2026-01-01T00:00:00+00:00")
+    with pytest.raises(journal.HistoryCursorError):
+        journal.parse_cursor("2026-01-01T00:00:00+00:00,seven")
+
+
+def test_apply_retention_deletes_expired_messages(tmp_path):
+    """Ensure that only the messages sent before the retention period are deleted."""
+    journal_file = tmp_path / constants.files.Journal
+    connection = journal.connect(journal_file)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    create_history(connection, 48, start)
+    deleted_count = journal.apply_retention(
+        connection, 1, now=start + timedelta(hours=36)
+    )
+    assert deleted_count == 12
+    remaining = journal.get_history_page(connection, page_size=100).records
+    assert len(remaining) == 36
+    assert min(record.sent_at for record in remaining) == journal.format_timestamp(
+        start + timedelta(hours=12)
+    )
+    assert journal.apply_retention(connection, 1, now=start) == 0
+    connection.close()
+
+
+def test_compact_shrinks_journal(tmp_path):
+    """Ensure that compacting the journal after deleting messages makes it smaller."""
+    journal_file = tmp_path / constants.files.Journal
+    connection = journal.connect(journal_file)
+    create_history(connection, 5000)
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size_before = journal_file.stat().st_size
+    journal.apply_retention(connection, 0)
+    journal.compact(connection)
+    assert journal_file.stat().st_size < size_before
+    assert journal.get_history_page(connection).records == []
+    connection.close()
+
+
+def test_record_statuses_updates_and_adds_messages(tmp_path):
+    """Ensure that a synchronized status updates a sent message or adds a message sent elsewhere."""
+    journal_file = tmp_path / constants.files.Journal
+    with journal.SendJournal(journal_file, "run") as send_journal:
+        list(send_journal.track(create_messages(2), {"888-111-5500": "Gregory"}))
+        send_journal.record("SM0")
+        send_journal.record("SM1")
+    connection = journal.connect(journal_file)
+    sent_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    message_statuses = [
+        journal.MessageStatus("SM0", "+18881115500", "delivered", None, sent_at),
+        journal.MessageStatus("SM1", "+18881115501", "undelivered", "30003", sent_at),
+        journal.MessageStatus("SM2", "+18881115502", "delivered", None, sent_at),
+    ]
+    status_counts = journal.record_statuses(connection, message_statuses, batch_size=2)
+    assert status_counts == {"delivered": 2, "undelivered": 1}
+    records = {
+        record.sid: record
+        for record in journal.get_history_page(connection, page_size=10).records
+    }
+    assert len(records) == 3
+    assert records["SM0"].status == "delivered"
+    assert records["SM0"].name == "Gregory"
+    assert records["SM0"].run_id == "run"
+    assert records["SM1"].error == "30003"
+    assert records["SM2"].run_id == constants.journal.Synced_Run
+    assert records["SM2"].sent_at == journal.format_timestamp(sent_at)
+    # synchronizing the same statuses again does not add any messages
+    journal.record_statuses(connection, message_statuses)
+    assert len(journal.get_history_page(connection, page_size=10).records) == 3
+    connection.close()
+
+
+def test_get_sync_start_finds_oldest_unsettled_message(tmp_path):
+    """Ensure that synchronizing starts at the oldest message without a final status."""
+    journal_file = tmp_path / constants.files.Journal
+    connection = journal.connect(journal_file)
+    now = datetime(2026, 1, 10, tzinfo=timezone.utc)
+    # an empty journal synchronizes the messages in the retention period
+    assert journal.get_sync_start(connection, 7, now=now) == now - timedelta(days=7)
+    message_statuses = [
+        journal.MessageStatus(
+            f"SM{day}", "+18881115500", status, None, now - timedelta(days=day)
+        )
+        for day, status in [(1, "delivered"), (2, "sent"), (3, "delivered")]
+    ]
+    journal.record_statuses(connection, message_statuses)
+    assert journal.get_sync_start(connection, 7, now=now) == now - timedelta(days=2)
+    # an unsettled message before the retention period is no longer synchronized
+    assert journal.get_sync_start(connection, 1, now=now) == now - timedelta(days=1)
+    # when every message is settled the newest message is where it starts
+    journal.record_statuses(
+        connection,
+        [journal.MessageStatus("SM2", "+18881115500", "delivered", None, None)],
+    )
+    assert journal.get_sync_start(connection, 7, now=now) == now - timedelta(days=1)
+    connection.close()
+
+
+def test_record_reminders_for_shifts(tmp_path):
+    """Ensure that the reminders sent for a shift are found until they expire."""
+    journal_file = tmp_path / constants.files.Journal
+    connection = journal.connect(journal_file)
+    journal.record_reminders(
+        connection,
+        "serve-1",
+        [("May 2 9am", "+18881115500"), ("May 2 5pm", "+18881115501")],
+    )
+    # recording a reminder again in another run keeps the first one
+    journal.record_reminders(connection, "serve-2", [("May 2 9am", "+18881115500")])
+    assert journal.get_reminders(connection, ["May 2 9am", "May 3 9am"]) == {
+        ("May 2 9am", "+18881115500")
+    }
+    journal.apply_retention(
+        connection, 1, now=datetime.now(timezone.utc) + timedelta(days=2)
+    )
+    assert journal.get_reminders(connection, ["May 2 9am", "May 2 5pm"]) == set()
+    connection.close()
@@ -0,0 +1,293 @@
+"""Test the command-line interface in the main module."""
+
+import json
+import subprocess
+import sys
+
+from datetime import datetime
+from pathlib import Path
+
+import numpy
+import pandas
+import pytest
+
+from rich.console import Console
+from typer.testing import CliRunner
+
+from mesmsage import cache
+from mesmsage import constants
+from mesmsage import journal
+from mesmsage import main
+from mesmsage import roster
+from mesmsage import scheduler
+from mesmsage import sms
+from mesmsage import template
+
+# the packages that take the most time to import and that the commands
+# which do not download spreadsheets or send messages must never import
+LARGE_PACKAGES = [
+    "InquirerPy",
+    "numpy",
+    "pandas",
+    "phonenumbers",
+    "sheetfu",
+    "twilio",
+]
+
+PROJECT_DIRECTORY = Path(__file__).parent.parent
+
+# run a command in a new interpreter, since the test suite already imported
+# the large packages, and then report the large packages that it imported
+RUN_COMMAND = """
+import json
+import sys
+from typer.testing import CliRunner
+from mesmsage import main
+result = CliRunner().invoke(main.app, sys.argv[1:])
+print(json.dumps([
+    result.exit_code,
+    sorted(package for package in {} if package in sys.modules),
+]))
+"""
+
+
+def get_imported_packages(*arguments: str):
+    """Run the command and return its exit code and the large packages that it imported."""
+    output = subprocess.run(
+        [sys.executable, "-c", RUN_COMMAND.format(LARGE_PACKAGES), *arguments],
+        cwd=PROJECT_DIRECTORY,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    exit_code, imported_packages = json.loads(output.splitlines()[-1])
+    return exit_code, imported_packages
+
+
+def test_help_does_not_import_large_packages():
+    """Ensure that displaying the help does not import the large packages."""
+    assert get_imported_packages("--help") == (0, [])
+
+
+def test_history_does_not_import_large_packages(tmp_path):
+    """Ensure that displaying the history of sent messages does not import the large packages."""
+    journal_file = str(tmp_path / "journal.sqlite3")
+    assert get_imported_packages("history", "--journal-file", journal_file) == (0, [])
+
+
+def test_history_of_phone_number_only_imports_phonenumbers(tmp_path):
+    """Ensure that displaying the history of a phone number only imports the package that normalizes it."""
+    journal_file = tmp_path / "journal.sqlite3"
+    journal.connect(journal_file).close()
+    # the phone number is normalized in the format in which it was recorded
+    assert get_imported_packages(
+        "history", "--journal-file", str(journal_file), "--phone", "(814) 555-0000"
+    ) == (0, ["phonenumbers"])
+
+
+def test_send_and_journal_uses_sender_lanes_with_one_worker(
+    fake_twilio, monkeypatch, tmp_path
+):
+    """Ensure that a pool of senders sends in lanes even when each lane has one worker."""
+    monkeypatch.delenv(constants.environment.Twilio_Messaging_Service, raising=False)
+    monkeypatch.setenv(
+        constants.environment.Twilio_Phone_Numbers, "814-555-0001,814-555-0002"
+    )
+    monkeypatch.setattr(sms, "client", fake_twilio.client, raising=False)
+    lane_calls = []
+    send_message_stream_concurrently = sms.send_message_stream_concurrently
+
+    def record_lanes(messages, workers, **keywords):
+        lane_calls.append(workers)
+        return send_message_stream_concurrently(messages, workers, **keywords)
+
+    monkeypatch.setattr(sms, "send_message_stream_concurrently", record_lanes)
+    messages = [(f"+188811155{number:02d}", "Message") for number in range(10)]
+    with journal.SendJournal(tmp_path / "journal.sqlite3", "run") as send_journal:
+        main.send_and_journal(messages, send_journal, Console(quiet=True), workers=1)
+    assert lane_calls == [1]
+    assert len(fake_twilio.messages) == 10
+    assert len({message["from"] for message in fake_twilio.messages}) == 2
+
+
+def test_send_and_journal_records_sent_messages_when_producer_fails(
+    fake_twilio, monkeypatch, tmp_path
+):
+    """Ensure that every message sent before the producer of messages fails is in the journal."""
+    monkeypatch.delenv(constants.environment.Twilio_Messaging_Service, raising=False)
+    monkeypatch.setenv(
+        constants.environment.Twilio_Phone_Numbers, "814-555-0001,814-555-0002"
+    )
+    monkeypatch.setattr(sms, "client", fake_twilio.client, raising=False)
+    fake_twilio.delay = 0.01
+
+    def produce_messages():
+        for number in range(20):
+            yield f"+188811155{number:02d}", f"Message {number}"
+        raise RuntimeError("The next message cannot be composed")
+
+    journal_file = tmp_path / constants.files.Journal
+    with journal.SendJournal(journal_file, "run") as send_journal:
+        with pytest.raises(RuntimeError):
+            main.send_and_journal(
+                produce_messages(), send_journal, Console(quiet=True), workers=4
+            )
+    connection = journal.connect(journal_file)
+    records = journal.get_history_page(connection, page_size=100).records
+    connection.close()
+    # a resumed run skips every message that was sent before the failure
+    assert len(fake_twilio.messages) == 20
+    assert sorted(record.sid for record in records) == sorted(
+        message["sid"] for message in fake_twilio.messages
+    )
+
+
+def test_send_over_segment_budget_is_reported(monkeypatch, tmp_path):
+    """Ensure that a message over the segment budget is reported without a traceback."""
+    monkeypatch.setenv(constants.environment.Cache_Home, str(tmp_path))
+    # the command configures the shared client, which is restored afterwards
+    monkeypatch.setattr(sms, "client", None, raising=False)
+    dataframe = pandas.DataFrame(
+        {
+            "Individual Name": ["Gregory"],
+            "Individual Phone Number": ["+18881115555"],
+            "Read Email": [True],
+        }
+    )
+    cache.write_cache(
+        cache.get_cache_file(cache.get_cache_directory(), "sheet", "Sheet1"),
+        "1",
+        dataframe,
+    )
+    result = CliRunner().invoke(
+        main.app,
+        [
+            "send",
+            "--googlesheet-id",
+            "sheet",
+            "--offline",
+            "--dry-run",
+            "--name-pattern",
+            "Gregory",
+            "--segment-budget",
+            "1",
+        ],
+    )
+    assert result.exit_code == 1
+    assert result.exception is None or isinstance(result.exception, SystemExit)
+    # the console wraps the long message and thus the words are compared
+    output = " ".join(result.stdout.split())
+    assert "Did not send the SMS since a message is over budget" in output
+    assert "has 2 segments but the budget is 1 segment(s)" in output
+    assert "Hello Gregory!" in output
+
+
+def test_send_reminders_skips_shifts_reminded_in_another_run(
+    fake_twilio, monkeypatch, tmp_path
+):
+    """Ensure that a shift is never reminded twice even when the shifts are grouped in another run."""
+    monkeypatch.delenv(constants.environment.Twilio_Messaging_Service, raising=False)
+    monkeypatch.delenv(constants.environment.Twilio_Phone_Numbers, raising=False)
+    monkeypatch.setenv(constants.environment.Twilio_Phone_Number, "814-555-0000")
+    monkeypatch.setattr(sms, "client", fake_twilio.client, raising=False)
+    roster_index = roster.RosterIndex(
+        pandas.DataFrame(
+            {
+                "Individual Name": ["Gregory", "Jessica"],
+                "Individual Phone Number": ["+18881115500", "+18881115501"],
+                "May 2 9am": [True, True],
+                "May 2 5pm": [False, True],
+            }
+        )
+    )
+    morning = scheduler.Reminder(
+        datetime(2021, 5, 1, 9), datetime(2021, 5, 2, 9), "May 2 9am", 0
+    )
+    evening = scheduler.Reminder(
+        datetime(2021, 5, 1, 17), datetime(2021, 5, 2, 17), "May 2 5pm", 1
+    )
+    journal_file = tmp_path / constants.files.Journal
+    # the reminder to Jessica fails after the reminder to Gregory was sent
+    fake_twilio.failing_numbers = {"+18881115501"}
+    with pytest.raises(sms.TwilioCommunicationError):
+        main.send_reminders(
+            roster_index.restrict_activities(numpy.array([0])),
+            [morning],
+            template.compile_template(),
+            Console(quiet=True),
+            journal_file,
+        )
+    assert [message["to"] for message in fake_twilio.messages] == ["+18881115500"]
+    # a restart groups both of the shifts in one run with another identifier
+    fake_twilio.failing_numbers = set()
+    unsent_count = main.send_reminders(
+        roster_index.restrict_activities(numpy.array([0, 1])),
+        [morning, evening],
+        template.compile_template(),
+        Console(quiet=True),
+        journal_file,
+    )
+    assert unsent_count == 0
+    assert [message["to"] for message in fake_twilio.messages] == [
+        "+18881115500",
+        "+18881115501",
+    ]
+    assert "May 2 9am, and May 2 5pm" in fake_twilio.messages[1]["body"]
+
+
+def test_send_reminders_counts_unsent_parts_of_household_message(
+    fake_twilio, monkeypatch, tmp_path
+):
+    """Ensure that a household is only reminded when all of the parts of its split message were sent."""
+    monkeypatch.delenv(constants.environment.Twilio_Messaging_Service, raising=False)
+    monkeypatch.delenv(constants.environment.Twilio_Phone_Numbers, raising=False)
+    monkeypatch.setenv(constants.environment.Twilio_Phone_Number, "814-555-0000")
+    monkeypatch.setattr(sms, "client", fake_twilio.client, raising=False)
+    # the shifts are long enough that the household message is split into
+    # one part for each of the individuals who share the phone number
+    morning_header = "May 2 9am " + "Restock the pantry shelves, " * 30
+    evening_header = "May 2 5pm " + "Sort the donated clothing, " * 30
+    roster_index = roster.RosterIndex(
+        pandas.DataFrame(
+            {
+                "Individual Name": ["Gregory", "Madelyn"],
+                "Individual Phone Number": ["+18881115500", "+18881115500"],
+                morning_header: [True, False],
+                evening_header: [False, True],
+            }
+        )
+    )
+    reminders = [
+        scheduler.Reminder(
+            datetime(2021, 5, 1, 9), datetime(2021, 5, 2, 9), morning_header, 0
+        ),
+        scheduler.Reminder(
+            datetime(2021, 5, 1, 17), datetime(2021, 5, 2, 17), evening_header, 1
+        ),
+    ]
+    journal_file = tmp_path / constants.files.Journal
+    fake_twilio.failing_texts = {"Madelyn"}
+    unsent_count = main.send_reminders(
+        roster_index,
+        reminders,
+        template.compile_template(),
+        Console(quiet=True),
+        journal_file,
+        workers=2,
+    )
+    assert unsent_count == 1
+    assert len(fake_twilio.messages) == 1
+    # the retry sends the part that failed, without the part that was sent
+    fake_twilio.failing_texts = set()
+    unsent_count = main.send_reminders(
+        roster_index,
+        reminders,
+        template.compile_template(),
+        Console(quiet=True),
+        journal_file,
+        workers=2,
+    )
+    assert unsent_count == 0
+    assert len(fake_twilio.messages) == 2
+    assert "Madelyn" in fake_twilio.messages[1]["body"]
+    assert "Gregory" not in fake_twilio.messages[1]["body"]
@@ -0,0 +1,133 @@
+"""Test suite for the phone module."""
+
+import pandas
+import phonenumbers
+
+import pytest
+
+from mesmsage import constants
+from mesmsage import phone
+
+
+def create_dataframe():
+    """Create a data frame of individuals with phone numbers that are and are not valid."""
+    return pandas.DataFrame(
+        {
+            "Individual Name": pandas.array(
+                ["Gregory", "Jessica", "Madelyn", "Gregory"], dtype="string"
+            ),
+            "Individual Phone Number": pandas.array(
+                ["(888) 111-5555", "not a number", "+1 888 333 5555", "(888) 111-5555"],
+                dtype="string",
+            ),
+            "Read Email": [True, True, True, False],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "phone_number,expected",
+    [
+        ("(814) 555-0000", "+18145550000"),
+        ("814.555.0000", "+18145550000"),
+        ("+1 814 555 0000", "+18145550000"),
+        ("+18145550000", "+18145550000"),
+    ],
+)
+def test_get_e164_number(phone_number, expected):
+    """Ensure that phone numbers are converted to the E164 international format."""
+    assert phone.get_e164_number(phone_number) == expected
+
+
+@pytest.mark.parametrize(
+    "phone_number", ["123", "555", "814-555-12", "+12", "+1814555000012345"]
+)
+def test_get_e164_number_rejects_impossible_number(phone_number):
+    """Ensure that a number that parses but has the wrong number of digits is not valid."""
+    with pytest.raises(phonenumbers.NumberParseException):
+        phone.get_e164_number(phone_number)
+
+
+def test_get_e164_number_does_not_parse_normalized_number(monkeypatch):
+    """Ensure that a normalized North American number is returned without parsing it."""
+
+    def fail_to_parse(*_):
+        raise AssertionError("The normalized number was parsed")
+
+    phone.get_e164_number.cache_clear()
+    monkeypatch.setattr(phonenumbers, "parse", fail_to_parse)
+    assert phone.get_e164_number("+18145550000") == "+18145550000"
+    phone.get_e164_number.cache_clear()
+
+
+def test_get_normalized_number():
+    """Ensure that a phone number is normalized or, when it is not valid, is used as is."""
+    assert phone.get_normalized_number("(814) 555-0000") == "+18145550000"
+    assert phone.get_normalized_number("not a number") == "not a number"
+
+
+def test_add_e164_numbers_reports_impossible_numbers():
+    """Ensure that the rows with a number that has the wrong number of digits are reported."""
+    individuals_dataframe = pandas.DataFrame(
+        {
+            "Individual Name": ["Gregory", "Jessica", "Madelyn"],
+            "Individual Phone Number": ["123", "(814) 555-0000", "+12"],
+        }
+    )
+    invalid_numbers = phone.add_e164_numbers(individuals_dataframe)
+    assert [invalid_number.position for invalid_number in invalid_numbers] == [0, 2]
+    assert invalid_numbers[0].error.endswith(constants.messages.Number_Not_Valid)
+    assert invalid_numbers[1].error
+
+
+def test_get_e164_number_is_memoized():
+    """Ensure that converting the same phone number again does not parse it again."""
+    phone.get_e164_number.cache_clear()
+    phone.get_e164_number("(814) 555-0001")
+    phone.get_e164_number("(814) 555-0001")
+    assert phone.get_e164_number.cache_info().hits == 1
+
+
+def test_add_e164_numbers_adds_column_and_reports_invalid_rows():
+    """Ensure that the normalized phone numbers are added and the rows that are not valid are reported."""
+    individuals_dataframe = create_dataframe()
+    invalid_numbers = phone.add_e164_numbers(individuals_dataframe)
+    e164_numbers = individuals_dataframe[constants.sheets.Number_E164]
+    assert str(e164_numbers.dtype) == constants.dataframes.String
+    assert e164_numbers.tolist() == [
+        "+18881115555",
+        pandas.NA,
+        "+18883335555",
+        "+18881115555",
+    ]
+    assert len(invalid_numbers) == 1
+    assert invalid_numbers[0].position == 1
+    assert invalid_numbers[0].name == "Jessica"
+    assert invalid_numbers[0].phone_number == "not a number"
+    assert invalid_numbers[0].error
+
+
+def test_add_e164_numbers_does_not_parse_normalized_dataframe(monkeypatch):
+    """Ensure that a data frame that was normalized, like a cached one, is not parsed again."""
+    individuals_dataframe = create_dataframe()
+    phone.add_e164_numbers(individuals_dataframe)
+
+    get_e164_number = phone.get_e164_number
+
+    def fail_to_parse_valid_number(phone_number):
+        if phone_number != "not a number":
+            raise AssertionError(f"Parsed {phone_number}")
+        return get_e164_number(phone_number)
+
+    monkeypatch.setattr(phone, "get_e164_number", fail_to_parse_valid_number)
+    invalid_numbers = phone.add_e164_numbers(individuals_dataframe)
+    assert [invalid_number.position for invalid_number in invalid_numbers] == [1]
+    # the description of the error is the same as when the number was first parsed
+    assert "did not seem to be a phone number" in invalid_numbers[0].error
+
+
+def test_add_e164_numbers_without_number_column():
+    """Ensure that a data frame without phone numbers has no rows that are not valid."""
+    individuals_dataframe = create_dataframe().drop(columns="Individual Phone Number")
+    assert phone.add_e164_numbers(individuals_dataframe) == []
+    assert constants.sheets.Number_E164 not in individuals_dataframe.columns
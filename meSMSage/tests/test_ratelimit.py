@@ -0,0 +1,118 @@
+"""Test suite for the ratelimit module."""
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from email.utils import format_datetime
+
+import pytest
+
+from mesmsage import constants
+from mesmsage import ratelimit
+
+
+class FakeClock:
+    """Define a clock that only advances when something sleeps."""
+
+    def __init__(self):
+        """Start the clock at zero."""
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        """Return the current time of the clock."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Advance the clock by the number of seconds."""
+        self.sleeps.append(seconds)
+        self.now = self.now + seconds
+
+
+def test_token_bucket_allows_burst_up_to_capacity():
+    """Ensure that a full bucket does not wait until it is empty."""
+    clock = FakeClock()
+    bucket = ratelimit.TokenBucket(5, clock=clock.time, sleep=clock.sleep)
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+
+def test_token_bucket_waits_for_refill_at_rate():
+    """Ensure that an empty bucket waits for tokens at the configured rate."""
+    clock = FakeClock()
+    bucket = ratelimit.TokenBucket(4, capacity=1, clock=clock.time, sleep=clock.sleep)
+    for _ in range(9):
+        bucket.acquire()
+    assert clock.now == pytest.approx(2.0)
+
+
+def test_token_bucket_decrease_halves_rate_down_to_minimum():
+    """Ensure that throttling halves the rate without going below the minimum."""
+    clock = FakeClock()
+    bucket = ratelimit.TokenBucket(10, clock=clock.time, sleep=clock.sleep)
+    bucket.decrease()
+    assert bucket.rate == 5
+    assert bucket.tokens <= 0
+    for _ in range(10):
+        bucket.decrease()
+    assert bucket.rate == pytest.approx(10 * constants.rates.Minimum_Fraction)
+
+
+def test_token_bucket_increase_recovers_up_to_maximum():
+    """Ensure that successful sends increase the rate without exceeding the maximum."""
+    clock = FakeClock()
+    bucket = ratelimit.TokenBucket(10, clock=clock.time, sleep=clock.sleep)
+    bucket.decrease()
+    bucket.increase()
+    assert bucket.rate == pytest.approx(5 + 10 * constants.rates.Increase_Fraction)
+    for _ in range(100):
+        bucket.increase()
+    assert bucket.rate == 10
+
+
+@pytest.mark.parametrize(
+    "status,attempt,expected",
+    [(429, 1, True), (500, 1, True), (503, 4, True), (400, 1, False), (429, 5, False)],
+)
+def test_rate_limiter_should_retry(status, attempt, expected):
+    """Ensure that only throttling and server errors are retried, up to the maximum attempts."""
+    rate_limiter = ratelimit.RateLimiter()
+    assert rate_limiter.should_retry(status, attempt) is expected
+
+
+def test_rate_limiter_waits_with_exponential_backoff():
+    """Ensure that the backoff doubles with each attempt up to the maximum delay."""
+    clock = FakeClock()
+    rate_limiter = ratelimit.RateLimiter(
+        base_delay=1.0, maximum_delay=5.0, sleep=clock.sleep, jitter=lambda: 1.0
+    )
+    for attempt in range(1, 5):
+        rate_limiter.wait_to_retry(500, attempt)
+    assert clock.sleeps == [1.0, 2.0, 4.0, 5.0]
+
+
+def test_rate_limiter_honours_retry_after():
+    """Ensure that the Retry-After time, up to the maximum delay, replaces the backoff."""
+    clock = FakeClock()
+    rate_limiter = ratelimit.RateLimiter(rate=10, maximum_delay=5.0, sleep=clock.sleep)
+    assert rate_limiter.wait_to_retry(429, 1, 2.5) == 2.5
+    assert rate_limiter.wait_to_retry(429, 2, 30.0) == 5.0
+    assert rate_limiter.bucket.rate == 2.5
+
+
+def test_parse_retry_after_seconds_and_dates():
+    """Ensure that the Retry-After header is parsed as seconds or as an HTTP date."""
+    assert ratelimit.parse_retry_after(None) is None
+    assert ratelimit.parse_retry_after("7") == 7.0
+    assert ratelimit.parse_retry_after("-1") == 0.0
+    assert ratelimit.parse_retry_after("not a date") is None
+    later = datetime.now(timezone.utc) + timedelta(seconds=120)
+    assert 100 < ratelimit.parse_retry_after(format_datetime(later, usegmt=True)) <= 120
+
+
+def test_get_rate_limiter_is_shared_for_sender():
+    """Ensure that every message from the same sender shares one rate limiter."""
+    first = ratelimit.get_rate_limiter("+18145550000", 10)
+    assert ratelimit.get_rate_limiter("+18145550000", 10) is first
+    assert ratelimit.get_rate_limiter("+18145550001", 10) is not first
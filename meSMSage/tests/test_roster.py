@@ -0,0 +1,176 @@
+"""Test the functions in the roster module."""
+
+import numpy
+import pandas
+
+import pytest
+
+from mesmsage import extract
+from mesmsage import phone
+from mesmsage import roster
+
+
+def create_dataframe() -> pandas.DataFrame:
+    """Create a data frame of individuals and their activities."""
+    return pandas.DataFrame(
+        {
+            "Individual Name": ["Gregory", "Jessica", "Madelyn", "Gregory"],
+            "Individual Phone Number": [
+                "888-111-5555",
+                "888-222-5555",
+                "888-333-5555",
+                "888-111-5555",
+            ],
+            "Read Email": [True, True, True, False],
+            "Wash Car": [False, False, True, True],
+        }
+    )
+
+
+def test_roster_index_contains_names_and_activities():
+    """Ensure that the index stores the names and activity columns of the data frame."""
+    roster_index = roster.RosterIndex(create_dataframe())
+    assert len(roster_index) == 4
+    assert roster_index.names.tolist() == ["Gregory", "Jessica", "Madelyn", "Gregory"]
+    assert roster_index.activity_columns == ["Read Email", "Wash Car"]
+    assert roster_index.activity_positions == [2, 3]
+    assert roster_index.activity_indptr.tolist() == [0, 1, 2, 4, 5]
+    assert roster_index.activity_indices.tolist() == [0, 0, 0, 1, 1]
+
+
+def test_roster_index_gathers_activities_for_positions():
+    """Ensure that the activities of chosen rows are gathered from the sparse representation."""
+    roster_index = roster.RosterIndex(create_dataframe())
+    lengths, columns = roster_index.get_activities(numpy.array([1, 2, 3]))
+    assert lengths.tolist() == [1, 2, 1]
+    assert columns.tolist() == [0, 0, 1, 1]
+
+
+def test_roster_index_without_activities():
+    """Ensure that an index is created for a data frame without activity columns."""
+    dataframe = create_dataframe()[["Individual Name", "Individual Phone Number"]]
+    roster_index = roster.RosterIndex(dataframe)
+    assert roster_index.activity_columns == []
+    assert roster_index.activity_indptr.tolist() == [0, 0, 0, 0, 0]
+    lengths, columns = roster_index.get_activities(numpy.array([0, 3]))
+    assert lengths.tolist() == [0, 0]
+    assert columns.size == 0
+
+
+def test_roster_index_positions_are_sorted_and_include_repeated_individuals():
+    """Ensure that the positions of chosen individuals follow the order of the data frame."""
+    roster_index = roster.RosterIndex(create_dataframe())
+    positions = roster_index.get_positions(["Madelyn", "Gregory", "Not There"])
+    assert positions.tolist() == [0, 2, 3]
+
+
+def test_roster_index_positions_empty_list():
+    """Ensure that there are no positions when no individuals are chosen."""
+    roster_index = roster.RosterIndex(create_dataframe())
+    positions = roster_index.get_positions([])
+    assert positions.tolist() == []
+
+
+def test_create_roster_index_name_column_does_not_exist():
+    """Ensure that creating an index crashes for a data frame with an incorrect name column."""
+    dataframe = pandas.DataFrame({"Person's Name": ["Gregory", "Jessica"]})
+    with pytest.raises(extract.IndividualNotFoundError):
+        _ = extract.create_roster_index(dataframe)
+
+
+def test_extract_functions_accept_roster_index():
+    """Ensure that the numbers and activities are the same for a data frame and its index."""
+    dataframe = create_dataframe()
+    roster_index = extract.create_roster_index(dataframe)
+    names = ["Gregory", "Madelyn"]
+    assert extract.get_individual_numbers(
+        roster_index, names
+    ) == extract.get_individual_numbers(dataframe, names)
+    activities = extract.get_individual_activities(roster_index, names)
+    assert activities == extract.get_individual_activities(dataframe, names)
+    assert activities["Gregory"] == ["Read Email", "Wash Car"]
+
+
+def test_roster_index_prefers_normalized_numbers():
+    """Ensure that the index uses the normalized phone numbers, which are not an activity."""
+    individuals_dataframe = create_dataframe()
+    individuals_dataframe["Individual Phone Number"] = pandas.array(
+        ["888-111-5555", "not a number", "888-333-5555", "888-111-5555"],
+        dtype="string",
+    )
+    phone.add_e164_numbers(individuals_dataframe)
+    roster_index = roster.RosterIndex(individuals_dataframe)
+    assert roster_index.numbers.tolist() == [
+        "+18881115555",
+        "not a number",
+        "+18883335555",
+        "+18881115555",
+    ]
+    assert roster_index.activity_columns == ["Read Email", "Wash Car"]
+
+
+def test_roster_index_selects_names_in_order_of_sheet():
+    """Ensure that the named individuals are selected once each in the order of the sheet."""
+    roster_index = roster.RosterIndex(create_dataframe())
+    assert roster_index.select(names=["Madelyn", "Gregory", "Nobody"]) == [
+        "Gregory",
+        "Madelyn",
+    ]
+    assert roster_index.select() == ["Gregory", "Jessica", "Madelyn"]
+
+
+def test_roster_index_selects_names_matching_pattern():
+    """Ensure that the individuals whose names match the pattern are selected."""
+    roster_index = roster.RosterIndex(create_dataframe())
+    assert roster_index.select(name_pattern="^(G|M)") == ["Gregory", "Madelyn"]
+    assert roster_index.select(name_pattern="(?i)^jess") == ["Jessica"]
+    assert roster_index.select(name_pattern="Zed") == []
+
+
+def test_roster_index_selects_individuals_checked_in_shift():
+    """Ensure that the individuals checked in an activity matching the pattern are selected."""
+    roster_index = roster.RosterIndex(create_dataframe())
+    # the second row for Gregory is the only one of his rows with the car
+    assert roster_index.get_shift_mask("Car").tolist() == [False, False, True, True]
+    assert roster_index.select(shift_pattern="Car") == ["Madelyn", "Gregory"]
+    assert roster_index.select(shift_pattern="Email|Car") == [
+        "Gregory",
+        "Jessica",
+        "Madelyn",
+    ]
+    assert roster_index.select(shift_pattern="Mow Lawn") == []
+
+
+def test_roster_index_selects_individuals_matching_every_criterion():
+    """Ensure that the criteria are combined so that an individual must match all of them."""
+    roster_index = roster.RosterIndex(create_dataframe())
+    assert roster_index.select(names=["Gregory", "Jessica"], shift_pattern="Email") == [
+        "Gregory",
+        "Jessica",
+    ]
+    assert roster_index.select(name_pattern="^J", shift_pattern="Car") == []
+
+
+def test_roster_index_restricts_activities_to_columns():
+    """Ensure that a restricted index only has the checkmarks in the provided columns."""
+    roster_index = roster.RosterIndex(create_dataframe())
+    # the CSC arrays are only created when they are first needed
+    assert roster_index.column_indptr is None
+    column_indptr, column_rows = roster_index.get_columns()
+    assert column_indptr.tolist() == [0, 3, 5]
+    assert column_rows.tolist() == [0, 1, 2, 2, 3]
+    restricted_index = roster_index.restrict_activities(numpy.array([1]))
+    assert restricted_index.activity_indptr.tolist() == [0, 0, 0, 1, 2]
+    assert restricted_index.activity_indices.tolist() == [1, 1]
+    assert restricted_index.column_indptr.tolist() == [0, 0, 2]
+    assert extract.get_individual_activities(
+        restricted_index, ["Gregory", "Jessica", "Madelyn"]
+    ) == {"Madelyn": ["Wash Car"], "Gregory": ["Wash Car"]}
+    assert restricted_index.select(scheduled=True) == ["Madelyn", "Gregory"]
+    # the original index is not changed by the restriction
+    assert roster_index.select(scheduled=True) == ["Gregory", "Jessica", "Madelyn"]
+    all_columns_index = roster_index.restrict_activities(numpy.array([0, 1]))
+    assert all_columns_index.activity_indptr.tolist() == [0, 1, 2, 4, 5]
+    assert all_columns_index.activity_indices.tolist() == [0, 0, 0, 1, 1]
+    no_columns_index = roster_index.restrict_activities(numpy.array([], dtype=int))
+    assert no_columns_index.select(scheduled=True) == []
@@ -0,0 +1,214 @@
+"""Test the functions in the scheduler module."""
+
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+
+import pandas
+
+from mesmsage import extract
+from mesmsage import roster
+from mesmsage import scheduler
+
+NOW = datetime(2021, 5, 1, 12, 0)
+
+
+def create_roster_index() -> roster.RosterIndex:
+    """Create an index of individuals and the shifts that they work."""
+    return roster.RosterIndex(
+        pandas.DataFrame(
+            {
+                "Individual Name": ["Gregory", "Jessica", "Madelyn"],
+                "Individual Phone Number": [
+                    "888-111-5555",
+                    "888-222-5555",
+                    "888-333-5555",
+                ],
+                "May 1 9am": [True, True, False],
+                "May 2 9am": [True, False, False],
+                "May 2 5pm": [False, True, True],
+                "Read Email": [True, True, True],
+                "May 5 9am": [False, False, True],
+            }
+        )
+    )
+
+
+def create_scheduler(fetched_indexes, sent_runs, unsent_counts=None, **options):
+    """Create a scheduler that fetches the provided indexes and records the sent runs."""
+
+    def fetch_roster():
+        return fetched_indexes.pop(0) if fetched_indexes else None
+
+    def send_reminders(roster_index, reminders):
+        names = roster_index.select(scheduled=True)
+        sent_runs.append(
+            (
+                scheduler.get_run_id(reminders),
+                extract.get_individual_activities(roster_index, names),
+            )
+        )
+        # each run sends every message unless it is told how many fail
+        return unsent_counts.pop(0) if unsent_counts else 0
+
+    return scheduler.ReminderScheduler(fetch_roster, send_reminders, **options)
+
+
+def test_get_reminder_time():
+    """Ensure that a reminder is sent the lead before the shift or at a time on the day before."""
+    start = datetime(2021, 5, 2, 9, 0)
+    assert scheduler.get_reminder_time(start, timedelta(hours=24)) == datetime(
+        2021, 5, 1, 9, 0
+    )
+    assert scheduler.get_reminder_time(
+        start, timedelta(hours=24), time(18, 0)
+    ) == datetime(2021, 5, 1, 18, 0)
+
+
+def test_scheduler_only_schedules_shifts_that_have_not_started():
+    """Ensure that the heap has a reminder for each shift that has not started, soonest first."""
+    reminder_scheduler = create_scheduler(
+        [create_roster_index()], [], lead=timedelta(hours=24)
+    )
+    assert reminder_scheduler.refresh(NOW)
+    assert [reminder.header for reminder in reminder_scheduler.reminders][0] == (
+        "May 2 9am"
+    )
+    assert sorted(reminder.header for reminder in reminder_scheduler.reminders) == [
+        "May 2 5pm",
+        "May 2 9am",
+        "May 5 9am",
+    ]
+    # the next reminder is overdue and so the scheduler does not wait for it
+    assert reminder_scheduler.get_wait(NOW) == 0
+    # the spreadsheet did not change and so the reminders are the same
+    assert not reminder_scheduler.refresh(NOW)
+    assert len(reminder_scheduler.reminders) == 3
+
+
+def test_scheduler_sends_reminders_due_at_same_time_in_one_run():
+    """Ensure that the reminders due at the same time are sent once in one run."""
+    sent_runs = []
+    reminder_scheduler = create_scheduler(
+        [create_roster_index(), create_roster_index()],
+        sent_runs,
+        lead=timedelta(hours=24),
+        remind_at=time(18, 0),
+        refresh_interval=timedelta(hours=8),
+    )
+    reminder_scheduler.refresh(NOW)
+    # the scheduler sleeps until the first reminder is due before the next refresh
+    assert reminder_scheduler.get_wait(NOW) == 6 * 60 * 60
+    assert reminder_scheduler.run_pending(NOW) == 0
+    assert reminder_scheduler.run_pending(datetime(2021, 5, 1, 18, 0)) == 2
+    assert len(sent_runs) == 1
+    run_id, activities = sent_runs[0]
+    assert run_id.startswith("serve-20210502T090000-")
+    assert activities == {
+        "Gregory": ["May 2 9am"],
+        "Jessica": ["May 2 5pm"],
+        "Madelyn": ["May 2 5pm"],
+    }
+    # a reminder that was sent is not scheduled again when the roster changes
+    reminder_scheduler.refresh(datetime(2021, 5, 1, 18, 1))
+    assert [reminder.header for reminder in reminder_scheduler.reminders] == [
+        "May 5 9am"
+    ]
+    assert reminder_scheduler.run_pending(datetime(2021, 5, 4, 18, 0)) == 1
+    assert sent_runs[1][1] == {"Madelyn": ["May 5 9am"]}
+    assert not reminder_scheduler.reminders
+
+
+def test_scheduler_skips_reminders_for_started_shifts():
+    """Ensure that a reminder that is due after its shift started is not sent."""
+    sent_runs = []
+    reminder_scheduler = create_scheduler(
+        [create_roster_index()], sent_runs, lead=timedelta(hours=24)
+    )
+    reminder_scheduler.refresh(NOW)
+    assert reminder_scheduler.run_pending(datetime(2021, 5, 2, 10, 0)) == 1
+    assert sent_runs[0][1] == {"Jessica": ["May 2 5pm"], "Madelyn": ["May 2 5pm"]}
+
+
+def test_scheduler_retries_failed_reminders_with_backoff():
+    """Ensure that a reminder is only marked as sent once all of its messages were sent."""
+    sent_runs = []
+    reminder_scheduler = create_scheduler(
+        [create_roster_index(), create_roster_index()],
+        sent_runs,
+        [1, 2, 0],
+        lead=timedelta(hours=24),
+        retry_delay=timedelta(minutes=1),
+    )
+    reminder_scheduler.refresh(NOW)
+    assert reminder_scheduler.run_pending(NOW) == 1
+    # the failed reminder is due again after the delay, which doubles each time
+    assert reminder_scheduler.get_wait(NOW) == 60
+    assert reminder_scheduler.run_pending(NOW + timedelta(seconds=59)) == 0
+    assert reminder_scheduler.run_pending(NOW + timedelta(minutes=1)) == 1
+    assert reminder_scheduler.get_wait(NOW + timedelta(minutes=1)) == 120
+    # a refresh of the roster keeps the backoff of the failed reminder
+    reminder_scheduler.refresh(NOW + timedelta(minutes=2))
+    assert reminder_scheduler.run_pending(NOW + timedelta(minutes=2)) == 0
+    assert reminder_scheduler.run_pending(NOW + timedelta(minutes=3)) == 1
+    # every attempt is the same run so that it resumes from the journal
+    assert len({run_id for run_id, _ in sent_runs}) == 1
+    assert reminder_scheduler.fired == {("May 2 9am", datetime(2021, 5, 2, 9, 0))}
+    assert not reminder_scheduler.retries
+
+
+def test_scheduler_retries_reminders_after_error():
+    """Ensure that a reminder is retried when sending it raises an error."""
+
+    def send_reminders(roster_index, reminders):
+        raise RuntimeError("The network is down")
+
+    reminder_scheduler = scheduler.ReminderScheduler(
+        lambda: create_roster_index(), send_reminders, lead=timedelta(hours=24)
+    )
+    reminder_scheduler.refresh(NOW)
+    assert reminder_scheduler.run_pending(NOW) == 1
+    assert not reminder_scheduler.fired
+    assert [reminder.due for reminder in reminder_scheduler.reminders][0] == (
+        NOW + timedelta(seconds=60)
+    )
+
+
+def test_run_id_is_the_same_for_the_same_shifts():
+    """Ensure that the run for the same shifts is the same so that the journal skips sent messages."""
+    reminders = [
+        scheduler.Reminder(NOW, datetime(2021, 5, 2, 9), "May 2 9am", 0),
+        scheduler.Reminder(NOW, datetime(2021, 5, 2, 17), "May 2 5pm", 1),
+    ]
+    assert scheduler.get_run_id(reminders) == scheduler.get_run_id(
+        list(reversed(reminders))
+    )
+    assert scheduler.get_run_id(reminders) != scheduler.get_run_id(reminders[:1])
+
+
+def test_scheduler_serves_until_stopped():
+    """Ensure that the scheduler refreshes, sends the due reminders, and then stops."""
+    sent_runs = []
+    reminder_scheduler = create_scheduler(
+        [create_roster_index()], sent_runs, lead=timedelta(hours=24)
+    )
+    clock_times = iter([NOW])
+
+    def clock():
+        # stop the scheduler before it waits after its first step
+        try:
+            return next(clock_times)
+        except StopIteration:
+            reminder_scheduler.stop()
+            return NOW
+
+    reminder_scheduler.serve(clock)
+    assert [run_id for run_id, _ in sent_runs] == [
+        scheduler.get_run_id(
+            [
+                scheduler.Reminder(
+                    datetime(2021, 5, 1, 9), datetime(2021, 5, 2, 9), "May 2 9am", 1
+                )
+            ]
+        )
+    ]
@@ -0,0 +1,67 @@
+"""Test suite for the search module."""
+
+from mesmsage import search
+
+NAMES = [
+    "All Individuals",
+    "Gregory M. Kapfhammer",
+    "Jessica Smith",
+    "Mary Kapfhammer",
+    "Bill Smithers",
+    "Kapil Gregory",
+]
+
+
+def test_get_trigrams():
+    """Ensure that the trigrams of a text are its distinct sequences of three characters."""
+    assert search.get_trigrams("smith") == {"smi", "mit", "ith"}
+    assert search.get_trigrams("aaaa") == {"aaa"}
+    assert search.get_trigrams("ab") == set()
+
+
+def test_search_matches_substrings_of_names():
+    """Ensure that a term of three or more characters matches anywhere in a name."""
+    name_index = search.NameIndex(NAMES)
+    assert [NAMES[position] for position in name_index.search("hammer")] == [
+        "Gregory M. Kapfhammer",
+        "Mary Kapfhammer",
+    ]
+    assert [NAMES[position] for position in name_index.search("SMITH")] == [
+        "Jessica Smith",
+        "Bill Smithers",
+    ]
+    assert name_index.search("zebra") == []
+
+
+def test_search_matches_prefixes_of_words_for_short_terms():
+    """Ensure that a term with fewer than three characters matches the start of a word."""
+    name_index = search.NameIndex(NAMES)
+    assert [NAMES[position] for position in name_index.search("m")] == [
+        "Mary Kapfhammer",
+        "Gregory M. Kapfhammer",
+    ]
+    # the start of a word is matched but the middle of a word is not
+    assert name_index.search("mm") == []
+
+
+def test_search_requires_every_term_and_lists_prefix_matches_first():
+    """Ensure that every term must match and that names starting with the query come first."""
+    name_index = search.NameIndex(NAMES)
+    assert [NAMES[position] for position in name_index.search("kap greg")] == [
+        "Kapil Gregory",
+        "Gregory M. Kapfhammer",
+    ]
+    assert [NAMES[position] for position in name_index.search("greg kap")] == [
+        "Gregory M. Kapfhammer",
+        "Kapil Gregory",
+    ]
+    assert [NAMES[position] for position in name_index.search("ma kap")] == [
+        "Mary Kapfhammer",
+    ]
+    assert name_index.search("  ") == list(range(len(NAMES)))
+
+
+def test_get_match_indices_highlights_terms():
+    """Ensure that the characters that match each term of the query are highlighted."""
+    name_index = search.NameIndex(NAMES)
+    assert name_index.get_match_indices(2, "smi jes") == [0, 1, 2, 8, 9, 10]
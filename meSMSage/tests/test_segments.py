@@ -0,0 +1,101 @@
+"""Test suite for the segments module."""
+
+import pytest
+
+from mesmsage import segments
+
+
+@pytest.mark.parametrize(
+    "message,expected",
+    [
+        ("", 1),
+        ("a" * 160, 1),
+        ("a" * 161, 2),
+        ("a" * 306, 2),
+        ("a" * 307, 3),
+        ("a" * 70 + "’", 2),
+        ("a" * 69 + "’", 1),
+        ("a" * 133 + "’", 2),
+        ("a" * 134 + "’", 3),
+    ],
+)
+def test_count_segments(message, expected):
+    """Ensure that the segments are counted for both GSM-7 and UCS-2 messages."""
+    assert segments.count_segments(message) == expected
+
+
+def test_count_segments_extension_characters_are_two_septets():
+    """Ensure that a character in the GSM-7 extension table counts as two septets."""
+    assert segments.count_segments("{" * 80) == 1
+    assert segments.count_segments("{" * 81) == 2
+    # an escaped character is never split between two segments
+    assert segments.count_segments("a" * 152 + "{" + "a" * 10) == 2
+    assert segments.count_segments("a" * 152 + "{" + "a" * 152) == 3
+
+
+def test_count_segments_emoji_are_surrogate_pairs():
+    """Ensure that a character outside of the basic multilingual plane is two code units."""
+    assert segments.count_segments("\U0001f600" * 35) == 1
+    assert segments.count_segments("\U0001f600" * 36) == 2
+
+
+def test_is_gsm7():
+    """Ensure that only messages with characters in GSM-7 are GSM-7."""
+    assert segments.is_gsm7("Hello {name}! €5 @ 10:00")
+    assert not segments.is_gsm7("Hello “Gregory”")
+    assert not segments.is_gsm7("Hello \U0001f600")
+
+
+def test_optimize_message_replaces_characters():
+    """Ensure that typographic characters are replaced with GSM-7 equivalents."""
+    assert (
+        segments.optimize_message("It’s “Gregory’s” shift — 9…5")
+        == "It's \"Gregory's\" shift - 9...5"
+    )
+
+
+def test_optimize_message_keeps_message_that_stays_ucs2():
+    """Ensure that a message that cannot become GSM-7 is not changed."""
+    message = "It’s a shift \U0001f600"
+    assert segments.optimize_message(message) == message
+
+
+def test_optimize_sms_messages_reports_segments():
+    """Ensure that the segments before and after replacing characters are reported."""
+    sms_messages = [
+        ("+18881115555", "a" * 100 + "’"),
+        ("+18882225555", "a" * 100),
+    ]
+    optimized_messages, report = segments.optimize_sms_messages(
+        sms_messages, replace=True
+    )
+    assert optimized_messages == [
+        ("+18881115555", "a" * 100 + "'"),
+        ("+18882225555", "a" * 100),
+    ]
+    assert report == segments.SegmentReport(2, 3, 2, 1, 0)
+    _, report = segments.optimize_sms_messages(sms_messages)
+    assert report == segments.SegmentReport(2, 3, 3, 1, 1)
+
+
+def test_optimize_sms_messages_enforces_budget():
+    """Ensure that a message with more segments than the budget is an error."""
+    sms_messages = [("+18881115555", "a" * 100), ("+18882225555", "a" * 200)]
+    with pytest.raises(segments.SegmentBudgetError) as error:
+        segments.optimize_sms_messages(sms_messages, segment_budget=1)
+    assert "+18882225555" in str(error.value)
+    assert "has 2 segments" in str(error.value)
+    assert str(error.value).endswith("a" * 200)
+    _, report = segments.optimize_sms_messages(sms_messages, segment_budget=2)
+    assert report.segments_after == 3
+
+
+def test_generate_optimized_messages_enforces_budget_as_produced():
+    """Ensure that the messages before the one over the budget are produced."""
+    sms_messages = iter([("+18881115555", "a’"), ("+18882225555", "a" * 200)])
+    optimized_messages = segments.generate_optimized_messages(
+        sms_messages, replace=True, segment_budget=1
+    )
+    assert next(optimized_messages) == ("+18881115555", "a'")
+    with pytest.raises(segments.SegmentBudgetError):
+        next(optimized_messages)
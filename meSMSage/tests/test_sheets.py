@@ -1,7 +1,11 @@
 """Test the functions in the sheets module."""
 
+import numpy
+
 import pytest
 
+from unittest import mock
+
 from googleapiclient import errors
 from sheetfu import model
 from sheetfu.exceptions import SheetNameNoMatchError
@@ -58,3 +62,228 @@ def test_extract_dataframe_from_not_existing_sheet():
     with pytest.raises(SheetNotFoundError):
         util.load_environment()
         _ = sheets.extract_dataframe(None)
+
+
+def test_create_dataframe_with_typed_columns():
+    """Ensure that the data frame created from the values of a sheet has compact column types."""
+    values = [
+        [
+            "Individual Name",
+            "Individual Phone Number",
+            "Read Email",
+            "Wash Car",
+            "Notes",
+        ],
+        ["Gregory", 8881115555, True, "FALSE", "Early"],
+        ["Jessica", "888-222-5555", numpy.False_, "TRUE", True],
+    ]
+    dataframe = sheets.create_dataframe(values)
+    assert dataframe.shape == (2, 5)
+    assert dataframe["Individual Name"].dtype == "string"
+    assert dataframe["Individual Phone Number"].tolist() == [
+        "8881115555",
+        "888-222-5555",
+    ]
+    assert dataframe["Read Email"].dtype == bool
+    assert dataframe["Read Email"].tolist() == [True, False]
+    assert dataframe["Wash Car"].dtype == bool
+    assert dataframe["Wash Car"].tolist() == [False, True]
+    assert dataframe["Notes"].dtype == object
+
+
+def test_create_dataframe_with_padded_checkbox_column():
+    """Ensure that the blank cells padded into a checkbox column are unchecked checkboxes."""
+    values = [
+        ["Individual Name", "Individual Phone Number", "Read Email", "Notes"],
+        ["Gregory", "888-111-5555", "TRUE", ""],
+        ["Jessica", "888-222-5555", "", None],
+        ["Madelyn", "888-333-5555", None, ""],
+    ]
+    dataframe = sheets.create_dataframe(values)
+    assert dataframe["Read Email"].dtype == bool
+    assert dataframe["Read Email"].tolist() == [True, False, False]
+    assert dataframe["Read Email"].eq(True).tolist() == [True, False, False]
+    assert dataframe["Notes"].dtype == object
+
+
+def test_create_dataframe_does_not_treat_numbers_as_checkboxes():
+    """Ensure that a column of ones and zeros is not a checkbox column and phone numbers are whole."""
+    values = [
+        ["Individual Name", "Individual Phone Number", "Count", "Read Email"],
+        ["Gregory", 8881115555.0, 1, "TRUE"],
+        ["Jessica", 8882225555, 0, "FALSE"],
+    ]
+    dataframe = sheets.create_dataframe(values)
+    assert dataframe["Individual Phone Number"].tolist() == [
+        "8881115555",
+        "8882225555",
+    ]
+    assert dataframe["Count"].dtype == object
+    assert dataframe["Count"].tolist() == [1, 0]
+    assert dataframe["Read Email"].dtype == bool
+
+
+def test_create_dataframe_with_only_headers():
+    """Ensure that the data frame created from a sheet with only headers has no rows."""
+    values = [["Individual Name", "Individual Phone Number", "Read Email"]]
+    dataframe = sheets.create_dataframe(values)
+    assert dataframe.shape == (0, 3)
+    assert dataframe.columns.tolist() == values[0]
+
+
+def test_create_dataframe_with_repeated_headers():
+    """Ensure that the data frame created from a sheet with repeated headers keeps every column."""
+    values = [
+        ["Individual Name", "Saturday", "Saturday"],
+        ["Gregory", True, False],
+    ]
+    dataframe = sheets.create_dataframe(values)
+    assert dataframe.columns.tolist() == ["Individual Name", "Saturday", "Saturday"]
+    assert dataframe.iloc[0].tolist() == ["Gregory", True, False]
+
+
+def test_get_revision_of_spreadsheet():
+    """Ensure that the revision of the spreadsheet is the version in Google Drive."""
+    sheet = mock.MagicMock()
+    sheet.spreadsheet.id = "abc123"
+    files = sheet.client.drive_service.files.return_value
+    files.get.return_value.execute.return_value = {"version": "42"}
+    assert sheets.get_revision(sheet) == "42"
+    files.get.assert_called_once_with(fileId="abc123", fields="version")
+
+
+def test_get_revision_of_spreadsheet_not_available():
+    """Ensure that the revision of the spreadsheet is not known when Google Drive fails."""
+    sheet = mock.MagicMock()
+    files = sheet.client.drive_service.files.return_value
+    files.get.return_value.execute.side_effect = errors.HttpError(
+        mock.MagicMock(status=403), b"Forbidden"
+    )
+    assert sheets.get_revision(sheet) is None
+
+
+def test_get_column_letters():
+    """Ensure that the letters of columns in A1 notation are correct."""
+    assert sheets.get_column_letters(0) == "A"
+    assert sheets.get_column_letters(25) == "Z"
+    assert sheets.get_column_letters(26) == "AA"
+    assert sheets.get_column_letters(701) == "ZZ"
+    assert sheets.get_column_letters(702) == "AAA"
+
+
+def test_select_columns_with_names_and_pattern():
+    """Ensure that the contact columns and the requested activity columns are selected."""
+    headers = [
+        "Individual Name",
+        "Individual Phone Number",
+        "Monday Morning",
+        "Monday Evening",
+        "Tuesday Morning",
+        "Notes",
+    ]
+    assert sheets.select_columns(headers) == [0, 1]
+    assert sheets.select_columns(headers, columns=["Notes"]) == [0, 1, 5]
+    assert sheets.select_columns(headers, header_pattern="^Monday") == [0, 1, 2, 3]
+    assert sheets.select_columns(
+        headers, columns=["Tuesday Morning"], header_pattern="Evening"
+    ) == [0, 1, 3, 4]
+
+
+def test_create_a1_ranges_for_adjacent_columns():
+    """Ensure that the adjacent columns are requested with a single range."""
+    assert sheets.create_a1_ranges("Sheet1", [0, 1, 3, 4, 5, 27]) == [
+        "'Sheet1'!A:B",
+        "'Sheet1'!D:F",
+        "'Sheet1'!AB:AB",
+    ]
+
+
+def test_create_a1_ranges_doubles_quotes_in_sheet_name():
+    """Ensure that a quote in the name of the sheet is doubled in the ranges."""
+    assert sheets.create_a1_ranges("Jessica's Shifts", [2]) == [
+        "'Jessica''s Shifts'!C:C"
+    ]
+
+
+def test_get_sheet_a1_range_keeps_sheet_prefix():
+    """Ensure that a range that already names a sheet is not given another one."""
+    assert sheets.get_sheet_a1_range("Sheet1", "A1:C3") == "'Sheet1'!A1:C3"
+    assert sheets.get_sheet_a1_range("Sheet1", "Shifts!A1:C3") == "Shifts!A1:C3"
+    assert (
+        sheets.get_sheet_a1_range("Sheet1", "'Jessica''s Shifts'!A:B")
+        == "'Jessica''s Shifts'!A:B"
+    )
+
+
+def test_extract_dataframe_with_projected_columns():
+    """Ensure that only the projected columns of a sheet are downloaded."""
+    sheet = mock.MagicMock()
+    sheet.name = "Sheet1"
+    sheet.spreadsheet.id = "abc123"
+    batch_get = (
+        sheet.client.sheet_service.spreadsheets.return_value.values.return_value.batchGet
+    )
+    batch_get.return_value.execute.side_effect = [
+        {
+            "valueRanges": [
+                {
+                    "values": [
+                        [
+                            "Individual Name",
+                            "Individual Phone Number",
+                            "Monday",
+                            "Tuesday",
+                            "Wednesday",
+                        ]
+                    ]
+                }
+            ]
+        },
+        {
+            "valueRanges": [
+                {
+                    "values": [
+                        ["Individual Name", "Gregory", "Jessica"],
+                        ["Individual Phone Number", 8881115555],
+                    ]
+                },
+                {"values": [["Wednesday", True]]},
+            ]
+        },
+    ]
+    dataframe = sheets.extract_dataframe(sheet, header_pattern="^Wed")
+    assert dataframe.columns.tolist() == [
+        "Individual Name",
+        "Individual Phone Number",
+        "Wednesday",
+    ]
+    assert dataframe["Individual Phone Number"].tolist() == ["8881115555", ""]
+    # the checkbox column is padded with a blank cell that is unchecked
+    assert dataframe["Wednesday"].dtype == bool
+    assert dataframe["Wednesday"].tolist() == [True, False]
+    assert batch_get.call_args.kwargs["ranges"] == ["'Sheet1'!A:B", "'Sheet1'!E:E"]
+    assert batch_get.call_args.kwargs["majorDimension"] == "COLUMNS"
+
+
+def test_extract_dataframe_with_a1_range():
+    """Ensure that only the requested range of a sheet is downloaded."""
+    sheet = mock.MagicMock()
+    sheet.name = "Sheet1"
+    batch_get = (
+        sheet.client.sheet_service.spreadsheets.return_value.values.return_value.batchGet
+    )
+    batch_get.return_value.execute.return_value = {
+        "valueRanges": [
+            {
+                "values": [
+                    ["Individual Name", "Individual Phone Number", "Monday"],
+                    ["Gregory", "888-111-5555", True],
+                    ["Jessica"],
+                ]
+            }
+        ]
+    }
+    dataframe = sheets.extract_dataframe(sheet, a1_range="A1:C3")
+    assert dataframe.shape == (2, 3)
+    assert dataframe["Individual Name"].tolist() == ["Gregory", "Jessica"]
+    assert batch_get.call_args.kwargs["ranges"] == ["'Sheet1'!A1:C3"]
@@ -0,0 +1,82 @@
+"""Test the functions in the shifts module."""
+
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from mesmsage import shifts
+
+NOW = datetime(2021, 5, 1, 12, 0)
+
+
+@pytest.mark.parametrize(
+    "header,expected_start",
+    [
+        ("Monday May 3 5:00 PM - 7:00 PM Concessions", datetime(2021, 5, 3, 17, 0)),
+        ("Sept. 3, 2021 noon", datetime(2021, 9, 3, 12, 0)),
+        ("5/3 5-7pm Parking", datetime(2021, 5, 3, 17, 0)),
+        ("Tuesday 5/4/21 8am", datetime(2021, 5, 4, 8, 0)),
+        ("2021-05-03 17:30 Gate", datetime(2021, 5, 3, 17, 30)),
+        ("Jan 2 11-1pm Tickets", datetime(2021, 1, 2, 11, 0)),
+        ("Nov 28 9am", datetime(2020, 11, 28, 9, 0)),
+        ("Dec 30 9 a.m.", datetime(2020, 12, 30, 9, 0)),
+        ("May 10th", datetime(2021, 5, 10, 0, 0)),
+        ("September 3 9am", datetime(2021, 9, 3, 9, 0)),
+        ("Parking - 5/3 6pm", datetime(2021, 5, 3, 18, 0)),
+        ("Sat 5/8 Cleanup", datetime(2021, 5, 8, 0, 0)),
+    ],
+)
+def test_parse_shift_start_from_header(header, expected_start):
+    """Ensure that the start of the shift is parsed from the many ways to write a header."""
+    assert shifts.parse_shift_start(header, NOW) == expected_start
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        "Read Email",
+        "Concessions 2",
+        "13/45 9am",
+        "Decorations 4 people",
+        "Marshals 2",
+        "Set up 1/2 day",
+    ],
+)
+def test_parse_shift_start_without_date(header):
+    """Ensure that a header without a date, or with a date that does not exist, has no start."""
+    assert shifts.parse_shift_start(header, NOW) is None
+
+
+def test_parse_window():
+    """Ensure that a window of time is parsed from a number and a unit."""
+    assert shifts.parse_window("24h") == timedelta(hours=24)
+    assert shifts.parse_window("90m") == timedelta(minutes=90)
+    assert shifts.parse_window("1.5d") == timedelta(days=1, hours=12)
+    assert shifts.parse_window("2W") == timedelta(weeks=2)
+    with pytest.raises(shifts.ShiftWindowError):
+        shifts.parse_window("tomorrow")
+
+
+def test_shift_index_finds_columns_in_window():
+    """Ensure that the index finds the columns of the shifts that start in the window."""
+    shift_index = shifts.ShiftIndex(
+        [
+            "May 4 9am",
+            "Read Email",
+            "May 1 6pm",
+            "May 2 8am",
+            "May 1 11am",
+            "May 20 9am",
+        ],
+        NOW,
+    )
+    assert len(shift_index) == 5
+    assert shift_index.unscheduled == 1
+    assert shift_index.get_window_columns(timedelta(hours=24), NOW).tolist() == [2, 3]
+    assert shift_index.get_window_columns(timedelta(days=7), NOW).tolist() == [0, 2, 3]
+    assert shift_index.get_window_columns(timedelta(minutes=1), NOW).tolist() == []
+    # the window includes its start but not its end
+    assert shift_index.get_columns(
+        datetime(2021, 5, 1, 11), datetime(2021, 5, 1, 18)
+    ).tolist() == [4]
@@ -1,6 +1,13 @@
 """Test the functions in the sms module."""
 
+import collections
 import os
+import threading
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from email.utils import format_datetime
 
 import pytest
 
@@ -10,7 +17,9 @@ from twilio.base.exceptions import TwilioRestException
 from twilio.rest import Client
 
 from mesmsage import constants
+from mesmsage import ratelimit
 from mesmsage import sms
+from mesmsage import transport
 from mesmsage.sms import client
 from mesmsage import util
 
@@ -120,3 +129,301 @@ def test_send_single_message_mock_twilio_exception(create_message_mock, caplog):
         assert sid is None
         assert error_message in caplog.text
         assert constants.messages.Sms_Did_Not_Work in caplog.text
+
+
+@mock.patch("mesmsage.sms.client.messages.create")
+def test_send_message_stream_mock_twilio(create_message_mock, monkeypatch):
+    """Ensure that it is possible to send a stream of SMS messages through a mocked Twilio service."""
+    monkeypatch.setenv(constants.environment.Twilio_Phone_Number, "814-555-0000")
+    create_message_mock.return_value.sid = "SM87105da94bff44b999e4e6eb90d8eb6a"
+    messages = (
+        (f"888-111-55{number:02d}", f"Message {number}") for number in range(20)
+    )
+    sid_list = list(sms.send_message_stream(messages, buffer_size=4))
+    assert len(sid_list) == 20
+    assert create_message_mock.call_count == 20
+    create_message_mock.assert_any_call(
+        to="+18881115519", from_="+18145550000", body="Message 19"
+    )
+
+
+def test_client_is_created_on_first_use(monkeypatch):
+    """Ensure that the Twilio client is created when it is first used and then shared."""
+    monkeypatch.delattr(sms, "client", raising=False)
+    assert "client" not in vars(sms)
+    twilio_client = sms.get_client()
+    assert isinstance(twilio_client, Client)
+    assert sms.client is twilio_client
+    assert sms.get_client() is twilio_client
+    with pytest.raises(AttributeError):
+        _ = sms.not_a_client
+
+
+def test_get_e164_number():
+    """Ensure that a phone number is converted to the E164 international format."""
+    assert sms.get_e164_number("(814) 555-0000") == "+18145550000"
+
+
+def test_send_messages_concurrently_fake_twilio(fake_twilio, monkeypatch):
+    """Ensure that the results of sending concurrently to a fake Twilio service are in order."""
+    monkeypatch.setenv(constants.environment.Twilio_Phone_Number, "814-555-0000")
+    fake_twilio.failing_numbers = {"+18881115503"}
+    message_dictionary = {
+        f"888-111-55{number:02d}": f"Message {number}" for number in range(10)
+    }
+    results = sms.send_messages_concurrently(
+        message_dictionary, workers=4, twilio_client=fake_twilio.client
+    )
+    assert [result.phone_number for result in results] == list(message_dictionary)
+    assert len(fake_twilio.messages) == 9
+    assert results[3].sid is None
+    assert "is not valid" in results[3].error
+    assert all(
+        result.sid.startswith("SM") and result.error is None
+        for index, result in enumerate(results)
+        if index != 3
+    )
+
+
+def test_send_messages_concurrently_invalid_phone_number(fake_twilio, monkeypatch):
+    """Ensure that a phone number that cannot be parsed is captured as an error."""
+    monkeypatch.setenv(constants.environment.Twilio_Phone_Number, "814-555-0000")
+    results = sms.send_messages_concurrently(
+        {"not a number": "Message", "888-111-5500": "Message"},
+        workers=2,
+        twilio_client=fake_twilio.client,
+    )
+    assert results[0].sid is None
+    assert results[0].error is not None
+    assert results[1].sid is not None
+
+
+def test_send_message_retries_after_throttling_fake_twilio(fake_twilio):
+    """Ensure that a throttled message is sent again after waiting for the Retry-After time."""
+    fake_twilio.throttled = 2
+    fake_twilio.retry_after = "3"
+    delays = []
+    rate_limiter = ratelimit.RateLimiter(rate=1000, sleep=delays.append)
+    sid = sms.send_message(
+        fake_twilio.client, "+18881115500", "+18145550000", "Message", rate_limiter
+    )
+    assert sid.startswith("SM")
+    assert len(fake_twilio.messages) == 1
+    assert delays.count(3.0) == 2
+    assert rate_limiter.bucket.rate < 1000
+
+
+def test_get_retry_after_reads_response_of_calling_thread(fake_twilio):
+    """Ensure that each thread reads the Retry-After header of its own last response."""
+    fake_twilio.throttled = 1
+    fake_twilio.retry_after = "7"
+    with pytest.raises(sms.TwilioCommunicationError):
+        sms.send_message(fake_twilio.client, "+18881115500", "+18145550000", "Message")
+    assert sms.get_retry_after() == 7.0
+    other_retry_afters = []
+    thread = threading.Thread(
+        target=lambda: other_retry_afters.append(sms.get_retry_after())
+    )
+    thread.start()
+    thread.join()
+    assert other_retry_afters == [None]
+
+
+def test_send_message_gives_up_after_maximum_attempts_fake_twilio(fake_twilio):
+    """Ensure that a message that is always throttled raises an error after the last attempt."""
+    fake_twilio.throttled = 10
+    rate_limiter = ratelimit.RateLimiter(
+        maximum_attempts=3, sleep=lambda delay: None, jitter=lambda: 0.0
+    )
+    with pytest.raises(sms.TwilioCommunicationError):
+        sms.send_message(
+            fake_twilio.client, "+18881115500", "+18145550000", "Message", rate_limiter
+        )
+    assert fake_twilio.throttled == 7
+    assert len(fake_twilio.messages) == 0
+
+
+def test_send_message_without_rate_limiter_does_not_retry_fake_twilio(fake_twilio):
+    """Ensure that a throttled message is not sent again without a rate limiter."""
+    fake_twilio.throttled = 1
+    with pytest.raises(sms.TwilioCommunicationError):
+        sms.send_message(fake_twilio.client, "+18881115500", "+18145550000", "Message")
+    assert len(fake_twilio.messages) == 0
+
+
+def test_get_senders_from_pool_or_messaging_service(monkeypatch):
+    """Ensure that the senders come from the Messaging Service, the pool, or the single number."""
+    monkeypatch.delenv(constants.environment.Twilio_Messaging_Service, raising=False)
+    monkeypatch.delenv(constants.environment.Twilio_Phone_Numbers, raising=False)
+    monkeypatch.setenv(constants.environment.Twilio_Phone_Number, "814-555-0000")
+    assert sms.get_senders() == ["+18145550000"]
+    monkeypatch.setenv(
+        constants.environment.Twilio_Phone_Numbers, "814-555-0001, 814-555-0002,"
+    )
+    assert sms.get_senders() == ["+18145550001", "+18145550002"]
+    monkeypatch.setenv(constants.environment.Twilio_Messaging_Service, "MG123")
+    assert sms.get_senders() == ["MG123"]
+
+
+def test_get_senders_without_sender(monkeypatch):
+    """Ensure that there is an error when there is no sender to send from."""
+    monkeypatch.delenv(constants.environment.Twilio_Messaging_Service, raising=False)
+    monkeypatch.delenv(constants.environment.Twilio_Phone_Numbers, raising=False)
+    monkeypatch.delenv(constants.environment.Twilio_Phone_Number, raising=False)
+    with pytest.raises(sms.TwilioCommunicationError):
+        sms.get_senders()
+
+
+def test_get_pool_size_has_connection_for_each_lane(monkeypatch):
+    """Ensure that the pool has a connection for each of the workers of every sender."""
+    monkeypatch.delenv(constants.environment.Twilio_Messaging_Service, raising=False)
+    monkeypatch.delenv(constants.environment.Twilio_Phone_Number, raising=False)
+    monkeypatch.setenv(
+        constants.environment.Twilio_Phone_Numbers,
+        "814-555-0001,814-555-0002,814-555-0003",
+    )
+    assert sms.get_pool_size(4) == 12
+    # without a sender, like in a dry run, there is a connection for each worker
+    monkeypatch.delenv(constants.environment.Twilio_Phone_Numbers)
+    assert sms.get_pool_size(4) == 4
+
+
+def test_get_sender_is_stable_and_spreads_recipients():
+    """Ensure that a recipient always has the same sender and that recipients are spread over the senders."""
+    senders = [f"+1814555000{number}" for number in range(4)]
+    recipients = [f"+1888111{number:04d}" for number in range(400)]
+    assignment = {
+        recipient: sms.get_sender(recipient, senders) for recipient in recipients
+    }
+    assert assignment == {
+        recipient: sms.get_sender(recipient, list(reversed(senders)))
+        for recipient in recipients
+    }
+    counts = collections.Counter(assignment.values())
+    assert len(counts) == 4
+    assert min(counts.values()) > 50
+    # removing a sender only moves the recipients of that sender
+    moved = [
+        recipient
+        for recipient in recipients
+        if sms.get_sender(recipient, senders[:3]) != assignment[recipient]
+    ]
+    assert all(assignment[recipient] == senders[3] for recipient in moved)
+
+
+@mock.patch("mesmsage.sms.client.messages.create")
+def test_send_single_message_messaging_service_mock_twilio(create_message_mock):
+    """Ensure that a message from a Messaging Service is sent with its SID instead of a number."""
+    create_message_mock.return_value.sid = "SM87105da94bff44b999e4e6eb90d8eb6a"
+    sms.send_message(client, "+18881115500", "MG123", "Message")
+    create_message_mock.assert_called_once_with(
+        to="+18881115500", messaging_service_sid="MG123", body="Message"
+    )
+
+
+@mock.patch("mesmsage.sms.client.messages.create")
+def test_send_single_message_status_callback_mock_twilio(create_message_mock):
+    """Ensure that a message asks Twilio to report its status to the callback URL."""
+    create_message_mock.return_value.sid = "SM87105da94bff44b999e4e6eb90d8eb6a"
+    sms.send_message(
+        client,
+        "+18881115500",
+        "+18145550000",
+        "Message",
+        status_callback="https://example.com/status",
+    )
+    create_message_mock.assert_called_once_with(
+        to="+18881115500",
+        from_="+18145550000",
+        body="Message",
+        status_callback="https://example.com/status",
+    )
+
+
+def test_send_messages_concurrently_sender_pool_fake_twilio(fake_twilio, monkeypatch):
+    """Ensure that a pool of senders shards the recipients with results in order."""
+    senders = ["+18145550001", "+18145550002", "+18145550003"]
+    monkeypatch.delenv(constants.environment.Twilio_Messaging_Service, raising=False)
+    monkeypatch.setenv(constants.environment.Twilio_Phone_Numbers, ",".join(senders))
+    message_dictionary = {
+        f"888-111-55{number:02d}": f"Message {number}" for number in range(30)
+    }
+    results = sms.send_messages_concurrently(
+        message_dictionary, workers=2, twilio_client=fake_twilio.client
+    )
+    assert [result.phone_number for result in results] == list(message_dictionary)
+    assert all(result.error is None for result in results)
+    assert {message["from"] for message in fake_twilio.messages} == set(senders)
+    for message in fake_twilio.messages:
+        assert message["from"] == sms.get_sender(message["to"], senders)
+
+
+def test_stream_message_statuses_fetches_pages_fake_twilio(fake_twilio):
+    """Ensure that the status of every message is fetched with one request for each page."""
+    for number in range(25):
+        sms.send_message(
+            fake_twilio.client, f"+188811155{number:02d}", "+18145550000", "Hello"
+        )
+    fake_twilio.messages[0]["status"] = "undelivered"
+    fake_twilio.messages[0]["error_code"] = 30003
+    statuses = list(
+        sms.stream_message_statuses(page_size=10, twilio_client=fake_twilio.client)
+    )
+    assert fake_twilio.page_requests == 3
+    assert len(statuses) == 25
+    assert len({status.sid for status in statuses}) == 25
+    # the messages arrive from the newest to the oldest
+    assert statuses[-1].phone_number == "+18881115500"
+    assert statuses[-1].status == "undelivered"
+    assert statuses[-1].error == "30003"
+    assert statuses[0].sent_at.tzinfo is not None
+
+
+def test_stream_message_statuses_filters_fake_twilio(fake_twilio):
+    """Ensure that the messages are filtered by the time of sending and by the sender."""
+    sms.send_message(fake_twilio.client, "+18881115500", "+18145550000", "Old")
+    sms.send_message(fake_twilio.client, "+18881115501", "+18145550000", "New")
+    sms.send_message(fake_twilio.client, "+18881115502", "+18145550001", "New")
+    sms.send_message(fake_twilio.client, "+18881115503", "MG" + "0" * 32, "New")
+    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+    fake_twilio.messages[0]["date_sent"] = format_datetime(
+        yesterday - timedelta(days=1), usegmt=True
+    )
+    recent = sms.stream_message_statuses(
+        since=yesterday, twilio_client=fake_twilio.client
+    )
+    assert [status.phone_number for status in recent] == [
+        "+18881115503",
+        "+18881115502",
+        "+18881115501",
+    ]
+    from_sender = sms.stream_message_statuses(
+        sender="814-555-0000", twilio_client=fake_twilio.client
+    )
+    assert [status.phone_number for status in from_sender] == [
+        "+18881115501",
+        "+18881115500",
+    ]
+    from_service = sms.stream_message_statuses(
+        sender="MG" + "0" * 32, twilio_client=fake_twilio.client
+    )
+    assert [status.phone_number for status in from_service] == ["+18881115503"]
+
+
+def test_configure_client_creates_pooled_client(monkeypatch):
+    """Ensure that the configured client replaces the shared client and has a pool of connections."""
+    monkeypatch.delattr(sms, "client", raising=False)
+    twilio_client = sms.configure_client(
+        pool_size=3, connect_timeout=2.0, read_timeout=10.0, proxy="http://proxy:3128"
+    )
+    assert sms.get_client() is twilio_client
+    assert twilio_client.http_client.timeout == (2.0, 10.0)
+    assert twilio_client.http_client.adapter._pool_maxsize == 3
+    assert sms.get_transport_statistics() == transport.TransportStatistics(0, 0)
+
+
+def test_get_transport_statistics_without_pool():
+    """Ensure that there are no statistics for a client without a pool of connections."""
+    twilio_client = mock.MagicMock()
+    twilio_client.http_client = object()
+    assert sms.get_transport_statistics(twilio_client) is None
@@ -0,0 +1,99 @@
+"""Test the functions in the template module."""
+
+import pytest
+
+from mesmsage import template
+
+
+def test_compile_default_template_contains_placeholders():
+    """Ensure that the default template is compiled into literals and placeholders."""
+    message_template = template.compile_template()
+    placeholders = [
+        placeholder
+        for _, placeholder in message_template.fragments
+        if placeholder is not None
+    ]
+    assert placeholders == ["name", "activities"]
+
+
+def test_compile_template_is_reused():
+    """Ensure that the same template text is only ever compiled once."""
+    assert template.compile_template("Hi {name}") is template.compile_template(
+        "Hi {name}"
+    )
+
+
+def test_render_template_binds_placeholders():
+    """Ensure that rendering a template binds all of the placeholders."""
+    message_template = template.compile_template("Hi {name}, see you at {activities}!")
+    message = message_template.render({"name": "Gregory", "activities": "noon"})
+    assert message == "Hi Gregory, see you at noon!"
+
+
+def test_render_template_without_placeholders():
+    """Ensure that rendering a template without placeholders produces the literal text."""
+    message_template = template.compile_template("Thank you!")
+    assert message_template.render({}) == "Thank you!"
+
+
+def test_render_all_template_without_placeholders():
+    """Ensure that rendering all of a template without placeholders produces one text per position."""
+    message_template = template.compile_template("Thank you!")
+    messages = message_template.render_all(
+        {"name": ["Gregory", "Jessica"], "activities": ["Read Email", "Wash Car"]}
+    )
+    assert messages == ["Thank you!", "Thank you!"]
+
+
+def test_render_all_template_with_percent_sign():
+    """Ensure that rendering all of a template does not format its percent signs."""
+    message_template = template.compile_template("100% on {name}")
+    assert message_template.render_all({"name": ["Gregory"]}) == ["100% on Gregory"]
+
+
+def test_compile_template_unsupported_placeholder():
+    """Ensure that compiling a template with an unknown placeholder does not work."""
+    with pytest.raises(template.TemplateError):
+        _ = template.compile_template("Hi {nickname}")
+
+
+def test_compile_template_formatted_placeholder():
+    """Ensure that compiling a template with a formatted placeholder does not work."""
+    with pytest.raises(template.TemplateError):
+        _ = template.compile_template("Hi {name!r}")
+
+
+def test_compile_template_malformed():
+    """Ensure that compiling a template with an unbalanced brace does not work."""
+    with pytest.raises(template.TemplateError):
+        _ = template.compile_template("Hi {name")
+
+
+def test_read_template_from_file(tmp_path):
+    """Ensure that a template is read from a file without its trailing newline."""
+    template_file = tmp_path / "template.txt"
+    template_file.write_text("Reminder for {name}: {activities}\n")
+    message_template = template.read_template(template_file)
+    message = message_template.render({"name": "Jessica", "activities": "noon"})
+    assert message == "Reminder for Jessica: noon"
+
+
+def test_activities_fragment_is_cached():
+    """Ensure that the rendered list of activities is reused for the same activities."""
+    first_fragment = template.get_activities_fragment(("Read Email", "Wash Car"))
+    second_fragment = template.get_activities_fragment(("Read Email", "Wash Car"))
+    assert first_fragment == "Read Email, and Wash Car"
+    assert first_fragment is second_fragment
+
+
+def test_activities_fragments_are_rendered_once_for_repeated_activities():
+    """Ensure that the rendered lists of activities in a batch reuse the fragment for repeated activities."""
+    fragments = template.get_activities_fragments(
+        [["Read Email", "Wash Car"], ["Wash Car"], ["Read Email", "Wash Car"]]
+    )
+    assert fragments == [
+        "Read Email, and Wash Car",
+        "Wash Car",
+        "Read Email, and Wash Car",
+    ]
+    assert fragments[0] is fragments[2]
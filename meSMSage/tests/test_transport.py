@@ -0,0 +1,72 @@
+"""Tests for the pooled HTTP client that sends the requests to Twilio."""
+
+import pytest
+
+from twilio.rest import Client
+
+from mesmsage import constants
+from mesmsage import sms
+from mesmsage import transport
+
+
+def create_pooled_client(fake_twilio, **keywords):
+    """Create a Twilio client with a pool of connections to the fake Twilio service."""
+    twilio_client = Client(
+        fake_twilio.client.account_sid,
+        "fake-auth-token",
+        http_client=transport.PooledHttpClient(**keywords),
+    )
+    twilio_client.api.base_url = f"http://127.0.0.1:{fake_twilio.server_address[1]}"
+    return twilio_client
+
+
+def test_pooled_client_has_timeouts_and_proxy():
+    """Ensure that the client has a pair of timeouts and sends both schemes through the proxy."""
+    http_client = transport.PooledHttpClient(
+        pool_size=2, connect_timeout=1.5, read_timeout=9.0, proxy="http://proxy:3128"
+    )
+    assert http_client.timeout == (1.5, 9.0)
+    assert http_client.proxy == {
+        "http": "http://proxy:3128",
+        "https": "http://proxy:3128",
+    }
+    assert http_client.session.get_adapter("https://api.twilio.com") is (
+        http_client.adapter
+    )
+    assert http_client.get_statistics() == transport.TransportStatistics(0, 0)
+
+
+def test_pooled_client_without_proxy():
+    """Ensure that the client does not use a proxy unless one is provided."""
+    http_client = transport.PooledHttpClient()
+    assert not http_client.proxy
+    assert http_client.timeout == (
+        constants.transport.Connect_Timeout,
+        constants.transport.Read_Timeout,
+    )
+
+
+def test_pooled_client_reuses_connections_fake_twilio(fake_twilio, monkeypatch):
+    """Ensure that concurrent messages share at most one connection for each thread."""
+    monkeypatch.setenv(constants.environment.Twilio_Phone_Number, "814-555-0000")
+    twilio_client = create_pooled_client(fake_twilio, pool_size=4)
+    message_dictionary = {
+        f"888-111-55{number:02d}": f"Message {number}" for number in range(40)
+    }
+    results = sms.send_messages_concurrently(
+        message_dictionary, workers=4, twilio_client=twilio_client
+    )
+    assert all(result.error is None for result in results)
+    assert len(fake_twilio.messages) == 40
+    statistics = sms.get_transport_statistics(twilio_client)
+    assert statistics.requests == 40
+    assert 1 <= statistics.connections <= 4
+
+
+def test_pooled_client_read_timeout_is_not_retried_fake_twilio(fake_twilio):
+    """Ensure that a response that does not arrive in time is reported as a failure."""
+    fake_twilio.delay = 0.5
+    twilio_client = create_pooled_client(fake_twilio, pool_size=1, read_timeout=0.1)
+    with pytest.raises(sms.TwilioCommunicationError):
+        sms.send_message(twilio_client, "+18881115500", "+18145550000", "Message")
+    assert sms.get_transport_statistics(twilio_client).requests == 1
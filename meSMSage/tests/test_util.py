@@ -1,6 +1,13 @@
 """Test cases for the util module."""
 
+import itertools
 import os
+import sys
+import threading
+import time
+import types
+
+import pytest
 
 from mesmsage import util
 
@@ -37,3 +44,89 @@ def test_create_printable_dictionary_single_key():
     assert "Gregory" in printable_dictionary
     assert "Task One" in printable_dictionary
     assert "Task Two" in printable_dictionary
+
+
+def test_buffer_iterator_produces_all_items_in_order():
+    """Ensure that iterating through a buffer produces all of the items in order."""
+    items = list(util.buffer_iterator(range(1000), 10))
+    assert items == list(range(1000))
+
+
+def test_buffer_iterator_raises_error_from_iterable():
+    """Ensure that an error in the buffered iterable is raised for the consumer."""
+
+    def produce_then_fail():
+        yield 1
+        raise ValueError("failed")
+
+    buffered = util.buffer_iterator(produce_then_fail(), 2)
+    assert next(buffered) == 1
+    with pytest.raises(ValueError):
+        next(buffered)
+
+
+def test_buffer_iterator_stops_thread_when_consumer_stops():
+    """Ensure that the background thread stops when the consumer stops before the end."""
+    threads_before = threading.active_count()
+    buffered = util.buffer_iterator(itertools.count(), 2, wait=0.01)
+    assert next(buffered) == 0
+    buffered.close()
+    deadline = time.monotonic() + 5
+    while threading.active_count() > threads_before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert threading.active_count() == threads_before
+
+
+def test_ordered_lane_map_uses_pool_of_lane():
+    """Ensure that each item is handled by the threads of its lane and the results are in order."""
+    thread_names = {}
+
+    def record_thread(number):
+        thread_names.setdefault(number % 3, set()).add(threading.current_thread().name)
+        return number * 2
+
+    results = list(
+        util.ordered_lane_map(
+            record_thread, range(100), lambda number: number % 3, range(3), workers=2
+        )
+    )
+    assert results == [number * 2 for number in range(100)]
+    # no thread ever handles the items of more than one lane
+    assert not (thread_names[0] & thread_names[1] or thread_names[1] & thread_names[2])
+
+
+def test_ordered_lane_map_produces_submitted_results_before_error():
+    """Ensure that the results of the calls already submitted are produced before an error in the items."""
+    called = []
+
+    def record_call(number):
+        called.append(number)
+        return number * 2
+
+    def produce_numbers():
+        yield from range(10)
+        raise ValueError("The next item cannot be produced")
+
+    results = []
+    with pytest.raises(ValueError):
+        for result in util.ordered_lane_map(
+            record_call, produce_numbers(), lambda number: number % 2, range(2)
+        ):
+            results.append(result)
+    # every call that was made has its result produced, in order
+    assert sorted(called) == list(range(10))
+    assert results == [number * 2 for number in range(10)]
+
+
+def test_import_lazily_runs_module_on_first_use(monkeypatch):
+    """Ensure that a lazily imported module only runs when one of its attributes is used."""
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    colorsys = util.import_lazily("colorsys")
+    assert sys.modules["colorsys"] is colorsys
+    assert type(colorsys) is not types.ModuleType
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert type(colorsys) is types.ModuleType
+    # a module that was already imported is not imported again
+    assert util.import_lazily("colorsys") is colorsys
+    with pytest.raises(ModuleNotFoundError):
+        util.import_lazily("mesmsage.not_a_module")
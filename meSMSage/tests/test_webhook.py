@@ -0,0 +1,159 @@
+"""Test suite for the webhook module."""
+
+import http.client
+
+from urllib.parse import urlencode
+
+import pytest
+
+from twilio.request_validator import RequestValidator
+
+from mesmsage import constants
+from mesmsage import journal
+from mesmsage import webhook
+
+
+@pytest.fixture
+def receiver(tmp_path):
+    """Run a receiver of status callbacks on localhost with a journal in a temporary directory."""
+    status_receiver = webhook.StatusReceiver(
+        tmp_path / constants.files.Journal, port=0, flush_interval=0.01
+    )
+    status_receiver.start()
+    yield status_receiver
+    status_receiver.stop()
+
+
+def post_callback(connection, form, headers=None, path="/"):
+    """Post the form of a status callback and return the status of the response."""
+    connection.request(
+        "POST",
+        path,
+        urlencode(form),
+        {"Content-Type": "application/x-www-form-urlencoded", **(headers or {})},
+    )
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def create_callback(sid, status, error_code=None):
+    """Create the form of a status callback like the one that Twilio posts."""
+    form = {"MessageSid": sid, "MessageStatus": status, "To": "+18881115500"}
+    if error_code is not None:
+        form["ErrorCode"] = error_code
+    return form
+
+
+def get_statuses(journal_file):
+    """Get the status and error of each message in the journal by its SID."""
+    connection = journal.connect(journal_file)
+    records = journal.get_history_page(connection, page_size=1000).records
+    connection.close()
+    return {record.sid: (record.status, record.error) for record in records}
+
+
+def test_receiver_records_callbacks(receiver):
+    """Ensure that every callback is recorded in the journal once the receiver stops."""
+    host, port = receiver.server_address[:2]
+    connection = http.client.HTTPConnection(host, port)
+    # send all of the callbacks over the same connection
+    for number in range(20):
+        assert post_callback(connection, create_callback(f"SM{number}", "sent")) == 204
+    assert (
+        post_callback(connection, create_callback("SM0", "undelivered", "30003")) == 204
+    )
+    connection.close()
+    receiver.stop()
+    assert receiver.recorded == 21
+    assert receiver.status_counts == {"sent": 20, "undelivered": 1}
+    statuses = get_statuses(receiver.journal_file)
+    assert len(statuses) == 20
+    assert statuses["SM0"] == ("undelivered", "30003")
+    assert statuses["SM1"] == ("sent", None)
+
+
+def test_receiver_keeps_final_status_of_callbacks_out_of_order(receiver):
+    """Ensure that a callback arriving late does not replace the final status of a message."""
+    host, port = receiver.server_address[:2]
+    connection = http.client.HTTPConnection(host, port)
+    post_callback(connection, create_callback("SM0", "delivered"))
+    post_callback(connection, create_callback("SM0", "sent"))
+    post_callback(connection, create_callback("SM1", "queued"))
+    post_callback(connection, create_callback("SM1", "sent"))
+    connection.close()
+    receiver.stop()
+    statuses = get_statuses(receiver.journal_file)
+    assert statuses["SM0"] == ("delivered", None)
+    assert statuses["SM1"] == ("sent", None)
+
+
+def test_receiver_rejects_incomplete_callback(receiver):
+    """Ensure that a callback without a SID or a status is rejected."""
+    host, port = receiver.server_address[:2]
+    connection = http.client.HTTPConnection(host, port)
+    assert post_callback(connection, {"MessageSid": "SM0"}) == 400
+    assert post_callback(connection, {"MessageStatus": "sent"}) == 400
+    connection.close()
+    receiver.stop()
+    assert receiver.recorded == 0
+
+
+def test_receiver_rejects_callback_without_valid_length(receiver):
+    """Ensure that a callback with a length that is not a number is rejected."""
+    host, port = receiver.server_address[:2]
+    for content_length in ["ten", "-1"]:
+        connection = http.client.HTTPConnection(host, port)
+        connection.putrequest("POST", "/")
+        connection.putheader("Content-Length", content_length)
+        connection.endheaders()
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 400
+        connection.close()
+    receiver.stop()
+    assert receiver.recorded == 0
+
+
+def test_receiver_validates_signature(tmp_path):
+    """Ensure that only the callbacks signed with the auth token are recorded."""
+    status_receiver = webhook.StatusReceiver(
+        tmp_path / constants.files.Journal,
+        port=0,
+        auth_token="fake-auth-token",
+        public_url="https://example.com",
+    )
+    status_receiver.start()
+    host, port = status_receiver.server_address[:2]
+    connection = http.client.HTTPConnection(host, port)
+    form = create_callback("SM0", "delivered")
+    signature = RequestValidator("fake-auth-token").compute_signature(
+        "https://example.com/status", form
+    )
+    headers = {constants.webhook.Signature: signature}
+    assert post_callback(connection, form, path="/status") == 403
+    assert post_callback(connection, form, {"X-Twilio-Signature": "forged"}) == 403
+    assert post_callback(connection, form, headers, path="/status") == 204
+    connection.close()
+    status_receiver.stop()
+    assert status_receiver.recorded == 1
+
+
+def test_receiver_writes_batches(tmp_path):
+    """Ensure that the callbacks waiting in the queue are written together in one batch."""
+    status_receiver = webhook.StatusReceiver(
+        tmp_path / constants.files.Journal, port=0, batch_size=3
+    )
+    for number in range(7):
+        status_receiver.statuses.put(
+            journal.MessageStatus(f"SM{number}", "+18881115500", "sent", None, None)
+        )
+    status_receiver.statuses.put(None)
+    batches = []
+    while True:
+        batch = status_receiver.collect_batch()
+        if batch is None:
+            break
+        batches.append(len(batch))
+    assert batches == [3, 3, 1]
+    status_receiver.server_close()